@@ -0,0 +1,12 @@
+from wigners_friend.compare import BackendSpec, compare_backends, format_table
+
+
+SPECS = [
+    BackendSpec("aer_simulator"),
+    BackendSpec("aer_simulator", depolarizing=0.02),
+    BackendSpec("aer_simulator", noise_backend="FakeKolkata"),
+]
+SHOTS = 10_000
+
+rows = compare_backends(SPECS, friend_sizes=[1, 2, 3], shots=SHOTS)
+print(format_table(rows))
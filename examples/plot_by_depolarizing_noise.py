@@ -1,36 +1,19 @@
 import numpy as np
-import qiskit
-from qiskit_aer.noise import NoiseModel, depolarizing_error
 
-from wigners_friend.config import ANGLES, BETA
-from wigners_friend.stats import compute_inequalities
-from wigners_friend.utils import generate_all_experiments
 from wigners_friend.plots import plot_noise_levels_vs_violation
+from wigners_friend.stats import bootstrap_inequalities
+from wigners_friend.sweep import run_density_sweep, sweep_grid
 
 
-BACKEND = qiskit.Aer.get_backend("aer_simulator")
 SHOTS = 10_000
-
-violations = []
-noise_levels = []
 friend_size = 1
-# Ranges from 0% -> 1% of noise.
-for noise_level in np.linspace(0, 0.1, 11):
-    NOISE_MODEL = NoiseModel()
 
-    error = depolarizing_error(noise_level, 1)
-    NOISE_MODEL.add_all_qubit_quantum_error(error, ["u1", "u2", "u3"])
-
-    results = generate_all_experiments(
-        backend=BACKEND,
-        noise_model=NOISE_MODEL,
-        shots=SHOTS,
-        angles=ANGLES,
-        beta=BETA,
-        charlie_size=friend_size,
-        debbie_size=friend_size,
-    )
-    violations.append(compute_inequalities(results, verbose=True))
-    noise_levels.append(noise_level)
+# Ranges from 0% -> 1% of noise.
+points = sweep_grid(noise_levels=np.linspace(0, 0.1, 11), friend_sizes=[friend_size], shots=[SHOTS])
+# Each noise level is simulated once as a density matrix and the shots are sampled from it.
+sweep = run_density_sweep(points, backend_name="aer_simulator")
 
-plot_noise_levels_vs_violation(noise_levels, violations, SHOTS, friend_size)
\ No newline at end of file
+noise_levels = [result.point.noise_level for result in sweep]
+violations = [result.violations for result in sweep]
+intervals = [bootstrap_inequalities(result.counts.counts, seed=0) for result in sweep]
+plot_noise_levels_vs_violation(noise_levels, violations, SHOTS, friend_size, intervals)
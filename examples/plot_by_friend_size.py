@@ -1,27 +1,17 @@
-from qiskit.providers import fake_provider
-from qiskit_aer.noise import NoiseModel
-
-from wigners_friend.config import ANGLES, BETA
-from wigners_friend.stats import compute_inequalities
-from wigners_friend.utils import generate_all_experiments
 from wigners_friend.plots import plot_friend_size_vs_violation
+from wigners_friend.stats import bootstrap_inequalities
+from wigners_friend.sweep import run_sweep, sweep_grid
 
 
-BACKEND = fake_provider.FakeKolkata()
-NOISE_MODEL = NoiseModel.from_backend(BACKEND)
 SHOTS = 1000
 
-friend_sizes = range(1, 4)
-violations = []
-for friend_size in friend_sizes:
-    results = generate_all_experiments(
-        backend=BACKEND,
-        noise_model=NOISE_MODEL,
-        shots=SHOTS,
-        angles=ANGLES,
-        beta=BETA,
-        charlie_size=friend_size,
-        debbie_size=friend_size
-    )
-    violations.append(compute_inequalities(results, verbose=True))
-plot_friend_size_vs_violation(friend_sizes, violations, SHOTS)
\ No newline at end of file
+
+# The sweep spawns worker processes, which re-import this module.
+if __name__ == "__main__":
+    friend_sizes = range(1, 4)
+    points = sweep_grid(friend_sizes=friend_sizes, shots=[SHOTS])
+    sweep = run_sweep(points, backend_name="FakeKolkata", backend_noise=True)
+
+    violations = [result.violations for result in sweep]
+    intervals = [bootstrap_inequalities(result.counts.counts, seed=0) for result in sweep]
+    plot_friend_size_vs_violation(friend_sizes, violations, SHOTS, intervals)
@@ -6,7 +6,7 @@ from qiskit_aer.noise import NoiseModel
 
 from wigners_friend.config import ANGLES, BETA
 from wigners_friend.stats import compute_inequalities
-from wigners_friend.utils import generate_all_experiments
+from wigners_friend.pipeline import run_experiments_checkpointed
 
 # Get the path to the directory this file is in
 BASEDIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
@@ -29,14 +29,19 @@ NOISE_MODEL = NoiseModel.from_backend(BACKEND)
 SHOTS = 1000
 friend_size = 1
 
-results = generate_all_experiments(
+# Job IDs and finished counts are kept in the checkpoint, so rerunning this script after an
+# interruption resumes the queued jobs instead of resubmitting them. The checkpoint is named
+# after the run, and one written for a different run is refused.
+results = run_experiments_checkpointed(
     backend=BACKEND,
     noise_model=NOISE_MODEL,
     shots=SHOTS,
     angles=ANGLES,
     beta=BETA,
-    charlie_size=friend_size,
-    debbie_size=friend_size
+    friend_sizes=[(friend_size, friend_size)],
+    checkpoint_path=os.path.join(BASEDIR, f"hardware_checkpoint_{BACKEND.name}_{friend_size}_{SHOTS}.json"),
+    poll_interval=30,
+    retrieve_job=service.job,
 )
-violations = compute_inequalities(results)
+violations = compute_inequalities(results[(friend_size, friend_size)])
 print(violations)
@@ -2,6 +2,7 @@ from qiskit.providers import fake_provider
 from qiskit_aer.noise import NoiseModel
 
 from wigners_friend.config import ANGLES, BETA
+from wigners_friend.mitigation import generate_mitigated_experiments
 from wigners_friend.stats import compute_inequalities
 from wigners_friend.utils import generate_all_experiments
 
@@ -18,7 +19,20 @@ results = generate_all_experiments(
     angles=ANGLES,
     beta=BETA,
     charlie_size=friend_size,
-    debbie_size=friend_size
+    debbie_size=friend_size,
+    batch=True,
 )
 violations = compute_inequalities(results)
 print(violations)
+
+# The same run with readout errors mitigated from a (cached) calibration of the measured qubits.
+mitigated = generate_mitigated_experiments(
+    backend=BACKEND,
+    noise_model=NOISE_MODEL,
+    shots=SHOTS,
+    angles=ANGLES,
+    beta=BETA,
+    charlie_size=friend_size,
+    debbie_size=friend_size,
+)
+print(compute_inequalities(mitigated))
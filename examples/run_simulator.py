@@ -17,7 +17,8 @@ results = generate_all_experiments(
     angles=ANGLES,
     beta=BETA,
     charlie_size=friend_size,
-    debbie_size=friend_size
+    debbie_size=friend_size,
+    batch=True,
 )
 violations = compute_inequalities(results)
 print(violations)
\ No newline at end of file
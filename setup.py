@@ -27,5 +27,6 @@ setuptools.setup(
     ],
     python_requires=">=3.11",
     install_requires=requirements,
+    entry_points={"console_scripts": ["wigners-friend=wigners_friend.cli:main"]},
     test_suite="tests",
 )
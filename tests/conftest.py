@@ -0,0 +1,13 @@
+import pytest
+
+from wigners_friend import compilation
+
+
+@pytest.fixture(autouse=True)
+def layout_cache(tmp_path_factory, monkeypatch):
+    """Keep the device layouts of every test out of the user's cache directory."""
+    cache_dir = tmp_path_factory.mktemp("layouts")
+    monkeypatch.setattr(compilation, "LAYOUT_CACHE_DIR", cache_dir)
+    compilation.clear_layout_cache()
+    yield cache_dir
+    compilation.clear_layout_cache()
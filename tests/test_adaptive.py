@@ -0,0 +1,34 @@
+import numpy as np
+import qiskit
+
+from wigners_friend.adaptive import backend_sampler, multinomial_sampler, run_adaptive
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.exact import exact_probability_tensor
+
+
+def test_run_adaptive_stops_on_violation():
+    probabilities = exact_probability_tensor(ANGLES, BETA)
+    result = run_adaptive(multinomial_sampler(probabilities, seed=5), inequality="brukner")
+
+    assert result.violated is True
+    assert result.value > 3 * result.std_error
+    # The Brukner inequality only involves four setting pairs, which get all extra shots.
+    shots = result.shots
+    assert shots[0, 1] == shots[1, 1] == 100
+    assert shots[0, 0] > 100 and shots[1, 2] > 100
+
+
+def test_run_adaptive_budget():
+    # At this visibility the Brukner inequality is zero, so its sign never becomes significant.
+    probabilities = exact_probability_tensor(ANGLES, BETA, visibility=2 / (2 + 0.124336))
+    result = run_adaptive(multinomial_sampler(probabilities, seed=5), "brukner", max_shots=5000)
+
+    assert result.shots.sum() == 5000
+    assert result.violated is None
+
+
+def test_backend_sampler():
+    sampler = backend_sampler(qiskit.Aer.get_backend("aer_simulator"), None, ANGLES, BETA, 1, 1, seed=1)
+    shots = np.array([[10, 20, 0], [10, 20, 0], [30, 30, 30]])
+
+    assert np.array_equal(sampler(shots).sum(axis=-1), shots)
@@ -0,0 +1,42 @@
+import copy
+
+from wigners_friend.benchmark import STAGES, compare_benchmarks, main, register_circuit, run_benchmarks
+from wigners_friend.config import PEEK, REVERSE_1
+
+
+def test_run_benchmarks():
+    report = run_benchmarks(friend_sizes=[1, 2], shots=[100], backend_names=["aer_simulator"], repeats=1)
+
+    assert [(entry["friend_size"], entry["shots"]) for entry in report["benchmarks"]] == [(1, 100), (2, 100)]
+    for entry in report["benchmarks"]:
+        assert list(entry["seconds"]) == STAGES
+        assert all(seconds >= 0 for seconds in entry["seconds"].values())
+
+
+def test_register_circuit_measures_whole_friend_registers():
+    assert register_circuit(PEEK, PEEK, 3).num_clbits == 6
+    assert register_circuit(PEEK, REVERSE_1, 3).num_clbits == 4
+    assert register_circuit(REVERSE_1, REVERSE_1, 3).num_clbits == 2
+
+
+def test_compare_benchmarks():
+    baseline = {
+        "benchmarks": [
+            {"backend": "aer_simulator", "friend_size": 1, "shots": 100, "seconds": {"execute": 0.1, "stats": 1e-5}}
+        ]
+    }
+    report = copy.deepcopy(baseline)
+    report["benchmarks"][0]["seconds"] = {"execute": 0.2, "stats": 5e-5}
+
+    # The stats stage is too short to compare.
+    assert [regression["stage"] for regression in compare_benchmarks(report, baseline)] == ["execute"]
+    assert compare_benchmarks(baseline, report) == []
+
+
+def test_main_writes_json(tmp_path):
+    output = tmp_path / "bench.json"
+    args = ["--friend-sizes", "1", "--shots", "50", "--backends", "aer_simulator", "--repeats", "1"]
+
+    assert main(args + ["--output", str(output)]) == 0
+    # Comparing against itself with a huge tolerance finds no regressions.
+    assert main(args + ["--baseline", str(output), "--tolerance", "100"]) == 0
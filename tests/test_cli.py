@@ -0,0 +1,76 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from wigners_friend import stats, sweep
+from wigners_friend.cli import main
+
+
+def read_rows(capsys) -> list[dict]:
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_run_and_analyze_stored_counts(tmp_path, capsys):
+    main(["--json", "run", "--shots", "500", "--friend-sizes", "1", "2", "--seed", "3", "--store", str(tmp_path)])
+    run_rows = read_rows(capsys)
+    assert [row["friend_size"] for row in run_rows] == [1, 2]
+
+    main(["--json", "analyze", str(tmp_path)])
+    analyze_rows = read_rows(capsys)
+    assert len(analyze_rows) == 2
+    assert {row["shots"] for row in analyze_rows} == {500}
+    for run_row in run_rows:
+        (analyze_row,) = [row for row in analyze_rows if row["charlie_size"] == run_row["friend_size"]]
+        assert analyze_row["lf"] == pytest.approx(run_row["lf"])
+
+
+def test_analyze_does_not_import_qiskit(tmp_path):
+    main(["sweep", "--shots", "100", "--seeds", "1", "--workers", "1", "--store", str(tmp_path)])
+    code = (
+        "import sys\n"
+        "from wigners_friend.cli import main\n"
+        f"main(['analyze', {str(tmp_path)!r}])\n"
+        "assert not {'qiskit', 'qiskit_aer', 'matplotlib'} & set(sys.modules)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert "aer_simulator" in output
+
+
+def test_sweep_tops_up_stored_entries(tmp_path, capsys, monkeypatch):
+    store = ["--store", str(tmp_path)]
+    main(["sweep", "--shots", "100", "200", "--seeds", "1", "--workers", "1", *store])
+    # Points that differ only in their shots share an entry, which holds the larger of them.
+    (entry,) = tmp_path.glob("*.json")
+    assert json.loads(entry.read_text())["shots"] == 200
+
+    main(["sweep", "--shots", "300", "--seeds", "1", "--workers", "1", *store])
+    assert json.loads(entry.read_text())["shots"] == 300
+
+    def run_sweep(points, *args, **kwargs):
+        assert not points
+        return []
+
+    monkeypatch.setattr(sweep, "run_sweep", run_sweep)
+    evaluated_shots = []
+    compute_inequalities = stats.compute_inequalities
+
+    def record_shots(counts):
+        evaluated_shots.append(counts.shots.tolist())
+        return compute_inequalities(counts)
+
+    monkeypatch.setattr(stats, "compute_inequalities", record_shots)
+    capsys.readouterr()
+    # Each point is evaluated on exactly its own shots, drawn from the 300 stored ones.
+    main(["--json", "sweep", "--shots", "100", "300", "--seeds", "1", *store])
+    rows = read_rows(capsys)
+    assert [row["shots"] for row in rows] == [100, 300]
+    assert evaluated_shots == [[[100] * 3] * 3, [[300] * 3] * 3]
+    assert rows[0]["lf"] != rows[1]["lf"]
+    assert json.loads(entry.read_text())["shots"] == 300
+
+
+def test_rejects_device_noise_with_noise_levels():
+    with pytest.raises(SystemExit):
+        main(["run", "--device-noise", "--noise-levels", "0.1"])
@@ -0,0 +1,39 @@
+import pytest
+
+from wigners_friend.backends import get_backend
+from wigners_friend.compare import BackendSpec, compare_backends, format_table
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.exact import generate_exact_experiments
+from wigners_friend.noise import backend_noise_model
+from wigners_friend.stats import compute_inequalities
+
+
+def test_compare_backends():
+    backend_noise_model.cache_clear()
+    specs = [
+        BackendSpec("aer_simulator"),
+        BackendSpec("aer_simulator", noise_backend="FakeKolkata"),
+        BackendSpec("aer_simulator", depolarizing=0.05),
+    ]
+    rows = compare_backends(specs, friend_sizes=[1, 2], shots=5000, seed=3, max_workers=4)
+
+    assert [(row["backend"], row["friend_size"]) for row in rows] == [
+        ("aer_simulator", 1),
+        ("aer_simulator", 2),
+        ("aer_simulator+FakeKolkata", 1),
+        ("aer_simulator+FakeKolkata", 2),
+        ("aer_simulator+depolarizing(0.05)", 1),
+        ("aer_simulator+depolarizing(0.05)", 2),
+    ]
+    # The device noise model was built once and shared by both friend sizes.
+    assert backend_noise_model.cache_info().misses == 1
+    assert backend_noise_model(get_backend("FakeKolkata")) is specs[1].noise_model()
+
+    expected = compute_inequalities(generate_exact_experiments(ANGLES, BETA, 1, 1))
+    assert rows[0]["lf"] == pytest.approx(expected["lf"], abs=0.1)
+    assert len(format_table(rows).splitlines()) == len(rows) + 1
+
+
+def test_backend_spec_rejects_two_noise_sources():
+    with pytest.raises(ValueError):
+        BackendSpec("aer_simulator", noise_backend="FakeKolkata", depolarizing=0.1).noise_model()
@@ -0,0 +1,102 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from qiskit_aer import AerSimulator
+
+from wigners_friend import compilation
+from wigners_friend.backends import coupling_edges, get_backend
+from wigners_friend.compilation import clear_layout_cache, compile_circuit, device_layout, interaction_edges
+from wigners_friend.config import ANGLES, BETA, REVERSE_1, SETTINGS
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.fan_out import FanOut
+from wigners_friend.layout import two_qubit_gate_count
+
+
+# Heavy-hex qubits have at most three neighbours, and no two of those with three are coupled.
+@pytest.mark.parametrize("fan_out, charlie_size, debbie_size", [
+    (FanOut.LADDER, 2, 1), (FanOut.TREE, 2, 1), (FanOut.CHAIN, 3, 4),
+])
+def test_device_layout_embeds_fan_out(layout_cache, fan_out, charlie_size, debbie_size):
+    backend = get_backend("FakeKolkata")
+    edges = {tuple(sorted(edge)) for edge in coupling_edges(backend)}
+    layout = device_layout(backend, charlie_size, debbie_size, fan_out)
+
+    assert len(set(layout)) == 2 + charlie_size + debbie_size
+    for a, b in interaction_edges(charlie_size, debbie_size, fan_out):
+        assert tuple(sorted((layout[a], layout[b]))) in edges
+
+
+def test_device_layout_is_read_from_disk(layout_cache, monkeypatch):
+    backend = get_backend("FakeKolkata")
+    layout = device_layout(backend, 4, 2, FanOut.LADDER)
+    assert len(list(layout_cache.glob("*.json"))) == 1
+
+    clear_layout_cache()
+
+    def find_layout(*args):
+        raise AssertionError("The layout should come from the cache.")
+
+    monkeypatch.setattr(compilation, "find_layout", find_layout)
+    assert device_layout(backend, 4, 2, FanOut.LADDER) == layout
+    assert device_layout(get_backend("aer_simulator"), 4, 2, FanOut.LADDER) is None
+
+
+def test_device_layout_is_safe_to_search_concurrently(layout_cache):
+    backend = get_backend("FakeKolkata")
+    for _ in range(30):
+        for path in layout_cache.iterdir():
+            path.unlink()
+        clear_layout_cache()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            layouts = list(executor.map(lambda _: device_layout(backend, 2, 2, FanOut.LADDER), range(8)))
+        assert all(layout == layouts[0] for layout in layouts)
+        assert [path.suffix for path in layout_cache.iterdir()] == [".json"]
+
+
+def test_device_layout_is_searched_again_after_calibration(layout_cache, monkeypatch):
+    backend = get_backend("FakeKolkata")
+    device_layout(backend, 2, 2, FanOut.LADDER)
+    edge_errors, readout_errors = compilation.qubit_errors(backend)
+
+    # A recalibration that makes every qubit of the cached layout read out badly.
+    recalibrated = (edge_errors, {qubit: 0.5 for qubit in readout_errors})
+    monkeypatch.setattr(compilation, "qubit_errors", lambda backend: recalibrated)
+    device_layout(backend, 2, 2, FanOut.LADDER)
+    assert len(list(layout_cache.glob("*.json"))) == 2
+
+
+@pytest.mark.parametrize("fan_out", list(FanOut))
+@pytest.mark.parametrize("friend_size", [1, 3])
+def test_compiled_reverse_keeps_friends(layout_cache, fan_out, friend_size):
+    backend = get_backend("FakeKolkata")
+    circuit = ewfs(REVERSE_1, REVERSE_1, ANGLES, BETA, friend_size, friend_size, fan_out)
+    compiled = compile_circuit(circuit, backend, friend_size, friend_size, fan_out, seed=1)
+
+    # The copy and uncopy of both friends, plus the CNOT preparing the shared state.
+    fan_out_gates = 2 * 2 * friend_size + 1
+    if fan_out == FanOut.CHAIN:
+        assert two_qubit_gate_count(compiled) == fan_out_gates
+    else:
+        assert two_qubit_gate_count(compiled) >= fan_out_gates
+
+
+@pytest.mark.parametrize("fan_out", list(FanOut))
+def test_compiled_circuits_sample_exact_distribution(layout_cache, fan_out):
+    backend = get_backend("FakeKolkata")
+    shots = 4000
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    circuits = [
+        compile_circuit(ewfs(alice_setting, bob_setting, ANGLES, BETA, 3, 2, fan_out), backend, 3, 2, fan_out)
+        for alice_setting, bob_setting in settings
+    ]
+    result = AerSimulator().run(circuits, shots=shots, seed_simulator=5).result()
+
+    counts = ExperimentCounts()
+    for i, (alice_setting, bob_setting) in enumerate(settings):
+        counts.add(alice_setting, bob_setting, result.get_counts(i))
+    # Five standard errors of the largest possible binomial spread.
+    assert np.abs(counts.normalize() - exact_probability_tensor(ANGLES, BETA)).max() < 5 * 0.5 / np.sqrt(shots)
@@ -0,0 +1,53 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from wigners_friend.config import PEEK, REVERSE_1, SETTINGS
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.stats import compute_inequalities
+
+
+def random_counts(seed):
+    return ExperimentCounts(np.random.default_rng(seed).integers(0, 100, size=(len(SETTINGS), len(SETTINGS), 4)))
+
+
+def test_dict_round_trip():
+    counts = random_counts(0)
+
+    assert ExperimentCounts.from_dict(counts.to_dict()) == counts
+    equal_shots = ExperimentCounts(np.full((len(SETTINGS), len(SETTINGS), 4), 25))
+    assert ExperimentCounts.from_results(equal_shots.to_results(), 100) == equal_shots
+    assert compute_inequalities(counts) == pytest.approx(compute_inequalities(counts.to_results()))
+
+
+def test_add_reads_qiskit_keys():
+    counts = ExperimentCounts()
+    # Big-endian keys: "01" is Alice 1 and Bob 0.
+    counts.add(PEEK, REVERSE_1, {"01": 3, "10": 2})
+
+    assert counts.to_dict()[(PEEK, REVERSE_1)] == {"10": 3, "01": 2}
+    assert counts.shots[0, 1] == 5
+
+
+def test_merge_buffer_and_pickle():
+    a, b = random_counts(1), random_counts(2)
+    merged = a + b
+
+    assert np.array_equal(merged.counts, a.counts + b.counts)
+    assert np.array_equal(merged.shots, a.shots + b.shots)
+    a += b
+    assert a == merged
+    assert ExperimentCounts.from_buffer(merged.tobytes()) == merged
+    assert pickle.loads(pickle.dumps(merged)) == merged
+    assert np.allclose(merged.normalize().sum(axis=-1), 1)
+
+
+def test_subsample_draws_exact_shots():
+    counts = ExperimentCounts(np.random.default_rng(1).multinomial(500, np.full(4, 0.25), size=(3, 3)))
+    subsample = counts.subsample(200, seed=2)
+
+    assert np.all(subsample.shots == 200)
+    assert np.all(subsample.counts <= counts.counts)
+    assert subsample == counts.subsample(200, seed=2)
+    assert counts.subsample(500) == counts
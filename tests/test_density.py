@@ -0,0 +1,49 @@
+import numpy as np
+from qiskit_aer import AerSimulator
+from qiskit_aer.noise import ReadoutError
+
+from wigners_friend.backends import get_backend
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.density import noisy_probability_tensor, sample_experiments
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.noise import backend_noise_model, depolarizing_noise_model
+from wigners_friend.stats import results_to_tensor
+from wigners_friend.utils import generate_all_experiments
+
+
+def test_noiseless_matches_exact():
+    assert np.allclose(noisy_probability_tensor(None, ANGLES, BETA, 1, 2), exact_probability_tensor(ANGLES, BETA))
+
+
+def test_noisy_matches_sampled_shots():
+    noise_model = depolarizing_noise_model(0.1)
+    noise_model.add_all_qubit_readout_error(ReadoutError([[0.95, 0.05], [0.1, 0.9]]))
+    probabilities = noisy_probability_tensor(noise_model, ANGLES, BETA, 2, 1)
+
+    shots = 100_000
+    sampled = results_to_tensor(
+        generate_all_experiments(AerSimulator(), noise_model, shots, ANGLES, BETA, 2, 1, batch=True, seed=3)
+    )
+    # Five standard errors of the largest possible binomial variance.
+    assert np.allclose(probabilities, sampled, atol=5 * 0.5 / np.sqrt(shots))
+
+
+def test_sample_experiments_is_seeded():
+    probabilities = exact_probability_tensor(ANGLES, BETA)
+
+    assert sample_experiments(probabilities, 1000, seed=1) == sample_experiments(probabilities, 1000, seed=1)
+    assert np.allclose(results_to_tensor(sample_experiments(probabilities, 10**7, seed=2)), probabilities, atol=1e-3)
+
+
+def test_device_noise_follows_the_layout():
+    backend = get_backend("FakeKolkata")
+    noise_model = backend_noise_model(backend)
+    probabilities = noisy_probability_tensor(noise_model, ANGLES, BETA, 1, 1, backend)
+
+    shots = 20_000
+    sampled = results_to_tensor(
+        generate_all_experiments(
+            backend, noise_model, shots, ANGLES, BETA, 1, 1, batch=True, seed=3, layout="device"
+        )
+    )
+    assert np.allclose(probabilities, sampled, atol=5 * 0.5 / np.sqrt(shots))
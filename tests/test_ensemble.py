@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from wigners_friend.backends import get_backend
+from wigners_friend.config import ANGLES, BETA, PEEK, REVERSE_1
+from wigners_friend.density import measured_qubits
+from wigners_friend.ensemble import allocate_shots, generate_ensemble_counts, peek_variants
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.templates import _transpile_template
+
+
+def test_peek_offsets_select_friend_qubit():
+    circuit = ewfs(PEEK, PEEK, ANGLES, BETA, 3, 2, charlie_offset=2, debbie_offset=1)
+    # Charlie's register starts at qubit 2 and Debbie's at qubit 5.
+    assert measured_qubits(circuit) == [4, 6]
+
+
+def test_peek_variants_and_allocation():
+    assert peek_variants(PEEK, PEEK, 2, 3) == [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]
+    assert peek_variants(PEEK, REVERSE_1, 2, 3) == [(0, 0), (1, 0)]
+    assert peek_variants(REVERSE_1, REVERSE_1, 2, 3) == [(0, 0)]
+
+    allocation = allocate_shots(101, 6, np.random.default_rng(1))
+    assert allocation.sum() == 101 and allocation.max() - allocation.min() == 1
+    assert np.array_equal(allocation, allocate_shots(101, 6, np.random.default_rng(1)))
+
+
+def test_ensemble_counts_are_reproducible_and_compiled_once():
+    backend = get_backend("aer_simulator")
+    shots = 3001
+    counts = generate_ensemble_counts(backend, None, shots, ANGLES, BETA, 3, 2, seed=7)
+    misses = _transpile_template.cache_info().misses
+
+    assert generate_ensemble_counts(backend, None, shots, ANGLES, BETA, 3, 2, seed=7) == counts
+    assert _transpile_template.cache_info().misses == misses
+
+    experiment_counts = ExperimentCounts.from_dict(counts)
+    assert np.all(experiment_counts.shots == shots)
+    assert np.abs(experiment_counts.normalize() - exact_probability_tensor(ANGLES, BETA)).max() == pytest.approx(
+        0, abs=5 * 0.5 / np.sqrt(shots)
+    )
+
+
+class ShotCountingBackend:
+    """Backend wrapper that adds up the shots it is asked to run."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.shots = 0
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def run(self, circuits, **options):
+        self.shots += len(circuits) * options["shots"]
+        return self.backend.run(circuits, **options)
+
+
+def test_ensemble_runs_only_the_allocated_shots():
+    backend = ShotCountingBackend(get_backend("aer_simulator"))
+    shots = 1001
+    counts = generate_ensemble_counts(backend, None, shots, ANGLES, BETA, 3, 2, seed=3)
+
+    assert backend.shots == 9 * shots
+    assert np.all(ExperimentCounts.from_dict(counts).shots == shots)
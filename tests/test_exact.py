@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from wigners_friend.config import ANGLES, BETA, SETTINGS
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.exact import exact_probability_tensor, generate_exact_experiments
+from wigners_friend.fan_out import FanOut
+from wigners_friend.stats import compute_inequalities
+
+
+def statevector_probabilities(alice_setting, bob_setting, angles, beta, friend_size, fan_out=FanOut.LADDER):
+    """Probabilities of the measured bits from a full statevector simulation of `ewfs`."""
+    qc = ewfs(alice_setting, bob_setting, angles, beta, friend_size, friend_size, fan_out)
+    measured = {
+        qc.find_bit(instruction.clbits[0]).index: qc.find_bit(instruction.qubits[0]).index
+        for instruction in qc.data
+        if instruction.operation.name == "measure"
+    }
+    state = Statevector(qc.remove_final_measurements(inplace=False))
+    probabilities = state.probabilities([measured[0], measured[1]])
+    # Qiskit is little-endian, so index 1 is Alice's bit.
+    return {f"{outcome & 1}{outcome >> 1}": probabilities[outcome] for outcome in range(4)}
+
+
+@pytest.mark.parametrize(
+    "friend_size, fan_out",
+    [(1, FanOut.LADDER), (2, FanOut.LADDER), (3, FanOut.TREE), (3, FanOut.CHAIN)],
+)
+def test_exact_matches_statevector(friend_size, fan_out):
+    angles = {setting: 0.4 * setting + 0.1 for setting in SETTINGS}
+    beta = 2.3
+    results = generate_exact_experiments(angles, beta, friend_size, friend_size)
+
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        expected = statevector_probabilities(alice_setting, bob_setting, angles, beta, friend_size, fan_out)
+        for outcome, probability in expected.items():
+            assert np.isclose(results[(alice_setting, bob_setting)][outcome], probability)
+
+
+def test_exact_violations():
+    violations = compute_inequalities(generate_exact_experiments(ANGLES, BETA, 1, 1))
+
+    assert np.isclose(violations["lf"], 0.59116, atol=1e-4)
+    assert np.isclose(violations["I3322"], 0.299348, atol=1e-4)
+    assert np.isclose(violations["brukner"], 0.124336, atol=1e-4)
+    assert np.isclose(violations["semi_brukner"], 0.380364, atol=1e-4)
+    assert np.isclose(violations["bell_non_lf"], 0.57028, atol=1e-4)
+
+
+def test_exact_probability_tensor_batched():
+    angles = {setting: np.array([ANGLES[setting], 0.0]) for setting in SETTINGS}
+    tensor = exact_probability_tensor(angles, np.array([BETA, 1.0]))
+
+    assert tensor.shape == (2, 3, 3, 4)
+    assert np.allclose(tensor.sum(axis=-1), 1)
+    assert np.allclose(tensor[0], exact_probability_tensor(ANGLES, BETA))
@@ -0,0 +1,39 @@
+import csv
+
+import pytest
+import qiskit
+
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.instrumentation import csv_sink
+from wigners_friend.utils import generate_all_experiments
+
+
+@pytest.mark.parametrize("batch, use_templates", [(True, False), (False, True)])
+def test_generate_all_experiments_metadata(tmp_path, batch, use_templates):
+    path = tmp_path / "metrics.csv"
+    results, metadata = generate_all_experiments(
+        backend=qiskit.Aer.get_backend("aer_simulator"),
+        noise_model=None,
+        shots=500,
+        angles=ANGLES,
+        beta=BETA,
+        charlie_size=2,
+        debbie_size=1,
+        batch=batch,
+        use_templates=use_templates,
+        seed=1,
+        return_metadata=True,
+        sinks=[csv_sink(path)],
+    )
+
+    assert set(metadata.settings) == set(results)
+    for metrics in metadata.settings.values():
+        assert metrics.shots == 500
+        assert metrics.depth > 0 and metrics.two_qubit_gates >= 1
+        assert min(metrics.build_seconds, metrics.transpile_seconds, metrics.execution_seconds) >= 0
+    assert metadata.wall_seconds > 0
+
+    with path.open() as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 9
+    assert {row["backend"] for row in rows} == {"aer_simulator"}
@@ -0,0 +1,48 @@
+from wigners_friend.backends import coupling_edges, get_backend
+from wigners_friend.config import ALICE
+from wigners_friend.ewfs_circuit import fan_out_pairs
+from wigners_friend.fan_out import FanOut
+from wigners_friend.compilation import device_layout
+from wigners_friend.layout import chain_layout, fan_out_layout, fan_out_report
+
+
+def test_fan_out_pairs():
+    assert fan_out_pairs(ALICE, 2, 3, FanOut.LADDER) == [(0, 2), (0, 3), (0, 4)]
+    assert fan_out_pairs(ALICE, 2, 3, FanOut.CHAIN) == [(0, 2), (2, 3), (3, 4)]
+    # Each layer doubles the copies: 0 -> 2, then 0 -> 3 and 2 -> 4, then 0 -> 5.
+    assert fan_out_pairs(ALICE, 2, 4, FanOut.TREE) == [(0, 2), (0, 3), (2, 4), (0, 5)]
+
+
+def test_chain_layout_follows_coupling_map():
+    backend = get_backend("FakeKolkata")
+    edges = set(coupling_edges(backend))
+    layout = chain_layout(backend, 3, 2)
+
+    assert len(set(layout)) == 7
+    alice, bob, charlie, debbie = layout[0], layout[1], layout[2:5], layout[5:]
+    for a, b in zip([alice] + charlie[:-1], charlie):
+        assert (a, b) in edges
+    for a, b in zip([bob] + debbie[:-1], debbie):
+        assert (a, b) in edges
+    assert (alice, bob) in edges
+
+
+def test_fan_out_report():
+    report = fan_out_report(8, 8)
+    assert report[FanOut.TREE]["depth"] < report[FanOut.LADDER]["depth"]
+    assert {entry["two_qubit_gates"] for entry in report.values()} == {17}
+
+    routed = fan_out_report(4, 4, get_backend("FakeKolkata"), seed=1)
+    # The chain is laid out on a path of the device, so routing adds no SWAPs.
+    assert routed[FanOut.CHAIN]["two_qubit_gates"] == 9
+    assert routed[FanOut.LADDER]["two_qubit_gates"] > 9
+
+
+def test_fan_out_layout_is_device_layout_only_on_request(layout_cache):
+    backend = get_backend("FakeKolkata")
+    assert fan_out_layout(backend, 2, 2, FanOut.LADDER) is None
+    assert fan_out_layout(backend, 3, 2, FanOut.CHAIN) == chain_layout(backend, 3, 2)
+    assert not list(layout_cache.iterdir())
+
+    assert fan_out_layout(backend, 2, 2, FanOut.LADDER, layout="device") == device_layout(backend, 2, 2)
+    assert len(list(layout_cache.iterdir())) == 1
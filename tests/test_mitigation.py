@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import qiskit
+from qiskit_aer.noise import NoiseModel, ReadoutError
+
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.exact import generate_exact_experiments
+from wigners_friend.mitigation import (
+    calibrate,
+    clear_calibration_cache,
+    generate_mitigated_experiments,
+    get_calibration,
+    mitigate_probabilities,
+)
+from wigners_friend.stats import compute_inequalities
+
+BACKEND = qiskit.Aer.get_backend("aer_simulator")
+CONFUSION = np.array([[0.9, 0.15], [0.1, 0.85]])
+
+
+def readout_noise_model():
+    noise_model = NoiseModel()
+    # ReadoutError rows are prepared states, so it takes the transposed confusion matrix.
+    noise_model.add_all_qubit_readout_error(ReadoutError(CONFUSION.T))
+    return noise_model
+
+
+def test_mitigate_probabilities_inverts_confusion():
+    true = np.random.default_rng(0).dirichlet(np.ones(8), size=3).reshape(3, 2, 2, 2)
+    matrices = np.broadcast_to(CONFUSION, (3, 3, 2, 2))
+    measured = true
+    for k in range(3):
+        measured = np.moveaxis(np.einsum("mt,bt...->bm...", CONFUSION, np.moveaxis(measured, k + 1, 1)), 1, k + 1)
+
+    assert np.allclose(mitigate_probabilities(measured, matrices), true)
+
+
+def test_calibration_is_cached():
+    clear_calibration_cache()
+    noise_model = readout_noise_model()
+
+    calibration = get_calibration(BACKEND, noise_model, [0, 1], shots=20_000, seed=1)
+    assert np.allclose(calibration.matrices, CONFUSION, atol=0.01)
+    assert get_calibration(BACKEND, noise_model, [1, 0]) is calibration
+    assert get_calibration(BACKEND, noise_model, [0, 1], max_age=0) is not calibration
+    assert calibrate(BACKEND, None, [0], shots=100).matrices[0].tolist() == [[1, 0], [0, 1]]
+
+
+def test_generate_mitigated_experiments():
+    clear_calibration_cache()
+    results = generate_mitigated_experiments(
+        BACKEND, readout_noise_model(), 20_000, ANGLES, BETA, 1, 1, calibration_shots=50_000, seed=2
+    )
+    violations = compute_inequalities(results)
+    expected = compute_inequalities(generate_exact_experiments(ANGLES, BETA, 1, 1))
+
+    for name, value in expected.items():
+        assert violations[name] == pytest.approx(value, abs=0.1)
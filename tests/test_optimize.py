@@ -0,0 +1,36 @@
+import numpy as np
+import qiskit
+
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.exact import generate_exact_experiments
+from wigners_friend.optimize import exact_objective, maximize, noisy_objective, to_candidate
+from wigners_friend.stats import compute_inequalities
+
+
+def test_exact_objective_is_batched():
+    candidates = np.random.default_rng(0).uniform(0, np.pi, size=(5, 4))
+    values = exact_objective("I3322")(candidates)
+
+    for candidate, value in zip(candidates, values):
+        assert np.isclose(exact_objective("I3322")(candidate[None])[0], value)
+    assert np.isclose(
+        exact_objective("brukner")(to_candidate(ANGLES, BETA)[None])[0],
+        compute_inequalities(generate_exact_experiments(ANGLES, BETA, 1, 1))["brukner"],
+    )
+
+
+def test_maximize_exact():
+    result = maximize(exact_objective("brukner"), seed=0)
+
+    assert result.value > 0.7
+    assert result.history == sorted(result.history)
+    assert np.isclose(exact_objective("brukner")(to_candidate(result.angles, result.beta)[None])[0], result.value)
+
+
+def test_noisy_objective_matches_exact():
+    shots = 20_000
+    objective = noisy_objective(qiskit.Aer.get_backend("aer_simulator"), None, shots, 1, 1, "brukner", seed=1)
+    candidates = np.stack([to_candidate(ANGLES, BETA), np.zeros(4)])
+
+    # A generous bound on the shot noise of a weighted sum of probabilities.
+    assert np.allclose(objective(candidates), exact_objective("brukner")(candidates), atol=8 * 2 / np.sqrt(shots))
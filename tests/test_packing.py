@@ -0,0 +1,52 @@
+import numpy as np
+from qiskit_aer import AerSimulator
+
+from wigners_friend.config import ANGLES, BETA, SETTINGS
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.backends import coupling_edges, get_backend
+from wigners_friend.packing import (
+    SIMULATOR_MAX_PACKED_QUBITS,
+    generate_packed_experiments,
+    instance_layouts,
+    unpack_counts,
+)
+from wigners_friend.stats import results_to_tensor
+
+
+def test_instance_layouts_are_disjoint_and_connected():
+    backend = get_backend("FakeKolkata")
+    edges = set(coupling_edges(backend))
+    layouts = instance_layouts(backend, 4)
+
+    assert len(layouts) > 1
+    qubits = [qubit for layout in layouts for qubit in layout]
+    assert len(qubits) == len(set(qubits))
+    for layout in layouts:
+        assert (layout[0], layout[1]) in edges
+        # Every qubit after the first is adjacent to an earlier one.
+        for i, qubit in enumerate(layout[1:], start=1):
+            assert any((other, qubit) in edges for other in layout[:i])
+
+
+def test_simulator_packing_is_capped():
+    simulator = get_backend("aer_simulator")
+    assert len(instance_layouts(simulator, 4)) == SIMULATOR_MAX_PACKED_QUBITS // 4
+    assert len(instance_layouts(simulator, 20)) == 1
+    assert len(instance_layouts(simulator, 4, max_instances=5)) == 5
+
+
+def test_unpack_counts():
+    # Instance 0 measured "10" and instance 1 measured "01", in classical bit order.
+    assert unpack_counts({"1001": 3, "1000": 1}, 2) == [{"10": 3, "00": 1}, {"01": 4}]
+
+
+def test_packed_experiments_match_exact():
+    shots = 20_000
+    results = generate_packed_experiments(
+        AerSimulator(), None, shots, ANGLES, BETA, 1, 2, replicas=2, max_instances=2, seed=5
+    )
+
+    assert set(results) == {(a, b) for a in SETTINGS for b in SETTINGS}
+    assert np.allclose(
+        results_to_tensor(results), exact_probability_tensor(ANGLES, BETA), atol=5 * 0.5 / np.sqrt(2 * shots)
+    )
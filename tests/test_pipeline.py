@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+import qiskit
+from qiskit.providers import Backend, JobStatus, JobV1
+
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.pipeline import (
+    Checkpoint,
+    run_experiments_async,
+    run_experiments_checkpointed,
+    run_fingerprint,
+)
+
+
+class DelayedJob:
+    """Job that reports itself as queued until its queue delay has passed."""
+
+    def __init__(self, job: JobV1, ready_at: float):
+        self._job = job
+        self._ready_at = ready_at
+
+    def job_id(self) -> str:
+        return self._job.job_id()
+
+    def status(self) -> JobStatus:
+        if time.monotonic() < self._ready_at:
+            return JobStatus.QUEUED
+        return self._job.status()
+
+    def result(self):
+        time.sleep(max(0.0, self._ready_at - time.monotonic()))
+        return self._job.result()
+
+
+class DelayedBackend:
+    """Local backend wrapper that mimics a device queue by delaying every job.
+
+    Submitted jobs can be looked up again with `retrieve_job`, as long as the wrapper lives.
+    """
+
+    def __init__(self, backend: Backend, queue_delay: float):
+        self.backend = backend
+        self.queue_delay = queue_delay
+        self.submitted = 0
+        self._jobs: dict[str, DelayedJob] = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self.backend, name)
+
+    def run(self, run_input, **options) -> DelayedJob:
+        self.submitted += 1
+        job = DelayedJob(self.backend.run(run_input, **options), time.monotonic() + self.queue_delay)
+        self._jobs[job.job_id()] = job
+        return job
+
+    def retrieve_job(self, job_id: str) -> DelayedJob:
+        return self._jobs[job_id]
+
+
+def test_run_experiments_checkpointed(tmp_path):
+    backend = DelayedBackend(qiskit.Aer.get_backend("aer_simulator"), queue_delay=0.5)
+    checkpoint_path = tmp_path / "checkpoint.json"
+    kwargs = dict(
+        noise_model=None, shots=100, angles=ANGLES, beta=BETA, friend_sizes=[(1, 1), (2, 2)],
+        checkpoint_path=checkpoint_path, poll_interval=0.05,
+    )
+
+    start = time.monotonic()
+    results = run_experiments_checkpointed(backend, **kwargs)
+    # All 18 queue delays overlap.
+    assert time.monotonic() - start < 18 * 0.5
+    assert backend.submitted == 18
+    assert all(
+        np.isclose(sum(probabilities.values()), 1)
+        for experiment in results.values()
+        for probabilities in experiment.values()
+    )
+
+    # A rerun is served from the checkpoint without submitting anything.
+    assert run_experiments_checkpointed(backend, **kwargs) == results
+    assert backend.submitted == 18
+
+
+def test_run_experiments_resumes_submitted_jobs(tmp_path):
+    backend = DelayedBackend(qiskit.Aer.get_backend("aer_simulator"), queue_delay=3.0)
+    kwargs = dict(
+        noise_model=None, shots=100, angles=ANGLES, beta=BETA, friend_sizes=[(1, 1)],
+        checkpoint_path=tmp_path / "checkpoint.json", poll_interval=0.05,
+        retrieve_job=backend.retrieve_job,
+    )
+
+    # Stop the run while the jobs are still queued.
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(run_experiments_async(backend, **kwargs), timeout=1.5))
+    checkpoint = json.loads(kwargs["checkpoint_path"].read_text())
+    assert len(checkpoint["job_ids"]) == 9 and not checkpoint["counts"]
+
+    run_experiments_checkpointed(backend, **kwargs)
+    assert backend.submitted == 9
+
+
+def test_checkpoint_of_another_run_is_refused(tmp_path):
+    backend = DelayedBackend(qiskit.Aer.get_backend("aer_simulator"), queue_delay=0.0)
+    kwargs = dict(
+        noise_model=None, angles=ANGLES, beta=BETA, friend_sizes=[(1, 1)],
+        checkpoint_path=tmp_path / "checkpoint.json", poll_interval=0.01,
+    )
+    run_experiments_checkpointed(backend, shots=100, **kwargs)
+
+    with pytest.raises(ValueError, match="different run"):
+        run_experiments_checkpointed(backend, shots=200, **kwargs)
+    with pytest.raises(ValueError, match="different run"):
+        run_experiments_checkpointed(backend, shots=100, **{**kwargs, "beta": BETA / 2})
+    assert backend.submitted == 9
+
+    fingerprint = run_fingerprint(backend, None, 100)
+    with pytest.raises(ValueError, match="different run"):
+        Checkpoint(kwargs["checkpoint_path"], fingerprint)
@@ -0,0 +1,71 @@
+import itertools
+
+import numpy as np
+import pytest
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+from qiskit_aer import AerSimulator
+from qiskit_aer.noise import NoiseModel, ReadoutError, depolarizing_error
+
+from wigners_friend.config import ALICE, ANGLES, BETA, BOB, MEAS_SIZE, SETTINGS, SYS_SIZE
+from wigners_friend.ewfs_circuit import apply_setting, cnot_ladder, ewfs_rotation, prepare_bipartite_system
+from wigners_friend.exact import generate_exact_experiments
+from wigners_friend.reduced import FriendNoise, generate_reduced_experiments, reduced_probabilities
+from wigners_friend.stats import compute_inequalities
+
+
+def noisy_probabilities(alice_setting, bob_setting, angles, beta, charlie_size, debbie_size, noise):
+    """Exact probabilities of the measured bits with depolarized friend qubits, from Aer."""
+    qc = QuantumCircuit(QuantumRegister(SYS_SIZE + charlie_size + debbie_size), ClassicalRegister(MEAS_SIZE))
+    prepare_bipartite_system(qc)
+    ewfs_rotation(qc, ALICE, angles[1])
+    ewfs_rotation(qc, BOB, beta - angles[1])
+    cnot_ladder(qc, ALICE, SYS_SIZE, charlie_size)
+    cnot_ladder(qc, BOB, SYS_SIZE + charlie_size, debbie_size)
+    for qubit in range(SYS_SIZE, SYS_SIZE + charlie_size + debbie_size):
+        qc.append(depolarizing_error(noise.depolarizing, 1).to_instruction(), [qubit])
+    apply_setting(qc, ALICE, alice_setting, angles[alice_setting], angles[1], charlie_size, debbie_size)
+    apply_setting(
+        qc, BOB, bob_setting, beta - angles[bob_setting], beta - angles[1], charlie_size, debbie_size
+    )
+
+    noise_model = NoiseModel()
+    q = noise.readout
+    noise_model.add_all_qubit_readout_error(ReadoutError([[1 - q, q], [q, 1 - q]]))
+    shots = 200_000
+    counts = (
+        AerSimulator(method="density_matrix", noise_model=noise_model, seed_simulator=1)
+        .run(qc, shots=shots)
+        .result()
+        .get_counts()
+    )
+    # Count keys are big-endian, so the last character is Alice's bit.
+    return np.array([counts.get(f"{bob}{alice}", 0) / shots for alice in "01" for bob in "01"])
+
+
+def test_reduced_without_noise_matches_exact():
+    reduced = generate_reduced_experiments(None, None, ANGLES, BETA, 3, 5)
+    exact = generate_exact_experiments(ANGLES, BETA, 3, 5)
+    for pair, probabilities in exact.items():
+        assert reduced[pair] == pytest.approx(probabilities)
+
+
+@pytest.mark.parametrize("charlie_size, debbie_size", [(1, 2), (2, 1)])
+def test_reduced_matches_density_matrix(charlie_size, debbie_size):
+    noise = FriendNoise(depolarizing=0.2, readout=0.05)
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        expected = noisy_probabilities(alice_setting, bob_setting, ANGLES, BETA, charlie_size, debbie_size, noise)
+        probabilities = reduced_probabilities(
+            alice_setting, bob_setting, ANGLES, BETA, charlie_size, debbie_size, noise
+        )
+        assert np.allclose(probabilities, expected, atol=5e-3)
+
+
+def test_reduced_large_friends():
+    noise = FriendNoise(depolarizing=1e-4)
+    small = compute_inequalities(generate_reduced_experiments(noise, None, ANGLES, BETA, 1, 1))
+    large = compute_inequalities(generate_reduced_experiments(noise, None, ANGLES, BETA, 5000, 5000))
+
+    # Dephasing grows with the friend size, so the violation shrinks.
+    assert large["brukner"] < small["brukner"]
+    sampled = generate_reduced_experiments(noise, 1000, ANGLES, BETA, 5000, 5000, seed=7)
+    assert all(np.isclose(sum(counts.values()), 1) for counts in sampled.values())
@@ -0,0 +1,116 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from wigners_friend.adaptive import estimate, inequality_weights
+from wigners_friend.config import ALICE, ANGLES, BETA, BOB, PEEK, REVERSE_1, REVERSE_2, SETTINGS
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.stats import (
+    INEQUALITIES,
+    bootstrap_inequalities,
+    compute_inequalities,
+    compute_inequality_tensor,
+    double_expect,
+    results_to_tensor,
+    single_expect,
+    tensor_to_results,
+)
+
+
+def random_results(rng):
+    return tensor_to_results(rng.dirichlet(np.ones(4), size=(len(SETTINGS), len(SETTINGS))))
+
+
+def test_compute_inequalities_matches_expectation_values():
+    results = random_results(np.random.default_rng(7))
+
+    A1, A2 = single_expect(ALICE, PEEK, results), single_expect(ALICE, REVERSE_1, results)
+    B1, B2 = single_expect(BOB, PEEK, results), single_expect(BOB, REVERSE_1, results)
+    AB = {
+        (i + 1, j + 1): double_expect(settings, results)
+        for (i, j), settings in zip(
+            itertools.product(range(3), repeat=2), itertools.product(SETTINGS, repeat=2)
+        )
+    }
+    violations = compute_inequalities(results)
+
+    assert np.isclose(
+        violations["lf"],
+        -A1 - A2 - B1 - B2 - AB[1, 1] - 2 * AB[1, 2] - 2 * AB[2, 1] + 2 * AB[2, 2]
+        - AB[2, 3] - AB[3, 2] - AB[3, 3] - 6,
+    )
+    assert np.isclose(
+        violations["I3322"],
+        -A1 + A2 + B1 - B2 + AB[1, 1] - AB[1, 2] - AB[1, 3] - AB[2, 1] + AB[2, 2]
+        - AB[2, 3] - AB[3, 1] - AB[3, 2] - 4,
+    )
+    assert np.isclose(violations["brukner"], AB[1, 1] - AB[1, 3] - AB[2, 1] - AB[2, 3] - 2)
+    assert np.isclose(violations["semi_brukner"], -AB[1, 2] + AB[1, 3] - AB[3, 2] - AB[3, 3] - 2)
+    assert np.isclose(violations["bell_non_lf"], AB[2, 2] - AB[2, 3] - AB[3, 2] - AB[3, 3] - 2)
+
+
+def test_compute_inequality_tensor_batched():
+    rng = np.random.default_rng(11)
+    batch = [random_results(rng) for _ in range(5)]
+    tensor = np.stack([results_to_tensor(results) for results in batch])
+
+    values = compute_inequality_tensor(tensor)
+
+    assert values.shape == (5, len(INEQUALITIES))
+    for row, results in zip(values, batch):
+        assert np.allclose(row, [compute_inequalities(results)[name] for name in INEQUALITIES])
+    assert tensor_to_results(tensor[0])[(REVERSE_2, PEEK)] == batch[0][(REVERSE_2, PEEK)]
+
+
+def test_bootstrap_inequalities():
+    rng = np.random.default_rng(3)
+    probabilities = rng.dirichlet(np.ones(4), size=(len(SETTINGS), len(SETTINGS)))
+    counts = rng.multinomial(np.full((2, len(SETTINGS), len(SETTINGS)), 5000), probabilities)
+
+    bootstrap = bootstrap_inequalities(counts, resamples=2000, seed=1)
+
+    for k, name in enumerate(INEQUALITIES):
+        weights, offset = inequality_weights(name)
+        for i in range(2):
+            value, std_error, _ = estimate(counts[i], weights, offset)
+            assert np.isclose(bootstrap[name]["value"][i], value)
+            # The 95% interval matches the normal approximation of the multinomial errors.
+            assert np.isclose(bootstrap[name]["low"][i], value - 1.96 * std_error, atol=0.2 * std_error)
+            assert np.isclose(bootstrap[name]["high"][i], value + 1.96 * std_error, atol=0.2 * std_error)
+            if abs(value) > 5 * std_error:
+                assert np.isclose(bootstrap[name]["fraction_nonpositive"][i], float(value < 0), atol=0.001)
+            # The one-sided p-value of value <= 0 matches that of a normal estimate.
+            normal_p_value = 0.5 * math.erfc(value / (std_error * math.sqrt(2)))
+            assert np.isclose(bootstrap[name]["p_value"][i], normal_p_value, atol=0.03)
+
+
+def test_bootstrap_p_value_near_the_bound():
+    # Eighty shots leave the semi-Brukner violation within about three standard errors of 0.
+    rng = np.random.default_rng(6)
+    counts = rng.multinomial(80, exact_probability_tensor(ANGLES, BETA), size=(10, len(SETTINGS), len(SETTINGS)))
+    p_values = bootstrap_inequalities(counts, resamples=4000, seed=1)["semi_brukner"]["p_value"]
+
+    weights, offset = inequality_weights("semi_brukner")
+    for i in range(len(counts)):
+        value, std_error, _ = estimate(counts[i], weights, offset)
+        assert p_values[i] == pytest.approx(0.5 * math.erfc(value / (std_error * math.sqrt(2))), abs=0.03)
+
+
+def test_verbose_violation_of_probabilities_follows_the_estimate(capsys):
+    compute_inequalities(tensor_to_results(exact_probability_tensor(ANGLES, BETA)), verbose=True)
+    (line,) = [line for line in capsys.readouterr().out.splitlines() if line.startswith("semi_brukner=")]
+    assert line.endswith("is violated: True")
+
+
+def test_verbose_violation_follows_the_interval(capsys):
+    probabilities = exact_probability_tensor(ANGLES, BETA)
+    rng = np.random.default_rng(4)
+
+    # The exact value violates the inequality, but ten shots per setting leave a wide interval.
+    for shots, violated in [(100_000, True), (10, False)]:
+        compute_inequalities(ExperimentCounts(rng.multinomial(shots, probabilities)), verbose=True)
+        (line,) = [line for line in capsys.readouterr().out.splitlines() if line.startswith("semi_brukner=")]
+        assert line.endswith(f"is violated: {violated}")
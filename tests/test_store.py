@@ -0,0 +1,58 @@
+import numpy as np
+import qiskit
+
+from wigners_friend import utils
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.fan_out import FanOut
+from wigners_friend.noise import depolarizing_noise_model
+from wigners_friend.store import ResultsStore, circuit_fingerprint
+
+
+def test_results_store_merges_extra_shots(tmp_path, monkeypatch):
+    BACKEND = qiskit.Aer.get_backend("aer_simulator")
+    NOISE_MODEL = depolarizing_noise_model(0.05)
+    requested_shots = []
+    run_counts = utils.generate_all_counts
+
+    def generate_all_counts(**kwargs):
+        requested_shots.append(kwargs["shots"])
+        return run_counts(**kwargs)
+
+    monkeypatch.setattr(utils, "generate_all_counts", generate_all_counts)
+
+    results_store = ResultsStore(tmp_path)
+    kwargs = dict(
+        backend=BACKEND, noise_model=NOISE_MODEL, angles=ANGLES, beta=BETA,
+        charlie_size=1, debbie_size=1, seed=3,
+    )
+    assert results_store.run(shots=200, **kwargs)[1] == 200
+    results, shots = results_store.run(shots=500, **kwargs)
+    cached, cached_shots = results_store.run(shots=300, **kwargs)
+
+    assert requested_shots == [200, 300]
+    # The entry is served whole, and says so.
+    assert cached == results and shots == cached_shots == 500
+
+    key = ResultsStore.key(ResultsStore.describe(BACKEND, NOISE_MODEL, ANGLES, BETA, 1, 1, seed=3))
+    assert np.all(results_store.load(key).sum(axis=-1) == 500)
+
+    other_key = ResultsStore.key(ResultsStore.describe(BACKEND, None, ANGLES, BETA, 1, 1, seed=3))
+    assert other_key != key and other_key not in results_store
+
+    tree_key = ResultsStore.key(
+        ResultsStore.describe(BACKEND, NOISE_MODEL, ANGLES, BETA, 1, 1, seed=3, fan_out=FanOut.TREE)
+    )
+    assert tree_key != key and tree_key not in results_store
+
+    # Batched and template runs are compiled and seeded differently, so they get their own entries.
+    results_store.run(shots=100, batch=True, **kwargs)
+    assert requested_shots == [200, 300, 100]
+    batch_key = ResultsStore.key(ResultsStore.describe(BACKEND, NOISE_MODEL, ANGLES, BETA, 1, 1, seed=3, batch=True))
+    assert batch_key != key and batch_key in results_store
+
+
+def test_circuit_fingerprint_follows_the_circuits():
+    assert circuit_fingerprint(2, 1) == circuit_fingerprint(2, 1)
+    assert circuit_fingerprint(2, 1) != circuit_fingerprint(1, 2)
+    # The fan-outs only differ from three friend qubits on.
+    assert circuit_fingerprint(3, 3, FanOut.LADDER) != circuit_fingerprint(3, 3, FanOut.TREE)
@@ -0,0 +1,46 @@
+import numpy as np
+import qiskit
+
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.stats import results_to_tensor
+from wigners_friend.streaming import fold_counts, fold_memory, stream_experiments
+from wigners_friend.utils import generate_all_counts
+
+BACKEND = qiskit.Aer.get_backend("aer_simulator")
+
+
+def test_fold_counts_and_memory_agree():
+    # Big-endian keys: "01" is Alice 1 and Bob 0, i.e. outcome "10".
+    counts = {"00": 2, "01": 3, "10": 1}
+    memory = ["00"] * 2 + ["01"] * 3 + ["10"]
+    from_counts = np.zeros(4, dtype=np.int64)
+    from_memory = np.zeros(4, dtype=np.int64)
+
+    fold_counts(from_counts, counts)
+    fold_memory(from_memory, memory)
+
+    assert from_counts.tolist() == [2, 1, 3, 0]
+    assert from_memory.tolist() == from_counts.tolist()
+
+
+def test_stream_experiments_chunks():
+    updates = list(stream_experiments(BACKEND, None, 2500, ANGLES, BETA, 1, 2, chunk_shots=1000, seed=4))
+
+    assert [update.shots for update in updates] == [1000, 2000, 2500]
+    assert np.all(updates[-1].counts.sum(axis=-1) == 2500)
+    assert updates[-1].std_errors["lf"] < updates[0].std_errors["lf"]
+
+    # The first chunk is an ordinary run with the same seed.
+    first = results_to_tensor(
+        generate_all_counts(BACKEND, None, 1000, ANGLES, BETA, 1, 2, batch=True, use_templates=True, seed=4)
+    )
+    assert np.array_equal(updates[0].counts, first)
+
+
+def test_stream_experiments_memory_matches_counts():
+    with_counts = list(stream_experiments(BACKEND, None, 600, ANGLES, BETA, 1, 1, chunk_shots=300, seed=2))
+    with_memory = list(
+        stream_experiments(BACKEND, None, 600, ANGLES, BETA, 1, 1, chunk_shots=300, memory=True, seed=2)
+    )
+
+    assert np.array_equal(with_counts[-1].counts, with_memory[-1].counts)
@@ -0,0 +1,34 @@
+from wigners_friend.sweep import SweepPoint, iter_sweep, run_density_sweep, run_sweep, sweep_grid
+
+
+def test_sweep_grid():
+    points = sweep_grid(noise_levels=[0.0, 0.1], friend_sizes=[1, (1, 2)], shots=[100], seeds=[1, 2])
+
+    assert len(points) == 8
+    assert points[0] == SweepPoint(0.0, 1, 1, 100, 1)
+    assert SweepPoint(0.1, 1, 2, 100, 2) in points
+
+
+def test_run_sweep_parallel():
+    points = sweep_grid(noise_levels=[0.0, 0.05], friend_sizes=[1], shots=[200], seeds=[42])
+
+    sweep = run_sweep(points, max_workers=2)
+    serial = list(iter_sweep(points, max_workers=1))
+
+    assert [result.point for result in sweep] == points
+    # The same seeds give the same samples, whichever process runs the point.
+    assert [result.violations for result in sweep] == [result.violations for result in serial]
+
+
+def test_run_density_sweep():
+    points = sweep_grid(noise_levels=[0.0, 0.05], friend_sizes=[1], shots=[100_000], seeds=[1, 2])
+
+    sweep = run_density_sweep(points)
+    sampled = run_sweep(points, max_workers=1)
+
+    assert [result.point for result in sweep] == points
+    # Different seeds give different samples of the same distribution.
+    assert sweep[0].counts != sweep[1].counts
+    for density, shots in zip(sweep, sampled):
+        for name, value in density.violations.items():
+            assert abs(value - shots.violations[name]) < 0.05
@@ -0,0 +1,88 @@
+import itertools
+
+import numpy as np
+import qiskit
+
+from wigners_friend.config import ANGLES, BETA, PEEK, SETTINGS
+from wigners_friend.templates import _transpile_template
+from wigners_friend.utils import decode_results, generate_all_experiments
+
+
+def test_generate_all_experiments_batch():
+    BACKEND = qiskit.Aer.get_backend("aer_simulator")
+    SHOTS = 1000
+    friend_size = 2
+
+    results = generate_all_experiments(
+        backend=BACKEND,
+        noise_model=None,
+        shots=SHOTS,
+        angles=ANGLES,
+        beta=BETA,
+        charlie_size=friend_size,
+        debbie_size=friend_size,
+        batch=True,
+    )
+
+    assert list(results) == list(itertools.product(SETTINGS, repeat=2))
+    for probabilities in results.values():
+        assert np.isclose(sum(probabilities.values()), 1)
+        assert all(len(key) == 2 for key in probabilities)
+
+
+def test_generate_all_experiments_templates():
+    BACKEND = qiskit.Aer.get_backend("aer_simulator")
+    SHOTS = 1000
+    friend_size = 2
+
+    kwargs = dict(
+        backend=BACKEND,
+        noise_model=None,
+        shots=SHOTS,
+        beta=BETA,
+        charlie_size=friend_size,
+        debbie_size=friend_size,
+        batch=True,
+        use_templates=True,
+    )
+    results = generate_all_experiments(angles=ANGLES, **kwargs)
+    # A second run with different angles reuses the cached transpiled templates.
+    other_angles = {setting: angle / 2 for setting, angle in ANGLES.items()}
+    other_results = generate_all_experiments(angles=other_angles, **kwargs)
+
+    assert _transpile_template.cache_info().hits >= len(results)
+    assert list(results) == list(other_results)
+    for probabilities in other_results.values():
+        assert np.isclose(sum(probabilities.values()), 1)
+
+
+def test_decode_results_majority_vote():
+    charlie_size, debbie_size = 3, 2
+    rng = np.random.default_rng(1234)
+
+    results, memory = {}, {}
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        alice_width = charlie_size if alice_setting == PEEK else 1
+        bob_width = debbie_size if bob_setting == PEEK else 1
+        shots = ["".join(bits) for bits in rng.choice(["0", "1"], size=(200, alice_width + bob_width))]
+        memory[(alice_setting, bob_setting)] = shots
+        results[(alice_setting, bob_setting)] = {key: shots.count(key) for key in set(shots)}
+
+    decoded = decode_results(results, charlie_size, debbie_size)
+    decoded_memory = decode_results(memory, charlie_size, debbie_size)
+
+    for settings, counts in results.items():
+        alice_width = charlie_size if settings[0] == PEEK else 1
+        expected = {}
+        for key, count in counts.items():
+            alice_bits, bob_bits = key[:alice_width], key[alice_width:]
+            alice = "0" if alice_bits.count("0") > len(alice_bits) / 2 else "1"
+            bob = "0" if bob_bits.count("0") > len(bob_bits) / 2 else "1"
+            expected[alice + bob] = expected.get(alice + bob, 0) + count
+        assert decoded[settings] == expected
+        assert decoded_memory[settings] == expected
+
+
+def test_decode_results_two_bit_keys():
+    results = {(PEEK, PEEK): {"00": 0.25, "01": 0.5, "11": 0.25}}
+    assert decode_results(results, 3, 3) == results
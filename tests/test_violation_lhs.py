@@ -1,45 +1,161 @@
-# Known LHS violation values. Extracted from Excel file from `data/`
+# Known LHS violation values, read from the "Theory" sheet of the Excel file in `data/`.
+import itertools
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
 import numpy as np
-import qiskit
 import pytest
+from qiskit.quantum_info import Statevector
 
-from wigners_friend.config import ANGLES, BETA
-from wigners_friend.stats import compute_inequalities
-from wigners_friend.utils import generate_all_experiments
+from wigners_friend.backends import get_backend
+from wigners_friend.config import ANGLES, BETA, PEEK, SETTINGS, SYS_SIZE
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.fan_out import FanOut
+from wigners_friend.stats import INEQUALITIES, INEQUALITY_MATRIX, compute_inequalities, tensor_to_results
+from wigners_friend.utils import decode_results, generate_all_experiments
 
 
-lhs_violation_vals = {
-    "mu": {
-        "1": {
-            "lf": 0.57028,
-            "I3322": 0.299348,
-            "brukner": 0.124336,
-            "semi_brukner": 0.380364,
-            "bell_non_lf": 0.59116
-        }
-    }
+DATA_PATH = Path(__file__).parents[1] / "data" / "lf_data.xlsx"
+NAMESPACE = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+# Titles of the sheet's column groups, each a "mu" column and a "LHS of Inequality" two columns on.
+TITLES = {
+    "LF": "lf",
+    "I3322": "I3322",
+    "Brukner": "brukner",
+    "Semi-Brukner": "semi_brukner",
+    "Bell non-LF": "bell_non_lf",
 }
 
+# The table has six significant digits and was computed for slightly different angles.
+REFERENCE_TOLERANCE = 1e-4
+
+
+def column_index(reference: str) -> int:
+    letters = re.match(r"[A-Z]+", reference).group()
+    return sum(26**k * (ord(letter) - ord("A") + 1) for k, letter in enumerate(reversed(letters))) - 1
+
+
+def load_reference_table(path: Path = DATA_PATH) -> dict[str, np.ndarray]:
+    """(mu, LHS value) rows of every inequality in the "Theory" sheet."""
+    with zipfile.ZipFile(path) as workbook:
+        strings = [
+            "".join(text.text or "" for text in item.iter(f"{{{NAMESPACE['m']}}}t"))
+            for item in ET.fromstring(workbook.read("xl/sharedStrings.xml")).findall("m:si", NAMESPACE)
+        ]
+        # "Theory" is the workbook's first sheet.
+        sheet = ET.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+
+    rows = []
+    for row in sheet.iter(f"{{{NAMESPACE['m']}}}row"):
+        cells = {}
+        for cell in row.findall("m:c", NAMESPACE):
+            value = cell.find("m:v", NAMESPACE)
+            if value is not None:
+                cells[column_index(cell.get("r"))] = strings[int(value.text)] if cell.get("t") == "s" else value.text
+        rows.append(cells)
+
+    table = {}
+    for column, title in rows[0].items():
+        values = [(float(row[column]), float(row[column + 2])) for row in rows[2:] if column in row]
+        table[TITLES[title.strip()]] = np.array(values)
+    return table
+
+
+REFERENCE = load_reference_table()
+
+
+def reference_value(inequality: str, mu: float = 1.0) -> float:
+    mus, values = REFERENCE[inequality].T
+    return values[np.argmin(np.abs(mus - mu))]
+
+
+def decoded_statevector_results(charlie_size: int, debbie_size: int, fan_out: FanOut) -> dict:
+    """Exact probabilities of every setting pair, decoded by majority vote over the friend registers.
+
+    A PEEK setting reads the observer's whole friend register rather than a single qubit, so the
+    probabilities of the full bit-strings go through `decode_results`.
+    """
+    results = {}
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        circuit = ewfs(alice_setting, bob_setting, ANGLES, BETA, charlie_size, debbie_size, fan_out)
+        alice_qubits = list(range(SYS_SIZE, SYS_SIZE + charlie_size)) if alice_setting == PEEK else [0]
+        bob_qubits = (
+            list(range(SYS_SIZE + charlie_size, SYS_SIZE + charlie_size + debbie_size))
+            if bob_setting == PEEK else [1]
+        )
+        qubits = alice_qubits + bob_qubits
+        probabilities = Statevector(circuit.remove_final_measurements(inplace=False)).probabilities(qubits)
+        # Qiskit is little-endian, so bit `i` of the index is character `i` of the key.
+        results[(alice_setting, bob_setting)] = {
+            "".join(str(index >> i & 1) for i in range(len(qubits))): float(probability)
+            for index, probability in enumerate(probabilities)
+        }
+    return decode_results(results, charlie_size, debbie_size)
+
+
+def inequality_std_errors(probabilities: np.ndarray, shots: int) -> dict[str, float]:
+    """Standard errors of the inequalities estimated from `shots` shots of every setting pair."""
+    weights = INEQUALITY_MATRIX.reshape(len(SETTINGS), len(SETTINGS), 4, len(INEQUALITIES))
+    mean = np.einsum("ijo,ijok->ijk", probabilities, weights)
+    variance = np.einsum("ijo,ijok->ijk", probabilities, weights**2) - mean**2
+    return dict(zip(INEQUALITIES, np.sqrt(variance.sum(axis=(0, 1)) / shots)))
+
+
+def test_reference_table():
+    assert set(REFERENCE) == set(INEQUALITIES)
+    for rows in REFERENCE.values():
+        assert rows.shape == (50, 2)
+        assert rows[0, 0] == pytest.approx(0.65) and rows[-1, 0] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("inequality", INEQUALITIES)
+def test_exact_violations_match_reference(inequality):
+    for mu, value in REFERENCE[inequality]:
+        violations = compute_inequalities(tensor_to_results(exact_probability_tensor(ANGLES, BETA, mu)))
+        assert violations[inequality] == pytest.approx(value, abs=REFERENCE_TOLERANCE)
+
+
+@pytest.mark.parametrize(
+    "charlie_size, debbie_size, fan_out",
+    [
+        (1, 1, FanOut.LADDER),
+        (2, 2, FanOut.LADDER),
+        (3, 3, FanOut.LADDER),
+        (3, 2, FanOut.TREE),
+        (1, 3, FanOut.CHAIN),
+    ],
+)
+def test_circuit_violations_match_reference(charlie_size, debbie_size, fan_out):
+    results = decoded_statevector_results(charlie_size, debbie_size, fan_out)
+    violations = compute_inequalities(results)
+    exact = compute_inequalities(tensor_to_results(exact_probability_tensor(ANGLES, BETA)))
+
+    for inequality in INEQUALITIES:
+        assert violations[inequality] == pytest.approx(exact[inequality], abs=1e-9)
+        assert violations[inequality] == pytest.approx(reference_value(inequality), abs=REFERENCE_TOLERANCE)
 
-def test_violation_lhs():
-    BACKEND = qiskit.Aer.get_backend("aer_simulator")
-    SHOTS = 100_000
-    NOISE_MODEL = None
-    friend_size = 1
 
+@pytest.mark.parametrize("friend_size", [1, 2])
+def test_sampled_violations_within_shot_noise(friend_size):
+    shots = 20_000
     results = generate_all_experiments(
-        backend=BACKEND,
-        noise_model=NOISE_MODEL,
-        shots=SHOTS,
+        backend=get_backend("aer_simulator"),
+        noise_model=None,
+        shots=shots,
         angles=ANGLES,
         beta=BETA,
         charlie_size=friend_size,
-        debbie_size=friend_size
+        debbie_size=friend_size,
+        batch=True,
+        seed=1234,
     )
     violations = compute_inequalities(results)
+    std_errors = inequality_std_errors(exact_probability_tensor(ANGLES, BETA), shots)
 
-    assert np.isclose(violations["lf"], lhs_violation_vals["mu"]["1"]["lf"], atol=0.1)
-    assert np.isclose(violations["I3322"], lhs_violation_vals["mu"]["1"]["I3322"], atol=0.1)
-    assert np.isclose(violations["brukner"], lhs_violation_vals["mu"]["1"]["brukner"], atol=0.1)
-    assert np.isclose(violations["semi_brukner"], lhs_violation_vals["mu"]["1"]["semi_brukner"], atol=0.1)
-    assert np.isclose(violations["bell_non_lf"], lhs_violation_vals["mu"]["1"]["bell_non_lf"], atol=0.1)
+    for inequality in INEQUALITIES:
+        # Four standard errors: a false failure has odds of about 1 in 16,000 per inequality.
+        assert violations[inequality] == pytest.approx(reference_value(inequality), abs=4 * std_errors[inequality])
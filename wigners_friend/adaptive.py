@@ -0,0 +1,163 @@
+"""Adaptive shot allocation with sequential stopping on the significance of a violation.
+
+Shots are spent in rounds. After each round, the variance that every setting pair contributes
+to the chosen inequality is estimated from the counts so far, and the next round's shots go to
+the pairs in proportion to their standard deviation (Neyman allocation), which minimizes the
+variance of the estimate. The run stops as soon as the inequality is above or below zero at the
+requested one-sided confidence, or when the shot budget is spent. The test is repeated after
+every round, so the overall false-positive rate is somewhat above `1 - confidence`.
+"""
+import itertools
+from collections.abc import Callable
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.config import SETTINGS
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.stats import INEQUALITIES, INEQUALITY_MATRIX, INEQUALITY_OFFSETS, results_to_tensor
+from wigners_friend.utils import execute_circuits, reverse_keys
+
+
+@dataclass
+class AdaptiveResult:
+    """Outcome of an adaptive run.
+
+    `violated` is True (False) if the inequality is significantly above (below) zero, and None
+    if the shot budget ran out first.
+    """
+    inequality: str
+    value: float
+    std_error: float
+    violated: bool | None
+    counts: np.ndarray
+    rounds: int
+
+    @property
+    def shots(self) -> np.ndarray:
+        """Shots spent on each setting pair, with shape (settings, settings)."""
+        return self.counts.sum(axis=-1)
+
+
+def inequality_weights(inequality: str) -> tuple[np.ndarray, float]:
+    """Coefficients (settings, settings, 4) and constant of an inequality."""
+    k = INEQUALITIES.index(inequality)
+    size = len(SETTINGS)
+    return INEQUALITY_MATRIX[:, k].reshape(size, size, -1), INEQUALITY_OFFSETS[k]
+
+
+def estimate(counts: np.ndarray, weights: np.ndarray, offset: float) -> tuple[float, float, np.ndarray]:
+    """Estimate, standard error and per-pair standard deviations of an inequality.
+
+    The per-pair standard deviations are those of a single shot, with add-one smoothing so
+    that pairs that have not seen every outcome yet are not mistaken for noiseless ones.
+    """
+    shots = counts.sum(axis=-1)
+    probabilities = counts / np.maximum(shots, 1)[..., None]
+    value = float(np.sum(weights * probabilities) + offset)
+
+    smoothed = (counts + 1) / (shots + counts.shape[-1])[..., None]
+    sigma = np.sqrt(
+        np.maximum(
+            np.sum(weights**2 * smoothed, axis=-1) - np.sum(weights * smoothed, axis=-1) ** 2, 0
+        )
+    )
+    variance = np.sum(np.where(shots > 0, sigma**2 / np.maximum(shots, 1), 0))
+    return value, float(np.sqrt(variance)), sigma
+
+
+def allocate(shots: np.ndarray, sigma: np.ndarray, budget: int) -> np.ndarray:
+    """Split `budget` shots over the pairs, moving the totals towards the Neyman allocation."""
+    if not np.any(sigma > 0):
+        target = np.full(shots.shape, (shots.sum() + budget) / shots.size)
+    else:
+        target = (shots.sum() + budget) * sigma / sigma.sum()
+    deficit = np.maximum(target - shots, 0).ravel()
+    if deficit.sum() == 0:
+        deficit = np.ones_like(deficit)
+    share = budget * deficit / deficit.sum()
+
+    allocation = np.floor(share).astype(int)
+    # Hand out the shots lost to rounding to the largest remainders.
+    remainder = budget - allocation.sum()
+    allocation[np.argsort(allocation - share)[:remainder]] += 1
+    return allocation.reshape(shots.shape)
+
+
+def run_adaptive(
+    sampler: Callable[[np.ndarray], np.ndarray],
+    inequality: str = "lf",
+    confidence: float = 0.99,
+    initial_shots: int = 100,
+    round_shots: int = 1000,
+    max_shots: int = 100_000,
+) -> AdaptiveResult:
+    """Run rounds of shots until the inequality's sign is significant or `max_shots` is spent.
+
+    `sampler` takes the shots for each setting pair as a (settings, settings) array and returns
+    counts with shape (settings, settings, 4).
+    """
+    weights, offset = inequality_weights(inequality)
+    z = NormalDist().inv_cdf(confidence)
+
+    size = len(SETTINGS)
+    counts = sampler(np.full((size, size), initial_shots))
+    rounds = 1
+    while True:
+        value, std_error, sigma = estimate(counts, weights, offset)
+        spent = int(counts.sum())
+        if abs(value) >= z * std_error or spent >= max_shots:
+            break
+        shots = allocate(counts.sum(axis=-1), sigma, min(round_shots, max_shots - spent))
+        counts = counts + sampler(shots)
+        rounds += 1
+
+    violated = None
+    if value >= z * std_error:
+        violated = True
+    elif value <= -z * std_error:
+        violated = False
+    return AdaptiveResult(inequality, value, std_error, violated, counts, rounds)
+
+
+def multinomial_sampler(probabilities: np.ndarray, seed: int | None = None) -> Callable[[np.ndarray], np.ndarray]:
+    """Sampler drawing counts from known (settings, settings, 4) probabilities."""
+    rng = np.random.default_rng(seed)
+
+    def sample(shots: np.ndarray) -> np.ndarray:
+        return rng.multinomial(shots, probabilities)
+
+    return sample
+
+
+def backend_sampler(
+    backend: Backend,
+    noise_model: NoiseModel,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    seed: int | None = None,
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Sampler running the EWFS circuits on a backend, one batched job per distinct shot count."""
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    calls = itertools.count()
+
+    def sample(shots: np.ndarray) -> np.ndarray:
+        flat_shots = shots.ravel()
+        all_counts = {}
+        for shot_count in np.unique(flat_shots[flat_shots > 0]):
+            batch = [pair for pair, pair_shots in zip(settings, flat_shots) if pair_shots == shot_count]
+            circuits = [
+                ewfs(alice_setting, bob_setting, angles, beta, charlie_size, debbie_size)
+                for alice_setting, bob_setting in batch
+            ]
+            run_seed = seed + next(calls) if seed is not None else None
+            batch_counts = execute_circuits(circuits, backend, noise_model, int(shot_count), seed=run_seed)
+            all_counts.update({pair: reverse_keys(counts) for pair, counts in zip(batch, batch_counts)})
+        return results_to_tensor(all_counts).astype(np.int64)
+
+    return sample
@@ -0,0 +1,37 @@
+"""Lookup of backends by name."""
+import functools
+
+from qiskit.providers import Backend, fake_provider
+from qiskit_aer import Aer
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend(name: str) -> Backend:
+    """Aer backend (e.g. "aer_simulator") or fake device (e.g. "FakeKolkata") with this name."""
+    if hasattr(fake_provider, name):
+        return getattr(fake_provider, name)()
+    return Aer.get_backend(name)
+
+
+def backend_name(backend: Backend) -> str:
+    """Name of a BackendV1 (method) or BackendV2 (attribute)."""
+    name = backend.name
+    return name() if callable(name) else name
+
+
+def num_qubits(backend: Backend) -> int:
+    """Number of qubits of a BackendV1 or BackendV2."""
+    if hasattr(backend, "num_qubits"):
+        return backend.num_qubits
+    return backend.configuration().n_qubits
+
+
+def coupling_edges(backend: Backend) -> list[tuple[int, int]] | None:
+    """Edges of the backend's coupling map, or None if all qubits are connected."""
+    coupling_map = getattr(backend, "coupling_map", None)
+    if coupling_map is None and hasattr(backend, "configuration"):
+        coupling_map = backend.configuration().coupling_map
+    if coupling_map is None:
+        return None
+    edges = coupling_map.get_edges() if hasattr(coupling_map, "get_edges") else coupling_map
+    return [tuple(edge) for edge in edges]
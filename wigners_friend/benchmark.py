@@ -0,0 +1,206 @@
+"""Benchmarks of every stage of an EWFS run, with JSON output and regression checks.
+
+Each stage (circuit build, transpilation, execution, decoding and the inequalities) is timed
+separately for every backend, friend size and shot count. As on hardware, a PEEK observer's
+whole friend register is measured, so the decoding stage takes majority votes over keys that
+grow with the friend size. The fastest of `repeats` runs is
+kept, which is the least noisy estimate of a stage's cost. Run as
+
+    python -m wigners_friend.benchmark --friend-sizes 1 2 3 --shots 1000 --output bench.json
+
+and pass `--baseline` with an earlier output to flag stages that got slower.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import qiskit
+import qiskit_aer
+from qiskit import ClassicalRegister, QuantumCircuit, transpile
+
+from wigners_friend.backends import get_backend
+from wigners_friend.config import ALICE, ANGLES, BETA, BOB, PEEK, SETTINGS, SYS_SIZE
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.setting import Setting
+from wigners_friend.stats import compute_inequalities
+from wigners_friend.utils import decode_results, reverse_keys, run_options
+
+
+STAGES = ["build", "transpile", "execute", "decode", "stats"]
+
+
+def time_call(function: Callable, repeats: int) -> tuple[float, object]:
+    """Fastest wall-clock time of `repeats` calls and the value of the last call."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        value = function()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def register_circuit(alice_setting: Setting, bob_setting: Setting, friend_size: int) -> QuantumCircuit:
+    """EWFS circuit that measures the whole friend register of every peeking observer.
+
+    The classical bits hold Alice's measured qubits followed by Bob's, as `decode_results`
+    expects.
+    """
+    circuit = ewfs(alice_setting, bob_setting, ANGLES, BETA, friend_size, friend_size)
+    circuit.remove_final_measurements()
+    charlie_qubits = list(range(SYS_SIZE, SYS_SIZE + friend_size))
+    debbie_qubits = list(range(SYS_SIZE + friend_size, SYS_SIZE + 2 * friend_size))
+    qubits = (charlie_qubits if alice_setting == PEEK else [ALICE]) + (
+        debbie_qubits if bob_setting == PEEK else [BOB]
+    )
+    register = ClassicalRegister(len(qubits))
+    circuit.add_register(register)
+    circuit.measure(qubits, register)
+    return circuit
+
+
+def benchmark_stages(
+    backend_name: str,
+    friend_size: int,
+    shots: int,
+    repeats: int = 3,
+    seed: int = 0,
+) -> dict[str, float]:
+    """Seconds spent in each stage of running all nine settings once."""
+    backend = get_backend(backend_name)
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    timings = {}
+
+    timings["build"], circuits = time_call(
+        lambda: [register_circuit(alice_setting, bob_setting, friend_size) for alice_setting, bob_setting in settings],
+        repeats,
+    )
+    timings["transpile"], transpiled = time_call(
+        lambda: transpile(circuits, backend=backend, seed_transpiler=seed), repeats
+    )
+    timings["execute"], result = time_call(
+        lambda: backend.run(transpiled, **run_options(backend, None, shots, seed)).result(), repeats
+    )
+    counts = {setting: reverse_keys(result.get_counts(i)) for i, setting in enumerate(settings)}
+    timings["decode"], decoded = time_call(lambda: decode_results(counts, friend_size, friend_size), repeats)
+    results = {
+        setting: {key: value / shots for key, value in setting_counts.items()}
+        for setting, setting_counts in decoded.items()
+    }
+    timings["stats"], _ = time_call(lambda: compute_inequalities(results), repeats)
+    return timings
+
+
+def run_benchmarks(
+    friend_sizes: list[int],
+    shots: list[int],
+    backend_names: list[str] = ("aer_simulator", "FakeKolkata"),
+    repeats: int = 3,
+) -> dict:
+    """Benchmark every combination of backend, friend size and shot count."""
+    entries = []
+    for backend_name, friend_size, point_shots in itertools.product(backend_names, friend_sizes, shots):
+        entries.append(
+            {
+                "backend": backend_name,
+                "friend_size": friend_size,
+                "shots": point_shots,
+                "seconds": benchmark_stages(backend_name, friend_size, point_shots, repeats),
+            }
+        )
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "qiskit": qiskit.__version__,
+            "qiskit_aer": qiskit_aer.__version__,
+        },
+        "repeats": repeats,
+        "benchmarks": entries,
+    }
+
+
+def save_benchmarks(report: dict, path: str | os.PathLike):
+    Path(path).write_text(json.dumps(report, indent=2))
+
+
+def load_benchmarks(path: str | os.PathLike) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare_benchmarks(
+    report: dict,
+    baseline: dict,
+    tolerance: float = 0.25,
+    min_seconds: float = 1e-3,
+) -> list[dict]:
+    """Stages that are more than `tolerance` slower than in the baseline.
+
+    Stages that take less than `min_seconds` in both runs are too short to compare reliably,
+    and benchmarks missing from the baseline are skipped.
+    """
+    def key(entry: dict) -> tuple:
+        return entry["backend"], entry["friend_size"], entry["shots"]
+
+    baseline_entries = {key(entry): entry for entry in baseline["benchmarks"]}
+    regressions = []
+    for entry in report["benchmarks"]:
+        if key(entry) not in baseline_entries:
+            continue
+        for stage, seconds in entry["seconds"].items():
+            baseline_seconds = baseline_entries[key(entry)]["seconds"].get(stage)
+            if baseline_seconds is None or max(seconds, baseline_seconds) < min_seconds:
+                continue
+            if seconds > (1 + tolerance) * baseline_seconds:
+                regressions.append(
+                    {
+                        "backend": entry["backend"],
+                        "friend_size": entry["friend_size"],
+                        "shots": entry["shots"],
+                        "stage": stage,
+                        "seconds": seconds,
+                        "baseline_seconds": baseline_seconds,
+                    }
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--friend-sizes", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--shots", type=int, nargs="+", default=[1000])
+    parser.add_argument("--backends", nargs="+", default=["aer_simulator", "FakeKolkata"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against the results in this JSON file.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.friend_sizes, args.shots, args.backends, args.repeats)
+    if args.output:
+        save_benchmarks(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare_benchmarks(report, load_benchmarks(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(
+                f"{regression['backend']} friend_size={regression['friend_size']} "
+                f"shots={regression['shots']} {regression['stage']}: "
+                f"{regression['seconds']:.4f}s vs. {regression['baseline_seconds']:.4f}s",
+                file=sys.stderr,
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
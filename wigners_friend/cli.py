@@ -0,0 +1,271 @@
+"""Command-line interface to run, sweep and analyze EWFS experiments.
+
+Only the standard library is imported up front. Qiskit and Aer are loaded by the `run` and
+`sweep` subcommands and matplotlib only when a sweep is plotted, so `analyze` on stored counts
+starts without them.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def format_rows(rows: list[dict]) -> str:
+    """Plain-text table of rows that share their keys, with floats to four decimals."""
+    if not rows:
+        return ""
+    cells = [list(rows[0])] + [
+        [f"{value:.4f}" if isinstance(value, float) else str(value) for value in row.values()]
+        for row in rows
+    ]
+    widths = [max(len(line[k]) for line in cells) for k in range(len(cells[0]))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
+
+
+def print_rows(rows: list[dict], as_json: bool):
+    if as_json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print(format_rows(rows))
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    """Inequality values of every noise level and friend size on one backend.
+
+    With a results store, each row also gives the shots it was computed from, which are more
+    than `--shots` when the store already held more.
+    """
+    from wigners_friend.compare import BackendSpec, compare_backends
+    from wigners_friend.config import ANGLES, BETA
+    from wigners_friend.stats import compute_inequalities
+
+    if args.device_noise:
+        specs = [BackendSpec(args.backend, noise_backend=args.backend)]
+    else:
+        specs = [BackendSpec(args.backend, depolarizing=level) for level in args.noise_levels or [None]]
+
+    if args.store is None:
+        return compare_backends(
+            specs, args.friend_sizes, args.shots, seed=args.seed, max_workers=args.workers
+        )
+
+    from wigners_friend.backends import get_backend
+    from wigners_friend.store import ResultsStore
+
+    results_store = ResultsStore(args.store)
+    rows = []
+    for spec in specs:
+        for friend_size in args.friend_sizes:
+            results, shots = results_store.run(
+                backend=get_backend(spec.backend),
+                noise_model=spec.noise_model(),
+                shots=args.shots,
+                angles=ANGLES,
+                beta=BETA,
+                charlie_size=friend_size,
+                debbie_size=friend_size,
+                seed=args.seed,
+                batch=True,
+            )
+            rows.append({
+                "backend": spec.label,
+                "friend_size": friend_size,
+                "shots": shots,
+                **compute_inequalities(results),
+            })
+    return rows
+
+
+def sweep(args: argparse.Namespace) -> list[dict]:
+    """Inequality values of every point of a sweep grid."""
+    from wigners_friend.sweep import run_density_sweep, run_sweep, sweep_grid
+
+    points = sweep_grid(args.noise_levels or [None], args.friend_sizes, args.shots, args.seeds)
+    if args.density:
+        results = run_density_sweep(points, args.backend, args.device_noise)
+    elif args.store is not None:
+        results = stored_sweep(points, args)
+    else:
+        results = run_sweep(points, args.backend, args.device_noise, max_workers=args.workers)
+
+    if args.plot:
+        plot_sweep(results, args)
+
+    return [
+        {
+            "noise_level": result.point.noise_level,
+            "charlie_size": result.point.charlie_size,
+            "debbie_size": result.point.debbie_size,
+            "shots": result.point.shots,
+            "seed": result.point.seed,
+            **result.violations,
+        }
+        for result in results
+    ]
+
+
+def stored_sweep(points: list, args: argparse.Namespace) -> list:
+    """Sweep results served from a results store, running only the shots it is missing.
+
+    As with `ResultsStore.run`, points that differ only in their shots share an entry. Each
+    entry is topped up to the most shots any of its points asks for, with the seed offset by
+    the shots already stored. Every point is then computed from exactly its own shots, drawn
+    from the entry without replacement (with the point's seed), so a sweep over shots still
+    shows the shot noise of each count.
+    """
+    import dataclasses
+
+    import numpy as np
+
+    from wigners_friend.backends import get_backend
+    from wigners_friend.config import ANGLES, BETA
+    from wigners_friend.counts import ExperimentCounts
+    from wigners_friend.stats import compute_inequalities
+    from wigners_friend.store import ResultsStore
+    from wigners_friend.sweep import SweepResult, point_noise_model, run_sweep
+
+    results_store = ResultsStore(args.store)
+    backend = get_backend(args.backend)
+    keys, descriptions, largest = [], {}, {}
+    for point in points:
+        description = ResultsStore.describe(
+            backend,
+            point_noise_model(point, backend, args.device_noise),
+            ANGLES,
+            BETA,
+            point.charlie_size,
+            point.debbie_size,
+            point.seed,
+            # Sweep points run as one batch per point.
+            batch=True,
+        )
+        key = ResultsStore.key(description)
+        keys.append(key)
+        descriptions[key] = description
+        if key not in largest or point.shots > largest[key].shots:
+            largest[key] = point
+
+    missing = {}
+    for key, point in largest.items():
+        stored_shots = results_store.stored_shots(key)
+        if stored_shots < point.shots:
+            # Offset the seed so the extra shots are not a replay of the stored ones.
+            seed = point.seed + stored_shots if point.seed is not None else None
+            missing[key] = dataclasses.replace(point, shots=point.shots - stored_shots, seed=seed)
+    extra = run_sweep(list(missing.values()), args.backend, args.device_noise, max_workers=args.workers)
+    for key, result in zip(missing, extra):
+        results_store.add(key, result.counts.counts, descriptions[key])
+
+    results = []
+    for point, key in zip(points, keys):
+        counts = ExperimentCounts(np.asarray(results_store.load(key))).subsample(point.shots, point.seed)
+        results.append(SweepResult(point, counts, compute_inequalities(counts)))
+    return results
+
+
+def plot_sweep(results: list, args: argparse.Namespace):
+    """Plot the inequalities against whichever of the noise levels or friend sizes varies."""
+    from wigners_friend.plots import plot_friend_size_vs_violation, plot_noise_levels_vs_violation
+
+    violations = [result.violations for result in results]
+    if len(args.noise_levels) > 1:
+        plot_noise_levels_vs_violation(args.noise_levels, violations, args.shots[0], args.friend_sizes[0])
+    else:
+        plot_friend_size_vs_violation(args.friend_sizes, violations, args.shots[0])
+
+
+def stored_entries(paths: list[str]) -> list[Path]:
+    """Counts files given directly or found in store directories."""
+    entries = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            entries.extend(sorted(p for p in path.glob("*.npy") if not p.name.endswith(".tmp.npy")))
+        else:
+            entries.append(path)
+    return entries
+
+
+def analyze(args: argparse.Namespace) -> list[dict]:
+    """Inequality values of stored counts."""
+    import numpy as np
+
+    from wigners_friend.counts import ExperimentCounts
+    from wigners_friend.stats import compute_inequalities
+
+    rows = []
+    for entry in stored_entries(args.paths):
+        description_path = entry.with_suffix(".json")
+        description = json.loads(description_path.read_text()) if description_path.exists() else {}
+        counts = ExperimentCounts(np.load(entry, mmap_mode="r"))
+        rows.append({
+            "entry": entry.stem[:12],
+            "backend": description.get("backend"),
+            "charlie_size": description.get("charlie_size"),
+            "debbie_size": description.get("debbie_size"),
+            "shots": int(counts.shots.min()),
+            **compute_inequalities(counts),
+        })
+    return rows
+
+
+def add_experiment_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--backend", default="aer_simulator")
+    parser.add_argument("--friend-sizes", type=int, nargs="+", default=[1])
+    parser.add_argument(
+        "--noise-levels", type=float, nargs="+", default=[], help="Depolarizing noise levels to simulate."
+    )
+    parser.add_argument(
+        "--device-noise", action="store_true", help="Simulate the noise of the backend's device instead."
+    )
+    parser.add_argument("--workers", type=int, help="Number of concurrent runs.")
+    parser.add_argument("--store", help="Keep the counts in a results store in this directory.")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="wigners-friend", description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per row.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help=run.__doc__)
+    add_experiment_arguments(run_parser)
+    run_parser.add_argument("--shots", type=int, default=1000)
+    run_parser.add_argument("--seed", type=int)
+    run_parser.set_defaults(handler=run)
+
+    sweep_parser = subparsers.add_parser("sweep", help=sweep.__doc__)
+    add_experiment_arguments(sweep_parser)
+    sweep_parser.add_argument("--shots", type=int, nargs="+", default=[1000])
+    sweep_parser.add_argument("--seeds", type=int, nargs="+", default=[None])
+    sweep_parser.add_argument(
+        "--density", action="store_true", help="Sample the shots from exact noisy distributions."
+    )
+    sweep_parser.add_argument("--plot", action="store_true")
+    sweep_parser.set_defaults(handler=sweep)
+
+    analyze_parser = subparsers.add_parser("analyze", help=analyze.__doc__)
+    analyze_parser.add_argument("paths", nargs="+", help="Results store directories or stored .npy counts.")
+    analyze_parser.set_defaults(handler=analyze)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command != "analyze":
+        if args.device_noise and args.noise_levels:
+            parser.error("--noise-levels cannot be combined with --device-noise.")
+    if args.command == "sweep":
+        if args.density and args.store is not None:
+            parser.error("--store cannot be combined with --density.")
+        if args.plot and (len(args.shots) > 1 or len(args.seeds) > 1):
+            parser.error("--plot takes a single --shots and --seeds value.")
+        if args.plot and len(args.noise_levels) > 1 and len(args.friend_sizes) > 1:
+            parser.error("--plot varies either the noise levels or the friend sizes, not both.")
+
+    print_rows(args.handler(args), args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
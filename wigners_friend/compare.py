@@ -0,0 +1,91 @@
+"""Concurrent comparison of the EWFS inequalities across backends and noise models."""
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.backends import get_backend
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.noise import backend_noise_model, depolarizing_noise_model
+from wigners_friend.stats import INEQUALITIES, compute_inequalities
+from wigners_friend.utils import generate_all_experiments
+
+
+@dataclass(frozen=True)
+class BackendSpec:
+    """A backend to run on and the noise to simulate on it.
+
+    `noise_backend` names a (fake) device whose `NoiseModel.from_backend` is used, e.g. to run
+    "aer_simulator" with the noise of "FakeKolkata". `depolarizing` adds depolarizing noise of
+    that level instead. Without either, the backend runs with its own behaviour.
+    """
+    backend: str
+    noise_backend: str | None = None
+    depolarizing: float | None = None
+
+    @property
+    def label(self) -> str:
+        if self.noise_backend is not None:
+            return f"{self.backend}+{self.noise_backend}"
+        if self.depolarizing is not None:
+            return f"{self.backend}+depolarizing({self.depolarizing})"
+        return self.backend
+
+    def noise_model(self) -> NoiseModel | None:
+        if self.noise_backend is not None and self.depolarizing is not None:
+            raise ValueError("Use either a noise backend or depolarizing noise, not both.")
+        if self.noise_backend is not None:
+            return backend_noise_model(get_backend(self.noise_backend))
+        if self.depolarizing is not None:
+            return depolarizing_noise_model(self.depolarizing)
+        return None
+
+
+def compare_backends(
+    specs: list[BackendSpec],
+    friend_sizes: list[int],
+    shots: int,
+    angles: list[float] = ANGLES,
+    beta: float = BETA,
+    seed: int | None = None,
+    max_workers: int | None = None,
+) -> list[dict]:
+    """Inequality values for every backend spec and friend size, as rows of one table.
+
+    The backends and noise models are built once, up front, and shared by the runs, which go
+    to a thread pool; the simulators release the GIL while they run. The rows follow the
+    order of `specs` and `friend_sizes`.
+    """
+    backends = {spec: get_backend(spec.backend) for spec in specs}
+    noise_models = {spec: spec.noise_model() for spec in specs}
+
+    def run(spec: BackendSpec, friend_size: int) -> dict:
+        results = generate_all_experiments(
+            backend=backends[spec],
+            noise_model=noise_models[spec],
+            shots=shots,
+            angles=angles,
+            beta=beta,
+            charlie_size=friend_size,
+            debbie_size=friend_size,
+            batch=True,
+            seed=seed,
+        )
+        return {"backend": spec.label, "friend_size": friend_size, **compute_inequalities(results)}
+
+    tasks = list(itertools.product(specs, friend_sizes))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda task: run(*task), tasks))
+
+
+def format_table(rows: list[dict]) -> str:
+    """Plain-text table of `compare_backends` rows."""
+    width = max([len("backend")] + [len(row["backend"]) for row in rows])
+    lines = [f"{'backend':<{width}}  friend_size  " + "  ".join(f"{name:>12}" for name in INEQUALITIES)]
+    for row in rows:
+        lines.append(
+            f"{row['backend']:<{width}}  {row['friend_size']:>11}  "
+            + "  ".join(f"{row[name]:>12.4f}" for name in INEQUALITIES)
+        )
+    return "\n".join(lines)
@@ -0,0 +1,340 @@
+"""Device-aware layouts of the EWFS registers, cached on disk, and a trimmed compilation pipeline.
+
+All nine setting circuits and every sweep point share the same interactions: Alice with Bob
+and each observer with its friend register, as copied by the fan-out. The layout is therefore
+searched once per (backend, calibration, friend sizes, fan-out) by matching that interaction
+graph onto the coupling map, preferring qubits with low two-qubit and readout errors, and is
+kept in a JSON file under `LAYOUT_CACHE_DIR`. Circuits are then compiled with the layout fixed, skipping the
+layout search of the preset transpiler and the routing too when the interaction graph embeds
+into the coupling map.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import rustworkx
+from qiskit import QuantumCircuit, transpile
+from qiskit.providers import Backend
+from qiskit.transpiler import CouplingMap, Layout, PassManager, StagedPassManager
+from qiskit.transpiler.passes import (
+    ApplyLayout,
+    CXCancellation,
+    Depth,
+    EnlargeWithAncilla,
+    FixedPoint,
+    FullAncillaAllocation,
+    GateDirection,
+    Optimize1qGatesDecomposition,
+    SabreSwap,
+    SetLayout,
+)
+from qiskit.transpiler.preset_passmanagers.common import generate_translation_passmanager
+
+from wigners_friend.backends import backend_name, coupling_edges, num_qubits
+from wigners_friend.config import ALICE, BOB, SYS_SIZE
+from wigners_friend.ewfs_circuit import fan_out_pairs
+from wigners_friend.fan_out import FanOut
+
+
+LAYOUT_CACHE_DIR = Path(
+    os.environ.get("WIGNERS_FRIEND_LAYOUT_CACHE", Path.home() / ".cache" / "wigners_friend" / "layouts")
+)
+
+# Bound on the states visited by the subgraph search, and on the embeddings compared by error.
+VF2_CALL_LIMIT = 100_000
+VF2_MAX_MAPPINGS = 1000
+
+_layouts: dict[str, list[int] | None] = {}
+
+
+def interaction_edges(
+    charlie_size: int, debbie_size: int, fan_out: FanOut = FanOut.LADDER
+) -> list[tuple[int, int]]:
+    """Pairs of virtual qubits that share a two-qubit gate in any EWFS circuit."""
+    return (
+        [(ALICE, BOB)]
+        + fan_out_pairs(ALICE, SYS_SIZE, charlie_size, fan_out)
+        + fan_out_pairs(BOB, SYS_SIZE + charlie_size, debbie_size, fan_out)
+    )
+
+
+def qubit_errors(backend: Backend) -> tuple[dict[tuple[int, int], float], dict[int, float]]:
+    """Two-qubit gate error of every coupled pair and readout error of every qubit, where known."""
+    edge_errors, readout_errors = {}, {}
+    target = getattr(backend, "target", None)
+    if target is not None:
+        for name in target.operation_names:
+            for qargs, properties in target[name].items():
+                if qargs is None or properties is None or properties.error is None:
+                    continue
+                if len(qargs) == 2:
+                    edge_errors[tuple(sorted(qargs))] = properties.error
+                elif name == "measure":
+                    readout_errors[qargs[0]] = properties.error
+    elif hasattr(backend, "properties") and backend.properties() is not None:
+        properties = backend.properties()
+        for gate in properties.gates:
+            if len(gate.qubits) == 2:
+                edge_errors[tuple(sorted(gate.qubits))] = properties.gate_error(gate.gate, gate.qubits)
+        for qubit in range(len(properties.qubits)):
+            readout_errors[qubit] = properties.readout_error(qubit)
+    return edge_errors, readout_errors
+
+
+def _layout_error(
+    layout: list[int],
+    interactions: list[tuple[int, int]],
+    edge_errors: dict[tuple[int, int], float],
+    readout_errors: dict[int, float],
+) -> float:
+    """Summed error of the coupled interactions and of reading out every laid out qubit."""
+    return sum(edge_errors.get(tuple(sorted((layout[a], layout[b]))), 0.0) for a, b in interactions) + sum(
+        readout_errors.get(qubit, 0.0) for qubit in layout
+    )
+
+
+def _embedded_layout(
+    edges: list[tuple[int, int]],
+    size: int,
+    interactions: list[tuple[int, int]],
+    errors: tuple[dict, dict],
+) -> list[int] | None:
+    """Lowest-error layout that puts every interaction on a coupled pair, if there is one."""
+    device = rustworkx.PyGraph()
+    device.add_nodes_from(range(size))
+    device.add_edges_from_no_data(list({tuple(sorted(edge)) for edge in edges}))
+    circuit = rustworkx.PyGraph()
+    circuit.add_nodes_from(range(max(max(edge) for edge in interactions) + 1))
+    circuit.add_edges_from_no_data(interactions)
+
+    mappings = rustworkx.vf2_mapping(
+        device, circuit, subgraph=True, induced=False, call_limit=VF2_CALL_LIMIT
+    )
+    best, best_error = None, None
+    for _, mapping in zip(range(VF2_MAX_MAPPINGS), mappings):
+        layout = [0] * len(circuit)
+        for physical, virtual in mapping.items():
+            layout[virtual] = physical
+        error = _layout_error(layout, interactions, *errors)
+        if best_error is None or error < best_error:
+            best, best_error = layout, error
+    return best
+
+
+def _greedy_layout(
+    edges: list[tuple[int, int]],
+    size: int,
+    charlie_size: int,
+    debbie_size: int,
+    fan_out: FanOut,
+    errors: tuple[dict, dict],
+) -> list[int] | None:
+    """Layout placing every friend qubit on the free qubit nearest to the qubit it is copied from.
+
+    Alice and Bob start on every coupled pair in turn, and the layout with the fewest extra hops
+    (and then the lowest error) wins.
+    """
+    distances = CouplingMap(edges).distance_matrix
+    interactions = interaction_edges(charlie_size, debbie_size, fan_out)
+    # Interleave the two fan-outs so that neither observer takes all the qubits close to both.
+    alice_pairs = fan_out_pairs(ALICE, SYS_SIZE, charlie_size, fan_out)
+    bob_pairs = fan_out_pairs(BOB, SYS_SIZE + charlie_size, debbie_size, fan_out)
+    order = [pair for pairs in zip(alice_pairs, bob_pairs) for pair in pairs]
+    order += alice_pairs[len(bob_pairs):] + bob_pairs[len(alice_pairs):]
+
+    best, best_cost = None, None
+    for alice, bob in edges:
+        placed = {ALICE: alice, BOB: bob}
+        for control, target in order:
+            free = [qubit for qubit in range(size) if qubit not in placed.values()]
+            placed[target] = min(
+                free, key=lambda qubit: (distances[placed[control], qubit], errors[1].get(qubit, 0.0))
+            )
+        layout = [placed[virtual] for virtual in range(len(placed))]
+        hops = sum(int(distances[layout[a], layout[b]]) - 1 for a, b in interactions)
+        cost = (hops, _layout_error(layout, interactions, *errors))
+        if best_cost is None or cost < best_cost:
+            best, best_cost = layout, cost
+    return best
+
+
+def find_layout(
+    backend: Backend, charlie_size: int, debbie_size: int, fan_out: FanOut = FanOut.LADDER
+) -> list[int] | None:
+    """Initial layout of the EWFS registers on a backend, or None if it has no coupling map.
+
+    The layout lists the physical qubit of every virtual qubit: Alice, Bob, then Charlie's and
+    Debbie's registers. An embedding of the interaction graph into the coupling map is used if
+    one exists, and a greedy placement near the copying qubits otherwise.
+    """
+    edges = coupling_edges(backend)
+    if edges is None:
+        return None
+    size = num_qubits(backend)
+    if SYS_SIZE + charlie_size + debbie_size > size:
+        return None
+    errors = qubit_errors(backend)
+    interactions = interaction_edges(charlie_size, debbie_size, fan_out)
+    layout = _embedded_layout(edges, size, interactions, errors)
+    if layout is None:
+        layout = _greedy_layout(edges, size, charlie_size, debbie_size, fan_out, errors)
+    return layout
+
+
+def calibration_fingerprint(backend: Backend) -> str:
+    """Hash of the qubit errors a layout is chosen by, which change with every calibration."""
+    edge_errors, readout_errors = qubit_errors(backend)
+    calibration = {
+        "edges": sorted([list(edge), error] for edge, error in edge_errors.items()),
+        "readout": sorted([qubit, error] for qubit, error in readout_errors.items()),
+    }
+    return hashlib.sha256(json.dumps(calibration).encode()).hexdigest()
+
+
+def layout_key(backend: Backend, charlie_size: int, debbie_size: int, fan_out: FanOut) -> str:
+    """Hash of everything that determines the layout found for a backend.
+
+    The calibration is part of the key, so a layout chosen for the errors of an older
+    calibration is searched again rather than reused.
+    """
+    edges = coupling_edges(backend)
+    description = {
+        "backend": backend_name(backend),
+        "coupling_map": sorted(edges) if edges is not None else None,
+        "calibration": calibration_fingerprint(backend),
+        "charlie_size": charlie_size,
+        "debbie_size": debbie_size,
+        "fan_out": fan_out.value,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def _write_layout(path: Path, entry: dict):
+    """Write a cache entry atomically, through a temporary file of this writer's own.
+
+    Concurrent writers of the same entry each replace the file with a complete copy.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(entry, file, indent=2)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def device_layout(
+    backend: Backend,
+    charlie_size: int,
+    debbie_size: int,
+    fan_out: FanOut = FanOut.LADDER,
+    cache_dir: str | os.PathLike | None = None,
+) -> list[int] | None:
+    """Layout of `find_layout`, searched once and then read from memory or `cache_dir`."""
+    if coupling_edges(backend) is None:
+        return None
+    key = layout_key(backend, charlie_size, debbie_size, fan_out)
+    if key in _layouts:
+        return _layouts[key]
+
+    path = Path(cache_dir if cache_dir is not None else LAYOUT_CACHE_DIR) / f"{key}.json"
+    if not path.exists():
+        layout = find_layout(backend, charlie_size, debbie_size, fan_out)
+        _write_layout(path, {
+            "backend": backend_name(backend),
+            "charlie_size": charlie_size,
+            "debbie_size": debbie_size,
+            "fan_out": fan_out.value,
+            "layout": layout,
+        })
+    # Another process or thread may have placed the file first; its layout is as good as ours.
+    layout = json.loads(path.read_text())["layout"]
+    _layouts[key] = layout
+    return layout
+
+
+def clear_layout_cache():
+    """Forget the layouts held in memory; those on disk are kept."""
+    _layouts.clear()
+
+
+def _cancellation(*passes) -> PassManager:
+    """Cancel adjacent CNOTs (and run `passes`) until the depth stops changing.
+
+    Each round cancels one layer of a mirrored CNOT sequence. The copy and uncopy of a REVERSE
+    setting are kept apart by a barrier and never cancel.
+    """
+    manager = PassManager()
+    manager.append(
+        [Depth(), FixedPoint("depth"), CXCancellation(), *passes],
+        do_while=lambda property_set: not property_set["depth_fixed_point"],
+    )
+    return manager
+
+
+def compilation_pass_manager(
+    circuit: QuantumCircuit,
+    backend: Backend,
+    layout: list[int],
+    basis_gates: list[str] | None = None,
+    seed: int | None = None,
+) -> StagedPassManager:
+    """Passes compiling a circuit onto a backend with a fixed initial layout.
+
+    Gates that cancel are removed before the layout is applied, SWAPs are only routed in if some
+    two-qubit gate acts on uncoupled qubits, and after translation to the basis gates only
+    cancellations and single-qubit merges are run.
+    """
+    coupling_map = CouplingMap(coupling_edges(backend))
+    target = getattr(backend, "target", None) if basis_gates is None else None
+    if target is None and basis_gates is None:
+        basis_gates = backend.configuration().basis_gates
+
+    gate_qubits = [
+        [layout[circuit.find_bit(qubit).index] for qubit in instruction.qubits]
+        for instruction in circuit.data
+        if instruction.operation.num_qubits == 2 and instruction.operation.name != "barrier"
+    ]
+    routing = PassManager()
+    if any(coupling_map.distance(a, b) != 1 for a, b in gate_qubits):
+        routing.append(SabreSwap(coupling_map, heuristic="decay", seed=seed))
+    if not coupling_map.is_symmetric:
+        routing.append(GateDirection(coupling_map, target))
+
+    return StagedPassManager(
+        stages=["init", "layout", "routing", "translation", "optimization"],
+        init=_cancellation(),
+        layout=PassManager([
+            SetLayout(Layout.from_intlist(layout, *circuit.qregs)),
+            FullAncillaAllocation(coupling_map),
+            EnlargeWithAncilla(),
+            ApplyLayout(),
+        ]),
+        routing=routing,
+        translation=generate_translation_passmanager(target, basis_gates, coupling_map=coupling_map),
+        optimization=_cancellation(Optimize1qGatesDecomposition(basis=basis_gates, target=target)),
+    )
+
+
+def compile_circuit(
+    circuit: QuantumCircuit,
+    backend: Backend,
+    charlie_size: int,
+    debbie_size: int,
+    fan_out: FanOut = FanOut.LADDER,
+    basis_gates: list[str] | None = None,
+    seed: int | None = None,
+) -> QuantumCircuit:
+    """Compile an EWFS circuit with the cached device layout and the trimmed pass pipeline.
+
+    Backends without a coupling map have nothing to lay out, so their circuits go through the
+    preset transpiler instead.
+    """
+    layout = device_layout(backend, charlie_size, debbie_size, fan_out)
+    if layout is None:
+        return transpile(circuit, backend=backend, basis_gates=basis_gates, seed_transpiler=seed)
+    return compilation_pass_manager(circuit, backend, layout, basis_gates, seed).run(circuit)
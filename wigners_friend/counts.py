@@ -0,0 +1,130 @@
+"""Array-backed counts of all setting pairs."""
+import itertools
+
+import numpy as np
+
+from wigners_friend.config import SETTINGS
+from wigners_friend.setting import Setting
+
+
+_SHAPE = (len(SETTINGS), len(SETTINGS), 4)
+
+
+class ExperimentCounts:
+    """Counts of an experiment indexed by (alice_setting, bob_setting, outcome).
+
+    The setting axes follow `SETTINGS` and the outcome index is `2 * alice_bit + bob_bit`, the
+    order "00", "01", "10", "11" of the results dicts. The shots of every setting pair are kept
+    next to the counts.
+    """
+    __slots__ = ("counts", "shots")
+
+    def __init__(self, counts: np.ndarray | None = None):
+        self.counts = np.zeros(_SHAPE, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        if self.counts.shape != _SHAPE:
+            raise ValueError(f"Counts must have shape {_SHAPE}, not {self.counts.shape}.")
+        self.shots = self.counts.sum(axis=-1)
+
+    @classmethod
+    def from_dict(cls, counts: dict[tuple[Setting, Setting], dict[str, int]]) -> "ExperimentCounts":
+        """Counts keyed in classical bit order, as returned by `generate_all_counts`."""
+        experiment_counts = cls()
+        for (alice_setting, bob_setting), setting_counts in counts.items():
+            i, j = SETTINGS.index(alice_setting), SETTINGS.index(bob_setting)
+            for key, value in setting_counts.items():
+                experiment_counts.counts[i, j, int(key, 2)] += value
+        experiment_counts.shots = experiment_counts.counts.sum(axis=-1)
+        return experiment_counts
+
+    @classmethod
+    def from_results(
+        cls, results: dict[tuple[Setting, Setting], dict[str, float]], shots: int
+    ) -> "ExperimentCounts":
+        """Counts of a results dict of probabilities estimated from `shots` shots."""
+        counts = np.zeros(_SHAPE)
+        for (alice_setting, bob_setting), probabilities in results.items():
+            i, j = SETTINGS.index(alice_setting), SETTINGS.index(bob_setting)
+            for key, probability in probabilities.items():
+                counts[i, j, int(key, 2)] = probability
+        return cls(np.rint(counts * shots))
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes | memoryview) -> "ExperimentCounts":
+        """Counts from the bytes written by `tobytes`."""
+        return cls(np.frombuffer(buffer, dtype=np.int64).reshape(_SHAPE).copy())
+
+    def add(self, alice_setting: Setting, bob_setting: Setting, qiskit_counts: dict[str, int]):
+        """Add the Qiskit counts of one setting pair in place, without reversing their keys."""
+        histogram = self.counts[SETTINGS.index(alice_setting), SETTINGS.index(bob_setting)]
+        for key, value in qiskit_counts.items():
+            # Qiskit keys are big-endian, so Alice's bit is the lowest bit of the integer.
+            bits = int(key, 2)
+            histogram[2 * (bits & 1) + (bits >> 1 & 1)] += value
+        self.shots = self.counts.sum(axis=-1)
+
+    def merge(self, other: "ExperimentCounts") -> "ExperimentCounts":
+        """Counts of both experiments together."""
+        return ExperimentCounts(self.counts + other.counts)
+
+    __add__ = merge
+
+    def __iadd__(self, other: "ExperimentCounts") -> "ExperimentCounts":
+        self.counts += other.counts
+        self.shots = self.shots + other.shots
+        return self
+
+    def subsample(self, shots: int, seed: int | None = None) -> "ExperimentCounts":
+        """Counts of `shots` shots of every setting pair, drawn without replacement.
+
+        Setting pairs with no more than `shots` shots keep all of them.
+        """
+        rng = np.random.default_rng(seed)
+        counts = self.counts.copy()
+        for index in np.ndindex(*_SHAPE[:-1]):
+            if self.shots[index] > shots:
+                counts[index] = rng.multivariate_hypergeometric(self.counts[index], shots)
+        return ExperimentCounts(counts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExperimentCounts):
+            return NotImplemented
+        return np.array_equal(self.counts, other.counts)
+
+    def __repr__(self) -> str:
+        return f"ExperimentCounts(shots={self.shots.tolist()})"
+
+    def __getstate__(self) -> bytes:
+        return self.tobytes()
+
+    def __setstate__(self, state: bytes):
+        self.counts = np.frombuffer(state, dtype=np.int64).reshape(_SHAPE).copy()
+        self.shots = self.counts.sum(axis=-1)
+
+    def tobytes(self) -> bytes:
+        """Raw int64 buffer of the counts, in C order."""
+        return self.counts.tobytes()
+
+    def normalize(self) -> np.ndarray:
+        """Probability tensor with shape (settings, settings, 4)."""
+        return self.counts / np.maximum(self.shots, 1)[..., None]
+
+    def to_dict(self) -> dict[tuple[Setting, Setting], dict[str, int]]:
+        """Counts keyed in classical bit order, leaving out outcomes that did not occur."""
+        return {
+            (alice_setting, bob_setting): {
+                f"{outcome:02b}": int(count)
+                for outcome, count in enumerate(self.counts[i, j]) if count
+            }
+            for (i, alice_setting), (j, bob_setting) in itertools.product(enumerate(SETTINGS), repeat=2)
+        }
+
+    def to_results(self) -> dict[tuple[Setting, Setting], dict[str, float]]:
+        """Results dict of probabilities, as returned by `generate_all_experiments`."""
+        probabilities = self.normalize()
+        return {
+            (alice_setting, bob_setting): {
+                f"{outcome:02b}": float(probabilities[i, j, outcome])
+                for outcome in range(4) if self.counts[i, j, outcome]
+            }
+            for (i, alice_setting), (j, bob_setting) in itertools.product(enumerate(SETTINGS), repeat=2)
+        }
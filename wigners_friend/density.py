@@ -0,0 +1,107 @@
+"""Exact noisy output distributions from density-matrix simulation.
+
+Each setting circuit is simulated once as a density matrix and the probabilities of the two
+measured bits are saved instead of sampled. Finite-shot results for any number of shots and
+seeds are then drawn with a multinomial, which is far cheaper than simulating the shots.
+"""
+import itertools
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.providers import Backend
+from qiskit_aer import AerSimulator
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.compilation import compile_circuit
+from wigners_friend.config import MEAS_SIZE, SETTINGS
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.fan_out import FanOut
+from wigners_friend.stats import tensor_to_results
+
+
+def measured_qubits(circuit: QuantumCircuit) -> list[int]:
+    """Qubits measured into each classical bit, in classical bit order."""
+    qubits = {}
+    for instruction in circuit.data:
+        if instruction.operation.name == "measure":
+            clbit = circuit.find_bit(instruction.clbits[0]).index
+            qubits[clbit] = circuit.find_bit(instruction.qubits[0]).index
+    return [qubits[clbit] for clbit in range(MEAS_SIZE)]
+
+
+def readout_matrix(noise_model: NoiseModel | None, qubit: int) -> np.ndarray:
+    """Readout confusion matrix [true, recorded] of a qubit in a noise model."""
+    if noise_model is None:
+        return np.eye(2)
+    matrix = np.eye(2)
+    for error in noise_model.to_dict()["errors"]:
+        if error["type"] != "roerror":
+            continue
+        gate_qubits = error.get("gate_qubits")
+        if gate_qubits is None:
+            matrix = np.array(error["probabilities"])
+        elif [qubit] in gate_qubits:
+            # Local readout errors take precedence over the default one.
+            return np.array(error["probabilities"])
+    return matrix
+
+
+def noisy_probability_tensor(
+    noise_model: NoiseModel | None,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    backend: Backend | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+) -> np.ndarray:
+    """Exact probabilities of all setting pairs with shape (settings, settings, 4).
+
+    The circuits are compiled to the noise model's basis gates and, given a `backend` with a
+    coupling map, onto its device layout, so that device noise acts on the physical qubits the
+    circuits would run on. They are simulated on the Aer density-matrix simulator in a single
+    job, which drops the idle device qubits. The density matrix has 2 + charlie_size +
+    debbie_size qubits (plus any routed through), so this is meant for small friend sizes.
+    """
+    simulator = AerSimulator(method="density_matrix")
+    basis_gates = noise_model.basis_gates if noise_model is not None else None
+    circuits = []
+    qubits = []
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        circuit = compile_circuit(
+            ewfs(alice_setting, bob_setting, angles, beta, charlie_size, debbie_size, fan_out),
+            backend if backend is not None else simulator,
+            charlie_size,
+            debbie_size,
+            fan_out,
+            basis_gates,
+        )
+        qubits.append(measured_qubits(circuit))
+        circuit = circuit.remove_final_measurements(inplace=False)
+        circuit.save_probabilities(qubits[-1])
+        circuits.append(circuit)
+
+    result = simulator.run(circuits, noise_model=noise_model).result()
+
+    tensor = np.empty((len(SETTINGS) ** 2, 4))
+    for i, (alice_qubit, bob_qubit) in enumerate(qubits):
+        # Saved probabilities are little-endian, so index 1 is Alice's bit.
+        probabilities = np.asarray(result.data(i)["probabilities"]).reshape(2, 2).T
+        probabilities = (
+            readout_matrix(noise_model, alice_qubit).T @ probabilities @ readout_matrix(noise_model, bob_qubit)
+        )
+        tensor[i] = probabilities.reshape(4)
+    return tensor.reshape(len(SETTINGS), len(SETTINGS), 4)
+
+
+def sample_counts(probabilities: np.ndarray, shots: int, seed: int | None = None) -> ExperimentCounts:
+    """Counts of `shots` multinomial samples of every setting pair."""
+    rng = np.random.default_rng(seed)
+    probabilities = np.clip(probabilities, 0, None)
+    return ExperimentCounts(rng.multinomial(shots, probabilities / probabilities.sum(axis=-1, keepdims=True)))
+
+
+def sample_experiments(probabilities: np.ndarray, shots: int, seed: int | None = None) -> dict:
+    """Results dict of frequencies from `shots` multinomial samples of every setting pair."""
+    return tensor_to_results(sample_counts(probabilities, shots, seed).normalize())
@@ -0,0 +1,108 @@
+"""Friend-averaged experiments over every qubit a PEEK setting can read.
+
+A PEEK setting reads one qubit of the friend's register, which `ewfs` otherwise picks at random
+per circuit build. Here every setting pair is expanded into all of its offset variants, whose
+templates are compiled once and cached. A seeded RNG spreads the shots of a setting pair over
+its variants, the variants run in one job per distinct shot allocation, and their counts are
+merged per setting pair.
+"""
+import collections
+import itertools
+
+import numpy as np
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.config import PEEK, SETTINGS
+from wigners_friend.fan_out import FanOut
+from wigners_friend.observer import Observer
+from wigners_friend.setting import Setting
+from wigners_friend.templates import bind_template, transpiled_template
+from wigners_friend.utils import reverse_keys, run_options
+
+
+def peek_variants(
+    alice_setting: Setting, bob_setting: Setting, charlie_size: int, debbie_size: int
+) -> list[tuple[int, int]]:
+    """(charlie_offset, debbie_offset) of every variant of a setting pair.
+
+    An observer that does not peek reads no friend qubit and only has offset 0.
+    """
+    charlie_offsets = range(charlie_size) if alice_setting == PEEK else [0]
+    debbie_offsets = range(debbie_size) if bob_setting == PEEK else [0]
+    return list(itertools.product(charlie_offsets, debbie_offsets))
+
+
+def allocate_shots(shots: int, variants: int, rng: np.random.Generator) -> np.ndarray:
+    """Split `shots` over the variants as evenly as possible, the remainder going to random variants."""
+    allocation = np.full(variants, shots // variants)
+    allocation[rng.choice(variants, shots % variants, replace=False)] += 1
+    return allocation
+
+
+def generate_ensemble_counts(
+    backend: Backend,
+    noise_model: NoiseModel | None,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    seed: int | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+) -> dict[tuple[Observer, Observer], dict[str, int]]:
+    """Counts of all settings averaged over the PEEK offsets, keyed in classical bit order.
+
+    Each setting pair gets exactly `shots` shots in total. Shots split evenly over the variants
+    with at most one extra shot each, so the variants are grouped by allocation and each group
+    runs as its own job with exactly that many shots. The same `seed` reproduces both the
+    allocation and the simulation.
+    """
+    rng = np.random.default_rng(seed)
+    settings = list(itertools.product(SETTINGS, repeat=2))
+
+    groups = collections.defaultdict(list)
+    for alice_setting, bob_setting in settings:
+        variants = peek_variants(alice_setting, bob_setting, charlie_size, debbie_size)
+        for (charlie_offset, debbie_offset), variant_shots in zip(
+            variants, allocate_shots(shots, len(variants), rng)
+        ):
+            if not variant_shots:
+                continue
+            template = transpiled_template(
+                alice_setting, bob_setting, charlie_size, debbie_size, backend, noise_model, fan_out,
+                charlie_offset, debbie_offset,
+            )
+            circuit = bind_template(template, angles, beta)
+            groups[int(variant_shots)].append(((alice_setting, bob_setting), circuit))
+
+    all_counts = {setting: collections.Counter() for setting in settings}
+    for variant_shots, group in sorted(groups.items()):
+        # Draw a seed per job so that no two jobs replay the same simulator stream.
+        job_seed = int(rng.integers(2**31)) if seed is not None else None
+        options = run_options(backend, noise_model, variant_shots, job_seed)
+        result = backend.run([circuit for _, circuit in group], **options).result()
+        for i, (setting, _) in enumerate(group):
+            all_counts[setting].update(result.get_counts(i))
+    return {setting: reverse_keys(dict(counts)) for setting, counts in all_counts.items()}
+
+
+def generate_ensemble_experiments(
+    backend: Backend,
+    noise_model: NoiseModel | None,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    seed: int | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+) -> dict[tuple[Observer, Observer], dict[str, float]]:
+    """Probabilities of all settings averaged over the PEEK offsets."""
+    all_counts = generate_ensemble_counts(
+        backend, noise_model, shots, angles, beta, charlie_size, debbie_size, seed, fan_out
+    )
+    return {
+        setting: {key: value / shots for key, value in counts.items()}
+        for setting, counts in all_counts.items()
+    }
@@ -2,6 +2,7 @@
 import random
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
 
+from wigners_friend.fan_out import FanOut
 from wigners_friend.observer import Observer
 from wigners_friend.setting import Setting
 
@@ -9,7 +10,6 @@ from wigners_friend.config import (
     ALICE, BOB, ALICE_SIZE, BOB_SIZE,
     MEAS_SIZE, 
     PEEK, REVERSE_1, REVERSE_2,
-    ANGLES, BETA,
     SYS_SIZE,
 )
 
@@ -28,6 +28,44 @@ def cnot_ladder(qc: QuantumCircuit, observer: Observer, friend_qubit: int, frien
         qc.cx(observer, friend_qubit + i)
 
 
+def fan_out_pairs(
+    observer: Observer, friend_qubit: int, friend_size: int, fan_out: FanOut = FanOut.LADDER
+) -> list[tuple[int, int]]:
+    """(control, target) pairs of the CNOTs that copy the observer into its friend register.
+
+    LADDER controls every CNOT on the observer (linear depth), TREE doubles the number of
+    copies in every layer (logarithmic depth) and CHAIN passes the copy along the register,
+    so that every CNOT acts on neighbours of a line of qubits.
+    """
+    friend_qubits = list(range(friend_qubit, friend_qubit + friend_size))
+    if fan_out is FanOut.LADDER:
+        return [(observer, qubit) for qubit in friend_qubits]
+    if fan_out is FanOut.CHAIN:
+        return list(zip([observer] + friend_qubits[:-1], friend_qubits))
+
+    pairs = []
+    holders = [observer]
+    while friend_qubits:
+        targets, friend_qubits = friend_qubits[:len(holders)], friend_qubits[len(holders):]
+        pairs.extend(zip(holders, targets))
+        holders = holders + targets
+    return pairs
+
+
+def apply_fan_out(
+    qc: QuantumCircuit,
+    observer: Observer,
+    friend_qubit: int,
+    friend_size: int,
+    fan_out: FanOut = FanOut.LADDER,
+    inverse: bool = False,
+):
+    """Copy the observer into its friend register, or uncopy it in reverse order if `inverse`."""
+    pairs = fan_out_pairs(observer, friend_qubit, friend_size, fan_out)
+    for control, target in reversed(pairs) if inverse else pairs:
+        qc.cx(control, target)
+
+
 def ewfs_rotation(qc: QuantumCircuit, qubit: int, angle: float):
     qc.rz(-angle, qubit)
     qc.h(qubit)
@@ -38,10 +76,19 @@ def apply_setting(
     observer: Observer,
     setting: Setting,
     angle: float,
+    pre_angle: float,
     charlie_size: int,
-    debbie_size: int
+    debbie_size: int,
+    fan_out: FanOut = FanOut.LADDER,
+    peek_offset: int | None = None,
 ):
-    """Apply either the PEEK or REVERSE_1/REVERSE_2 settings."""
+    """Apply either the PEEK or REVERSE_1/REVERSE_2 settings.
+
+    `pre_angle` is the angle of the rotation applied to the observer before the friend's
+    measurement, which is undone when the measurement is reversed. Reversing the measurement
+    uncomputes the `fan_out` copy, behind a barrier so that it is compiled as such. PEEK reads
+    the friend qubit at `peek_offset` in the friend's register, or a random one if it is None.
+    """
     charlie_qubits = range(SYS_SIZE, (SYS_SIZE + charlie_size))
     debbie_qubits = range(SYS_SIZE + charlie_size, SYS_SIZE + (charlie_size + debbie_size))
 
@@ -50,22 +97,21 @@ def apply_setting(
     friend_size = charlie_size if observer is ALICE else debbie_size
     
     if setting is PEEK:
-        # Ask friend for the outcome. We pick a random qubit from friend's register.
-        random_offset = random.randint(0, friend_size - 1)
-        qc.measure(friend_qubits[0] + random_offset, observer)
+        # Ask friend for the outcome. Unless given, we pick a random qubit from friend's register.
+        if peek_offset is None:
+            peek_offset = random.randint(0, friend_size - 1)
+        qc.measure(friend_qubits[0] + peek_offset, observer)
 
     elif setting in [REVERSE_1, REVERSE_2]:
-        cnot_ladder(qc, observer, friend_qubits[0], friend_size)
+        # Keep the transpiler from cancelling the uncopy against the copy, which would remove the
+        # friend (and its noise) from the circuit.
+        qc.barrier([observer, *friend_qubits])
+        apply_fan_out(qc, observer, friend_qubits[0], friend_size, fan_out, inverse=True)
 
         # For either REVERSE_1 or REVERSE_2, apply the appropriate angle rotations.
         # Note that in this case, the rotation should occur on the observer's qubit.
-        if observer is ALICE:
-            qc.h(0)
-            qc.rz(ANGLES[1], 0)        
-
-        if observer is BOB:
-            qc.h(1)        
-            qc.rz((BETA - ANGLES[1]), 1)
+        qc.h(observer)
+        qc.rz(pre_angle, observer)
         ewfs_rotation(qc, observer, angle)            
         qc.measure(observer, observer)
         
@@ -76,9 +122,17 @@ def ewfs(
     angles: list[float],
     beta: float,
     charlie_size: int,
-    debbie_size: int
+    debbie_size: int,
+    fan_out: FanOut = FanOut.LADDER,
+    charlie_offset: int | None = None,
+    debbie_offset: int | None = None,
 ) -> QuantumCircuit:
-    """Generate the circuit for extended Wigner's friend scenario."""    
+    """Generate the circuit for extended Wigner's friend scenario.
+
+    `fan_out` selects how the friend registers copy the observers, see `fan_out_pairs`.
+    `charlie_offset` and `debbie_offset` fix the friend qubit read by a PEEK setting, which is
+    otherwise picked at random.
+    """
     # Define quantum registers
     alice, bob, charlie, debbie = [
         QuantumRegister(size, name=name) 
@@ -101,12 +155,18 @@ def ewfs(
     charlie_qubits = range(SYS_SIZE, (SYS_SIZE + charlie_size))
     debbie_qubits = range(SYS_SIZE + charlie_size, SYS_SIZE + (charlie_size + debbie_size))
 
-    # Apply the CNOT ladder for Alice-Charlie and Bob-Debbie
-    cnot_ladder(qc, ALICE, charlie_qubits[0], charlie_size)
-    cnot_ladder(qc, BOB, debbie_qubits[0], debbie_size)
+    # Copy Alice into Charlie and Bob into Debbie
+    apply_fan_out(qc, ALICE, charlie_qubits[0], charlie_size, fan_out)
+    apply_fan_out(qc, BOB, debbie_qubits[0], debbie_size, fan_out)
 
     # Apply the settings for Alice/Charlie and Bob/Debbie
-    apply_setting(qc, ALICE, alice_setting, angles[alice_setting], charlie_size, debbie_size)
-    apply_setting(qc, BOB, bob_setting, (beta - angles[bob_setting]), charlie_size, debbie_size)
+    apply_setting(
+        qc, ALICE, alice_setting, angles[alice_setting], angles[1], charlie_size, debbie_size, fan_out,
+        charlie_offset,
+    )
+    apply_setting(
+        qc, BOB, bob_setting, (beta - angles[bob_setting]), (beta - angles[1]), charlie_size, debbie_size,
+        fan_out, debbie_offset,
+    )
 
     return qc
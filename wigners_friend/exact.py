@@ -0,0 +1,162 @@
+"""Exact (shot-free) probabilities for the EWFS circuits.
+
+In the ideal circuit every friend qubit holds a perfect copy of its observer's qubit, so the
+friend registers only matter through what they do to the two core qubits (Alice and Bob):
+
+* PEEK reads out a copy, which is the same as measuring the observer in the Z basis.
+* REVERSE uncomputes the copy, which restores the observer's qubit before it is rotated and
+  measured.
+
+The nine probability tables are therefore computed on a two-qubit statevector, independently
+of the friend sizes. All angles may be NumPy arrays, in which case the probabilities are
+evaluated for every element at once.
+"""
+import itertools
+
+import numpy as np
+
+from wigners_friend.observer import Observer
+from wigners_friend.setting import Setting
+from wigners_friend.config import (
+    ALICE, BOB,
+    PEEK,
+    SETTINGS,
+)
+
+
+_X = np.array([[0, 1], [1, 0]], dtype=complex)
+_Z = np.array([[1, 0], [0, -1]], dtype=complex)
+_H = np.array([[1, 1], [1, -1]], dtype=complex) / np.sqrt(2)
+
+
+def _rz(theta: float | np.ndarray) -> np.ndarray:
+    """RZ gate with the same convention as Qiskit, with shape (..., 2, 2)."""
+    phase = np.exp(-0.5j * np.asarray(theta, dtype=float))
+    gate = np.zeros(phase.shape + (2, 2), dtype=complex)
+    gate[..., 0, 0] = phase
+    gate[..., 1, 1] = phase.conj()
+    return gate
+
+
+def _apply(state: np.ndarray, gate: np.ndarray, observer: Observer) -> np.ndarray:
+    """Apply a single-qubit gate to Alice's or Bob's qubit of a (..., 2, 2) state."""
+    if observer is ALICE:
+        return np.einsum("...ij,...jb->...ib", gate, state)
+    return np.einsum("...ij,...aj->...ai", gate, state)
+
+
+def _rotate(state: np.ndarray, observer: Observer, angle: float | np.ndarray) -> np.ndarray:
+    """Apply `rz(-angle)` followed by `h`, as in `ewfs_rotation`."""
+    return _apply(_apply(state, _rz(-angle), observer), _H, observer)
+
+
+def _unrotate(state: np.ndarray, observer: Observer, angle: float | np.ndarray) -> np.ndarray:
+    """Undo `_rotate`, as done by `apply_setting` when reversing a measurement."""
+    return _apply(_apply(state, _H, observer), _rz(angle), observer)
+
+
+def bipartite_state() -> np.ndarray:
+    """The state 1/sqrt(2) * (|01> - |10>) indexed as [alice, bob]."""
+    state = np.zeros((2, 2), dtype=complex)
+    state[0, 0] = 1
+    state = _apply(_apply(state, _X, ALICE), _X, BOB)
+    state = _apply(state, _H, ALICE)
+    # CNOT with Alice as control and Bob as target.
+    state[1] = state[1, ::-1].copy()
+    return state
+
+
+def final_state(
+    alice_setting: Setting,
+    bob_setting: Setting,
+    angles: list[float],
+    beta: float,
+    alice_phase_flip: bool = False,
+    bob_phase_flip: bool = False,
+) -> np.ndarray:
+    """State of Alice and Bob right before they are measured in the Z basis.
+
+    A phase flip applies Z to the observer while the friend holds the copy, which is how
+    phase errors on the friend register act on the observer once the copy is uncomputed.
+    """
+    alice_pre_angle = angles[PEEK]
+    bob_pre_angle = beta - angles[PEEK]
+
+    state = bipartite_state()
+    state = _rotate(state, ALICE, alice_pre_angle)
+    state = _rotate(state, BOB, bob_pre_angle)
+    if alice_phase_flip:
+        state = _apply(state, _Z, ALICE)
+    if bob_phase_flip:
+        state = _apply(state, _Z, BOB)
+
+    # PEEK measures a copy in the friend register, which leaves the state as it is here.
+    if alice_setting is not PEEK:
+        state = _unrotate(state, ALICE, alice_pre_angle)
+        state = _rotate(state, ALICE, angles[alice_setting])
+    if bob_setting is not PEEK:
+        state = _unrotate(state, BOB, bob_pre_angle)
+        state = _rotate(state, BOB, beta - angles[bob_setting])
+    return state
+
+
+def exact_probabilities(
+    alice_setting: Setting,
+    bob_setting: Setting,
+    angles: list[float],
+    beta: float,
+    visibility: float = 1.0,
+) -> np.ndarray:
+    """Exact outcome probabilities of one setting pair with shape (..., 4).
+
+    The outcome index is `2 * alice_bit + bob_bit`, i.e. the order "00", "01", "10", "11" of
+    the keys returned by `generate_all_experiments`. A `visibility` below one mixes the shared
+    state with white noise, rho = visibility * |psi><psi| + (1 - visibility) * I / 4.
+    """
+    state = final_state(alice_setting, bob_setting, angles, beta)
+    probabilities = np.abs(state.reshape(state.shape[:-2] + (4,))) ** 2
+    return visibility * probabilities + (1 - visibility) / 4
+
+
+def exact_probability_tensor(
+    angles: list[float],
+    beta: float,
+    visibility: float = 1.0,
+) -> np.ndarray:
+    """Exact probabilities of all setting pairs with shape (..., settings, settings, 4)."""
+    return np.stack(
+        [
+            np.stack(
+                [
+                    exact_probabilities(alice_setting, bob_setting, angles, beta, visibility)
+                    for bob_setting in SETTINGS
+                ],
+                axis=-2,
+            )
+            for alice_setting in SETTINGS
+        ],
+        axis=-3,
+    )
+
+
+def generate_exact_experiments(
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    visibility: float = 1.0,
+) -> dict[tuple[Observer, Observer], dict[str, float]]:
+    """Exact probabilities for all combinations of experimental settings.
+
+    Drop-in alternative to `generate_all_experiments` that needs no backend and no shots.
+    """
+    if charlie_size < 1 or debbie_size < 1:
+        raise ValueError("Friend sizes must be at least one qubit.")
+
+    results = {}
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        probabilities = exact_probabilities(alice_setting, bob_setting, angles, beta, visibility)
+        results[(alice_setting, bob_setting)] = {
+            f"{outcome:02b}": float(probability) for outcome, probability in enumerate(probabilities)
+        }
+    return results
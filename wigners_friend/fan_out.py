@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class FanOut(Enum):
+    LADDER = "ladder"
+    TREE = "tree"
+    CHAIN = "chain"
@@ -0,0 +1,118 @@
+"""Per-stage timing and circuit metrics of experiment runs, with sinks to report them."""
+from __future__ import annotations
+
+import csv
+import logging
+import os
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wigners_friend.setting import Setting
+
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
+    from qiskit.result import Result
+
+
+@dataclass
+class SettingMetrics:
+    """Where the time of one setting pair went, and what its transpiled circuit looks like.
+
+    When several settings share a job, the job's submit and queue time is split evenly over them,
+    and each setting's execution time is the simulator's time for its experiment where the result
+    reports it (Aer does), or an even share of the job's time otherwise.
+    """
+    shots: int
+    build_seconds: float = 0.0
+    transpile_seconds: float = 0.0
+    submit_seconds: float = 0.0
+    execution_seconds: float = 0.0
+    postprocess_seconds: float = 0.0
+    depth: int | None = None
+    two_qubit_gates: int | None = None
+
+    @property
+    def total_seconds(self) -> float:
+        return (
+            self.build_seconds + self.transpile_seconds + self.submit_seconds
+            + self.execution_seconds + self.postprocess_seconds
+        )
+
+    def record_circuit(self, circuit: QuantumCircuit):
+        """Record the depth and two-qubit gate count of the circuit that is run."""
+        # `layout` imports Qiskit, which this module leaves to its callers.
+        from wigners_friend.layout import two_qubit_gate_count
+
+        self.depth = circuit.depth()
+        self.two_qubit_gates = two_qubit_gate_count(circuit)
+
+
+@dataclass
+class RunMetadata:
+    """Metrics of every setting pair of a run of `generate_all_experiments`."""
+    backend: str
+    settings: dict[tuple[Setting, Setting], SettingMetrics] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    def record_job(
+        self,
+        settings: list[tuple[Setting, Setting]],
+        result: Result,
+        submit_seconds: float,
+        wall_seconds: float,
+    ):
+        """Split a job's time over the settings it ran."""
+        experiment_seconds = [getattr(experiment, "time_taken", None) for experiment in result.results]
+        if None in experiment_seconds:
+            experiment_seconds = [wall_seconds / len(settings)] * len(settings)
+        overhead = submit_seconds + max(wall_seconds - sum(experiment_seconds), 0.0)
+        for setting, seconds in zip(settings, experiment_seconds):
+            self.settings[setting].execution_seconds += seconds
+            self.settings[setting].submit_seconds += overhead / len(settings)
+
+    def rows(self) -> list[dict]:
+        """One flat dict per setting pair, e.g. for a CSV file or a DataFrame."""
+        return [
+            {
+                "backend": self.backend,
+                "alice_setting": alice_setting,
+                "bob_setting": bob_setting,
+                **asdict(metrics),
+                "total_seconds": metrics.total_seconds,
+            }
+            for (alice_setting, bob_setting), metrics in self.settings.items()
+        ]
+
+
+Sink = Callable[[RunMetadata], None]
+
+
+def logging_sink(logger: logging.Logger | None = None, level: int = logging.INFO) -> Sink:
+    """Sink logging one line per setting pair."""
+    logger = logger if logger is not None else logging.getLogger("wigners_friend")
+
+    def sink(metadata: RunMetadata):
+        for row in metadata.rows():
+            logger.log(level, " ".join(f"{key}={value}" for key, value in row.items()))
+
+    return sink
+
+
+def csv_sink(path: str | os.PathLike) -> Sink:
+    """Sink appending one row per setting pair to a CSV file, writing the header first if needed."""
+    path = Path(path)
+
+    def sink(metadata: RunMetadata):
+        rows = metadata.rows()
+        if not rows:
+            return
+        write_header = not path.exists() or path.stat().st_size == 0
+        with path.open("a", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    return sink
@@ -0,0 +1,112 @@
+"""Device layouts for the fan-out strategies and a report of their cost."""
+from qiskit import QuantumCircuit, transpile
+from qiskit.providers import Backend
+
+from wigners_friend.backends import coupling_edges, num_qubits
+from wigners_friend.compilation import device_layout
+from wigners_friend.config import ANGLES, BETA, PEEK, SYS_SIZE
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.fan_out import FanOut
+
+
+def _find_path(neighbours: dict[int, set[int]], length: int) -> list[int] | None:
+    """A simple path through `length` qubits, found by depth-first search."""
+
+    def extend(path: list[int]) -> list[int] | None:
+        if len(path) == length:
+            return path
+        for neighbour in sorted(neighbours[path[-1]] - set(path)):
+            found = extend(path + [neighbour])
+            if found is not None:
+                return found
+        return None
+
+    # Start from the least connected qubits, where paths tend to begin on sparse devices.
+    for start in sorted(neighbours, key=lambda qubit: len(neighbours[qubit])):
+        path = extend([start])
+        if path is not None:
+            return path
+    return None
+
+
+def chain_layout(backend: Backend, charlie_size: int, debbie_size: int) -> list[int] | None:
+    """Initial layout that puts the CHAIN fan-out on a path of the coupling map.
+
+    The path holds Charlie's register in reverse, then Alice, Bob and Debbie's register, so
+    every CNOT of the circuit acts on neighbours. Returns None if the backend has no coupling
+    map or no path is long enough.
+    """
+    edges = coupling_edges(backend)
+    if edges is None:
+        return None
+    neighbours = {qubit: set() for qubit in range(num_qubits(backend))}
+    for a, b in edges:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+
+    path = _find_path(neighbours, SYS_SIZE + charlie_size + debbie_size)
+    if path is None:
+        return None
+    # Virtual qubits are ordered Alice, Bob, Charlie, Debbie.
+    alice, bob = path[charlie_size], path[charlie_size + 1]
+    charlie = path[:charlie_size][::-1]
+    debbie = path[charlie_size + 2:]
+    return [alice, bob] + charlie + debbie
+
+
+def fan_out_layout(
+    backend: Backend | None,
+    charlie_size: int,
+    debbie_size: int,
+    fan_out: FanOut,
+    layout: str | None = None,
+) -> list[int] | None:
+    """Initial layout to transpile a fan-out strategy with, or None to let the transpiler choose.
+
+    By default only CHAIN circuits are laid out, along a path of the coupling map. With
+    `layout="device"`, every fan-out gets the cached `device_layout` of the friend registers,
+    which is searched once and then kept on disk.
+    """
+    if backend is None:
+        return None
+    if layout == "device":
+        return device_layout(backend, charlie_size, debbie_size, fan_out)
+    if layout is not None:
+        raise ValueError(f"Unknown layout {layout!r}; use None or 'device'.")
+    if fan_out is not FanOut.CHAIN:
+        return None
+    return chain_layout(backend, charlie_size, debbie_size)
+
+
+def two_qubit_gate_count(circuit: QuantumCircuit) -> int:
+    """Number of two-qubit gates in a circuit."""
+    return sum(
+        1 for instruction in circuit.data
+        if instruction.operation.num_qubits == 2 and instruction.operation.name != "barrier"
+    )
+
+
+def fan_out_report(
+    charlie_size: int,
+    debbie_size: int,
+    backend: Backend | None = None,
+    seed: int | None = None,
+) -> dict[FanOut, dict[str, int]]:
+    """Depth and two-qubit gate count of each fan-out strategy.
+
+    The PEEK/PEEK circuit is measured, which copies both observers into their full friend
+    registers.
+    With a `backend`, the counts are those of the transpiled circuit, routing included.
+    """
+    report = {}
+    for fan_out in FanOut:
+        circuit = ewfs(PEEK, PEEK, ANGLES, BETA, charlie_size, debbie_size, fan_out)
+        if backend is not None:
+            circuit = transpile(
+                circuit,
+                backend=backend,
+                initial_layout=fan_out_layout(backend, charlie_size, debbie_size, fan_out),
+                seed_transpiler=seed,
+            )
+        report[fan_out] = {"depth": circuit.depth(), "two_qubit_gates": two_qubit_gate_count(circuit)}
+    return report
@@ -0,0 +1,189 @@
+"""Tensored readout-error mitigation with a calibration cache.
+
+Readout errors are modelled as independent per qubit, so two calibration circuits (every qubit
+prepared in |0>, every qubit prepared in |1>) measure the 2x2 confusion matrix of all qubits at
+once. Calibrations are cached per backend, noise model and set of qubits and rerun once they are
+older than `max_age` seconds. Measured distributions are corrected by applying the inverse of
+every measured bit's confusion matrix along its axis, which is done for all nine settings at once,
+and then clipped to a valid probability distribution.
+"""
+import itertools
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from qiskit import QuantumCircuit, transpile
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.backends import backend_name
+from wigners_friend.config import SETTINGS
+from wigners_friend.density import measured_qubits
+from wigners_friend.fan_out import FanOut
+from wigners_friend.observer import Observer
+from wigners_friend.setting import Setting
+from wigners_friend.store import noise_fingerprint
+from wigners_friend.templates import bind_template, transpiled_template
+from wigners_friend.utils import execute_circuits, reverse_keys
+
+
+# Seconds after which a cached calibration is rerun.
+CALIBRATION_MAX_AGE = 3600.0
+
+
+@dataclass
+class ReadoutCalibration:
+    """Confusion matrices [measured, prepared] of physical qubits."""
+    qubits: tuple[int, ...]
+    matrices: np.ndarray
+    created_at: float
+
+    def matrix(self, qubit: int) -> np.ndarray:
+        return self.matrices[self.qubits.index(qubit)]
+
+
+_calibrations: dict[tuple, ReadoutCalibration] = {}
+
+
+def calibration_circuits(num_qubits: int) -> list[QuantumCircuit]:
+    """Circuits preparing all qubits in |0> and all qubits in |1>."""
+    circuits = []
+    for prepared in (0, 1):
+        circuit = QuantumCircuit(num_qubits, num_qubits)
+        if prepared:
+            circuit.x(range(num_qubits))
+        circuit.measure(range(num_qubits), range(num_qubits))
+        circuits.append(circuit)
+    return circuits
+
+
+def calibrate(
+    backend: Backend,
+    noise_model: NoiseModel | None,
+    qubits: list[int],
+    shots: int = 10_000,
+    seed: int | None = None,
+) -> ReadoutCalibration:
+    """Measure the confusion matrices of the physical `qubits`."""
+    circuits = transpile(
+        calibration_circuits(len(qubits)), backend=backend, initial_layout=list(qubits), optimization_level=0
+    )
+    all_counts = execute_circuits(circuits, backend, noise_model, shots, transpiled=True, seed=seed)
+
+    matrices = np.zeros((len(qubits), 2, 2))
+    for prepared, counts in enumerate(all_counts):
+        for key, value in reverse_keys(counts).items():
+            for k, bit in enumerate(key):
+                matrices[k, int(bit), prepared] += value
+    return ReadoutCalibration(tuple(qubits), matrices / shots, time.time())
+
+
+def get_calibration(
+    backend: Backend,
+    noise_model: NoiseModel | None,
+    qubits: list[int],
+    shots: int = 10_000,
+    max_age: float = CALIBRATION_MAX_AGE,
+    seed: int | None = None,
+) -> ReadoutCalibration:
+    """Cached calibration of the `qubits`, rerun if it is older than `max_age` seconds."""
+    key = (backend_name(backend), noise_fingerprint(noise_model), tuple(sorted(qubits)))
+    calibration = _calibrations.get(key)
+    if calibration is None or time.time() - calibration.created_at > max_age:
+        calibration = calibrate(backend, noise_model, sorted(qubits), shots, seed)
+        _calibrations[key] = calibration
+    return calibration
+
+
+def clear_calibration_cache():
+    _calibrations.clear()
+
+
+def mitigate_probabilities(probabilities: np.ndarray, matrices: np.ndarray) -> np.ndarray:
+    """Correct the distributions of measured bits for readout errors.
+
+    `probabilities` has shape (batch, 2, ..., 2) with one axis per measured bit, and `matrices`
+    (batch, bits, 2, 2) holds the confusion matrix of every bit of every distribution. The
+    corrected distributions are clipped at zero and renormalized.
+    """
+    inverses = np.linalg.inv(matrices)
+    corrected = np.asarray(probabilities, dtype=float)
+    for k in range(matrices.shape[1]):
+        axis = np.moveaxis(corrected, k + 1, 1)
+        corrected = np.moveaxis(np.einsum("btm,bm...->bt...", inverses[:, k], axis), 1, k + 1)
+    corrected = np.clip(corrected, 0, None)
+    return corrected / corrected.sum(axis=tuple(range(1, corrected.ndim)), keepdims=True)
+
+
+def mitigate_counts(
+    counts: dict[tuple[Setting, Setting], dict[str, int]],
+    qubits: dict[tuple[Setting, Setting], list[int]],
+    calibration: ReadoutCalibration,
+) -> dict[tuple[Setting, Setting], dict[str, float]]:
+    """Mitigated probabilities of counts keyed in classical bit order.
+
+    `qubits` holds the physical qubit measured into each classical bit of every setting pair.
+    All settings must measure the same number of bits, and are mitigated together. Keys may be
+    wider than two bits, e.g. whole friend registers that are decoded by `decode_results` after
+    mitigation.
+    """
+    pairs = list(counts)
+    width = len(qubits[pairs[0]])
+    probabilities = np.zeros((len(pairs), 2**width))
+    for i, pair in enumerate(pairs):
+        for key, value in counts[pair].items():
+            probabilities[i, int(key, 2)] += value
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+    matrices = np.array([[calibration.matrix(qubit) for qubit in qubits[pair]] for pair in pairs])
+    corrected = mitigate_probabilities(probabilities.reshape((len(pairs),) + (2,) * width), matrices)
+    corrected = corrected.reshape(len(pairs), -1)
+    return {
+        pair: {f"{outcome:0{width}b}": float(corrected[i, outcome]) for outcome in range(2**width)}
+        for i, pair in enumerate(pairs)
+    }
+
+
+def generate_mitigated_experiments(
+    backend: Backend,
+    noise_model: NoiseModel | None,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    calibration_shots: int = 10_000,
+    max_age: float = CALIBRATION_MAX_AGE,
+    seed: int | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+) -> dict[tuple[Observer, Observer], dict[str, float]]:
+    """Readout-mitigated probabilities for all combinations of experimental settings.
+
+    The circuits come from the transpiled templates, whose measured physical qubits are known,
+    and are run as a single job. Those qubits are calibrated (or taken from the cache) and the
+    counts of all settings are mitigated together.
+    """
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    circuits = [
+        bind_template(
+            transpiled_template(
+                alice_setting, bob_setting, charlie_size, debbie_size, backend, noise_model, fan_out
+            ),
+            angles,
+            beta,
+        )
+        for alice_setting, bob_setting in settings
+    ]
+    qubits = {pair: measured_qubits(circuit) for pair, circuit in zip(settings, circuits)}
+    all_counts = execute_circuits(circuits, backend, noise_model, shots, transpiled=True, seed=seed)
+
+    calibration = get_calibration(
+        backend,
+        noise_model,
+        sorted({qubit for pair_qubits in qubits.values() for qubit in pair_qubits}),
+        calibration_shots,
+        max_age,
+        seed,
+    )
+    counts = {pair: reverse_keys(pair_counts) for pair, pair_counts in zip(settings, all_counts)}
+    return mitigate_counts(counts, qubits, calibration)
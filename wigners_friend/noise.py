@@ -0,0 +1,19 @@
+"""Noise models used by the EWFS experiments."""
+import functools
+
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel, depolarizing_error
+
+
+def depolarizing_noise_model(noise_level: float, gates: tuple[str, ...] = ("u1", "u2", "u3")) -> NoiseModel:
+    """Single-qubit depolarizing noise of the given level on all qubits for `gates`."""
+    noise_model = NoiseModel()
+    error = depolarizing_error(noise_level, 1)
+    noise_model.add_all_qubit_quantum_error(error, list(gates))
+    return noise_model
+
+
+@functools.lru_cache(maxsize=None)
+def backend_noise_model(backend: Backend) -> NoiseModel:
+    """Noise model of a (fake) device, built once per backend."""
+    return NoiseModel.from_backend(backend)
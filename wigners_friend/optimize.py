@@ -0,0 +1,155 @@
+"""Batched search for the measurement angles and beta that maximize an inequality's violation.
+
+A candidate is a vector (angle_PEEK, angle_REVERSE_1, angle_REVERSE_2, beta). Objectives take a
+(batch, 4) array of candidates and return one value per candidate, so every iteration of the
+optimizer evaluates its whole population at once: in exact mode as one vectorized evaluation of
+`exact_probability_tensor`, in noisy mode as one job of the cached, transpiled templates with the
+candidates bound as parameters.
+"""
+import itertools
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.config import ANGLES, BETA, SETTINGS
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.exact import exact_probability_tensor
+from wigners_friend.stats import INEQUALITIES, compute_inequality_tensor
+from wigners_friend.templates import bind_template, transpiled_template
+from wigners_friend.utils import execute_circuits
+
+
+Objective = Callable[[np.ndarray], np.ndarray]
+
+
+def to_candidate(angles: dict[int, float], beta: float) -> np.ndarray:
+    """Candidate vector of angles and beta."""
+    return np.array([angles[setting] for setting in SETTINGS] + [beta], dtype=float)
+
+
+def from_candidate(candidate: np.ndarray) -> tuple[dict[int, float | np.ndarray], float | np.ndarray]:
+    """Angles and beta of a candidate, or of every candidate along the leading axes."""
+    candidate = np.asarray(candidate)
+    return {setting: candidate[..., k] for k, setting in enumerate(SETTINGS)}, candidate[..., len(SETTINGS)]
+
+
+def exact_objective(inequality: str = "lf", visibility: float = 1.0) -> Objective:
+    """Exact value of an inequality, evaluated for all candidates at once."""
+    k = INEQUALITIES.index(inequality)
+
+    def objective(candidates: np.ndarray) -> np.ndarray:
+        angles, beta = from_candidate(candidates)
+        return compute_inequality_tensor(exact_probability_tensor(angles, beta, visibility))[..., k]
+
+    return objective
+
+
+def noisy_objective(
+    backend: Backend,
+    noise_model: NoiseModel | None,
+    shots: int,
+    charlie_size: int,
+    debbie_size: int,
+    inequality: str = "lf",
+    seed: int | None = None,
+) -> Objective:
+    """Sampled value of an inequality on a (noisy) backend.
+
+    The nine setting templates are transpiled once, every candidate is bound to them, and all
+    circuits of a batch go out as a single job. Successive calls use successive seeds. The best
+    of many sampled values is biased upwards by shot noise, so re-evaluate the optimum with
+    fresh shots before quoting it.
+    """
+    k = INEQUALITIES.index(inequality)
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    calls = itertools.count()
+
+    def objective(candidates: np.ndarray) -> np.ndarray:
+        templates = [
+            transpiled_template(alice_setting, bob_setting, charlie_size, debbie_size, backend, noise_model)
+            for alice_setting, bob_setting in settings
+        ]
+        circuits = []
+        for candidate in candidates:
+            angles, beta = from_candidate(candidate)
+            angles = {setting: float(angle) for setting, angle in angles.items()}
+            circuits.extend(bind_template(template, angles, float(beta)) for template in templates)
+
+        run_seed = seed + next(calls) if seed is not None else None
+        all_counts = execute_circuits(circuits, backend, noise_model, shots, transpiled=True, seed=run_seed)
+
+        probabilities = np.empty((len(candidates), len(SETTINGS), len(SETTINGS), 4))
+        for i in range(len(candidates)):
+            counts = ExperimentCounts()
+            for (alice_setting, bob_setting), setting_counts in zip(
+                settings, all_counts[i * len(settings):(i + 1) * len(settings)]
+            ):
+                counts.add(alice_setting, bob_setting, setting_counts)
+            probabilities[i] = counts.normalize()
+        return compute_inequality_tensor(probabilities)[..., k]
+
+    return objective
+
+
+@dataclass
+class OptimizationResult:
+    """Best candidate found and the best value of every iteration."""
+    angles: dict[int, float]
+    beta: float
+    value: float
+    history: list[float] = field(default_factory=list)
+    evaluations: int = 0
+
+
+def maximize(
+    objective: Objective,
+    initial: np.ndarray | None = None,
+    step: float = 0.5,
+    population: int = 32,
+    elite: int = 8,
+    iterations: int = 60,
+    tolerance: float = 1e-6,
+    seed: int | None = None,
+) -> OptimizationResult:
+    """Maximize an objective with a gradient-free, batched evolution strategy.
+
+    Every iteration samples `population` candidates around the current mean with spread `step`,
+    evaluates them in one batch and moves the mean to the average of the `elite` best. The spread
+    follows the spread of the elite, so it shrinks as the search converges; the search stops
+    when it drops below `tolerance`. It starts from `config.ANGLES` and `config.BETA` by default.
+    """
+    rng = np.random.default_rng(seed)
+    mean = to_candidate(ANGLES, BETA) if initial is None else np.asarray(initial, dtype=float)
+    spread = np.full(mean.shape, step)
+
+    best_candidate = mean
+    best_value = float(objective(mean[None])[0])
+    history = [best_value]
+    evaluations = 1
+    for _ in range(iterations):
+        candidates = mean + spread * rng.standard_normal((population, mean.size))
+        values = objective(candidates)
+        evaluations += population
+
+        order = np.argsort(values)[::-1][:elite]
+        if values[order[0]] > best_value:
+            best_value = float(values[order[0]])
+            best_candidate = candidates[order[0]]
+        history.append(best_value)
+
+        mean = candidates[order].mean(axis=0)
+        spread = np.maximum(candidates[order].std(axis=0), tolerance / 10)
+        if np.all(spread < tolerance):
+            break
+
+    angles, beta = from_candidate(best_candidate)
+    return OptimizationResult(
+        angles={setting: float(angle) for setting, angle in angles.items()},
+        beta=float(beta),
+        value=best_value,
+        history=history,
+        evaluations=evaluations,
+    )
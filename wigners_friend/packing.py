@@ -0,0 +1,155 @@
+"""Multi-programming: several independent EWFS instances in one device circuit.
+
+A single EWFS circuit with small friends uses only a few qubits of a device, so the instances of
+a run (the nine setting pairs, optionally replicated) are placed side by side on disjoint,
+connected qubit sets of the coupling map and run as one circuit. Instance `k` writes its two
+measured bits to classical bits `MEAS_SIZE * k` and `MEAS_SIZE * k + 1`, so every shot of the
+packed circuit is one shot of every instance, and the counts are split per instance afterwards.
+"""
+import itertools
+from collections import Counter
+
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister, transpile
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.backends import coupling_edges, num_qubits
+from wigners_friend.config import MEAS_SIZE, SETTINGS, SYS_SIZE
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.observer import Observer
+from wigners_friend.utils import execute_circuits
+
+
+# Widest packed circuit on a backend without a coupling map. A simulator's cost grows
+# exponentially with the width of a circuit, so packing only pays off while it stays small.
+SIMULATOR_MAX_PACKED_QUBITS = 12
+
+
+def instance_layouts(
+    backend: Backend, instance_size: int, max_instances: int | None = None
+) -> list[list[int]]:
+    """Disjoint sets of physical qubits for as many instances as fit on the backend.
+
+    Each set is grown breadth-first from its first qubit over unused neighbours, so the qubits of
+    an instance are connected and the first two (Alice and Bob) are adjacent. Without a coupling
+    map, instances take consecutive qubits, and unless `max_instances` says otherwise only as
+    many as fit in `SIMULATOR_MAX_PACKED_QUBITS` (and at least one).
+    """
+    total = num_qubits(backend)
+    limit = total // instance_size if max_instances is None else min(max_instances, total // instance_size)
+    edges = coupling_edges(backend)
+    if edges is None:
+        if max_instances is None:
+            limit = min(limit, max(1, SIMULATOR_MAX_PACKED_QUBITS // instance_size))
+        return [list(range(k * instance_size, (k + 1) * instance_size)) for k in range(limit)]
+
+    neighbours = {qubit: set() for qubit in range(total)}
+    for a, b in edges:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+
+    used = set()
+    layouts = []
+    for start in range(total):
+        if len(layouts) == limit:
+            break
+        if start in used:
+            continue
+        layout = [start]
+        frontier = [start]
+        while frontier and len(layout) < instance_size:
+            qubit = frontier.pop(0)
+            for neighbour in sorted(neighbours[qubit] - used - set(layout)):
+                if len(layout) == instance_size:
+                    break
+                layout.append(neighbour)
+                frontier.append(neighbour)
+        if len(layout) == instance_size:
+            layouts.append(layout)
+            used.update(layout)
+    return layouts
+
+
+def pack_circuits(circuits: list[QuantumCircuit]) -> QuantumCircuit:
+    """Place circuits on consecutive qubits and classical bits of one circuit."""
+    packed = QuantumCircuit(
+        QuantumRegister(sum(circuit.num_qubits for circuit in circuits), name="q"),
+        ClassicalRegister(sum(circuit.num_clbits for circuit in circuits), name="Measurement"),
+    )
+    qubit = 0
+    clbit = 0
+    for circuit in circuits:
+        packed.compose(
+            circuit,
+            qubits=range(qubit, qubit + circuit.num_qubits),
+            clbits=range(clbit, clbit + circuit.num_clbits),
+            inplace=True,
+        )
+        qubit += circuit.num_qubits
+        clbit += circuit.num_clbits
+    return packed
+
+
+def unpack_counts(counts: dict[str, int], instances: int) -> list[dict[str, int]]:
+    """Split the counts of a packed circuit into per-instance counts keyed in classical bit order."""
+    unpacked = [Counter() for _ in range(instances)]
+    for key, value in counts.items():
+        # Qiskit keys are big-endian, so reverse them to put the first instance first.
+        bits = key.replace(" ", "")[::-1]
+        for k in range(instances):
+            unpacked[k][bits[MEAS_SIZE * k:MEAS_SIZE * (k + 1)]] += value
+    return [dict(instance_counts) for instance_counts in unpacked]
+
+
+def generate_packed_experiments(
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    replicas: int = 1,
+    max_instances: int | None = None,
+    seed: int | None = None,
+) -> dict[tuple[Observer, Observer], dict[str, float]]:
+    """Probabilities for all combinations of experimental settings from packed circuits.
+
+    Every setting pair is run `replicas` times, and the instances are packed onto at most
+    `max_instances` disjoint qubit sets per circuit. All packed circuits go out as one job, and
+    the counts of the replicas of a setting pair are merged, giving `replicas * shots` shots.
+    """
+    instance_size = SYS_SIZE + charlie_size + debbie_size
+    layouts = instance_layouts(backend, instance_size, max_instances)
+    if not layouts:
+        raise ValueError(f"Instances of {instance_size} qubits do not fit on the backend.")
+
+    settings = [pair for pair in itertools.product(SETTINGS, repeat=2) for _ in range(replicas)]
+    groups = [settings[i:i + len(layouts)] for i in range(0, len(settings), len(layouts))]
+    circuits = []
+    for group in groups:
+        packed = pack_circuits(
+            [
+                ewfs(alice_setting, bob_setting, angles, beta, charlie_size, debbie_size)
+                for alice_setting, bob_setting in group
+            ]
+        )
+        circuits.append(
+            transpile(
+                packed,
+                backend=backend,
+                basis_gates=noise_model.basis_gates if noise_model is not None else None,
+                initial_layout=list(itertools.chain.from_iterable(layouts[:len(group)])),
+                seed_transpiler=seed,
+            )
+        )
+    all_counts = execute_circuits(circuits, backend, noise_model, shots, transpiled=True, seed=seed)
+
+    merged = {pair: Counter() for pair in itertools.product(SETTINGS, repeat=2)}
+    for group, counts in zip(groups, all_counts):
+        for pair, instance_counts in zip(group, unpack_counts(counts, len(group))):
+            merged[pair].update(instance_counts)
+    return {
+        pair: {key: value / (replicas * shots) for key, value in sorted(counts.items())}
+        for pair, counts in merged.items()
+    }
@@ -0,0 +1,220 @@
+"""Asynchronous, checkpointed submission of EWFS circuits.
+
+Every circuit of a sweep is submitted at once and the jobs are polled without blocking, so
+queue times overlap. Job IDs and finished counts are written to a JSON checkpoint as they come
+in. Rerunning with the same checkpoint skips finished circuits and, given a `retrieve_job`
+callable such as `QiskitRuntimeService.job`, picks up jobs that were submitted before the
+process stopped instead of submitting them again. The checkpoint records a fingerprint of the
+run (backend, noise model, shots and what the circuits were built from), and a checkpoint
+written for a different run is refused rather than mixed into the results.
+"""
+import asyncio
+import itertools
+import json
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+from qiskit import QuantumCircuit, transpile
+from qiskit.providers import Backend, JobStatus, JobV1
+from qiskit.providers.jobstatus import JOB_FINAL_STATES
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.backends import backend_name
+from wigners_friend.config import SETTINGS
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.observer import Observer
+from wigners_friend.store import circuit_fingerprint, noise_fingerprint
+from wigners_friend.utils import reverse_keys, run_options
+
+
+class Checkpoint:
+    """Job IDs and finished counts of labelled circuits of one run, kept in a JSON file.
+
+    `fingerprint` describes the run. An existing file whose fingerprint differs raises a
+    ValueError, since its job IDs and counts belong to another run.
+    """
+
+    def __init__(self, path: str | os.PathLike, fingerprint: dict):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.job_ids: dict[str, str] = {}
+        self.counts: dict[str, dict[str, int]] = {}
+        if self.path.exists():
+            checkpoint = json.loads(self.path.read_text())
+            if checkpoint.get("fingerprint") != fingerprint:
+                raise ValueError(
+                    f"Checkpoint {self.path} was written for a different run. "
+                    "Use another checkpoint path or delete the file."
+                )
+            self.job_ids = checkpoint["job_ids"]
+            self.counts = checkpoint["counts"]
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        tmp_path = self.path.with_suffix(".tmp")
+        checkpoint = {"fingerprint": self.fingerprint, "job_ids": self.job_ids, "counts": self.counts}
+        tmp_path.write_text(json.dumps(checkpoint, indent=2))
+        os.replace(tmp_path, self.path)
+
+
+def run_fingerprint(backend: Backend, noise_model: NoiseModel | None, shots: int, **description) -> dict:
+    """Fingerprint of a run of `shots` shots per circuit, plus whatever built the circuits."""
+    return {
+        "backend": backend_name(backend),
+        "noise_model": noise_fingerprint(noise_model),
+        "shots": shots,
+        **description,
+    }
+
+
+def _submit(circuit: QuantumCircuit, backend: Backend, noise_model: NoiseModel, shots: int) -> JobV1:
+    transpiled = transpile(
+        circuit,
+        backend=backend,
+        basis_gates=noise_model.basis_gates if noise_model is not None else None,
+    )
+    return backend.run(transpiled, **run_options(backend, noise_model, shots))
+
+
+async def _run_circuit(
+    label: str,
+    circuit: QuantumCircuit,
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    checkpoint: Checkpoint,
+    poll_interval: float,
+    retrieve_job: Callable[[str], JobV1] | None,
+):
+    if label in checkpoint.counts:
+        return
+
+    job = None
+    if label in checkpoint.job_ids and retrieve_job is not None:
+        try:
+            job = await asyncio.to_thread(retrieve_job, checkpoint.job_ids[label])
+        except Exception:
+            # The job is gone (e.g. a local simulator job), so submit the circuit again.
+            job = None
+    if job is None:
+        job = await asyncio.to_thread(_submit, circuit, backend, noise_model, shots)
+        checkpoint.job_ids[label] = job.job_id()
+        checkpoint.save()
+
+    status = await asyncio.to_thread(job.status)
+    while status not in JOB_FINAL_STATES:
+        await asyncio.sleep(poll_interval)
+        status = await asyncio.to_thread(job.status)
+
+    if status is not JobStatus.DONE:
+        del checkpoint.job_ids[label]
+        checkpoint.save()
+        raise RuntimeError(f"Job {job.job_id()} for circuit {label} ended with status {status.name}.")
+
+    result = await asyncio.to_thread(job.result)
+    checkpoint.counts[label] = result.get_counts()
+    checkpoint.save()
+
+
+async def run_circuits_async(
+    circuits: dict[str, QuantumCircuit],
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    checkpoint_path: str | os.PathLike,
+    poll_interval: float = 1.0,
+    retrieve_job: Callable[[str], JobV1] | None = None,
+    description: dict | None = None,
+) -> dict[str, dict[str, int]]:
+    """Run labelled circuits concurrently and return their Qiskit counts by label.
+
+    `description` says what the circuits were built from and goes into the checkpoint's
+    fingerprint along with the backend, noise model and shots.
+    """
+    checkpoint = Checkpoint(
+        checkpoint_path, run_fingerprint(backend, noise_model, shots, **(description or {}))
+    )
+    await asyncio.gather(
+        *(
+            _run_circuit(
+                label, circuit, backend, noise_model, shots, checkpoint, poll_interval, retrieve_job
+            )
+            for label, circuit in circuits.items()
+        )
+    )
+    return {label: checkpoint.counts[label] for label in circuits}
+
+
+def _label(charlie_size: int, debbie_size: int, alice_setting: int, bob_setting: int) -> str:
+    return f"{charlie_size}-{debbie_size}/{alice_setting}-{bob_setting}"
+
+
+async def run_experiments_async(
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    friend_sizes: list[tuple[int, int]],
+    checkpoint_path: str | os.PathLike,
+    poll_interval: float = 1.0,
+    retrieve_job: Callable[[str], JobV1] | None = None,
+) -> dict[tuple[int, int], dict[tuple[Observer, Observer], dict[str, float]]]:
+    """Probabilities of all settings for every (charlie_size, debbie_size) in `friend_sizes`."""
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    circuits = {
+        _label(charlie_size, debbie_size, alice_setting, bob_setting): ewfs(
+            alice_setting=alice_setting,
+            bob_setting=bob_setting,
+            angles=angles,
+            beta=beta,
+            charlie_size=charlie_size,
+            debbie_size=debbie_size,
+        )
+        for charlie_size, debbie_size in friend_sizes
+        for alice_setting, bob_setting in settings
+    }
+    description = {
+        "circuits": {
+            f"{charlie_size}-{debbie_size}": circuit_fingerprint(charlie_size, debbie_size)
+            for charlie_size, debbie_size in friend_sizes
+        },
+        "angles": {str(setting): float(angles[setting]) for setting in SETTINGS},
+        "beta": float(beta),
+    }
+    counts = await run_circuits_async(
+        circuits, backend, noise_model, shots, checkpoint_path, poll_interval, retrieve_job, description
+    )
+
+    results = {}
+    for charlie_size, debbie_size in friend_sizes:
+        results[(charlie_size, debbie_size)] = {}
+        for alice_setting, bob_setting in settings:
+            setting_counts = reverse_keys(counts[_label(charlie_size, debbie_size, alice_setting, bob_setting)])
+            total = sum(setting_counts.values())
+            results[(charlie_size, debbie_size)][(alice_setting, bob_setting)] = {
+                key: value / total for key, value in setting_counts.items()
+            }
+    return results
+
+
+def run_experiments_checkpointed(
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    friend_sizes: list[tuple[int, int]],
+    checkpoint_path: str | os.PathLike,
+    poll_interval: float = 1.0,
+    retrieve_job: Callable[[str], JobV1] | None = None,
+) -> dict[tuple[int, int], dict[tuple[Observer, Observer], dict[str, float]]]:
+    """Blocking version of `run_experiments_async`."""
+    return asyncio.run(
+        run_experiments_async(
+            backend, noise_model, shots, angles, beta, friend_sizes, checkpoint_path,
+            poll_interval, retrieve_job,
+        )
+    )
+
@@ -1,20 +1,52 @@
-import matplotlib.pyplot as plt
+"""Plots of the inequality values; matplotlib is imported when a plot is drawn."""
 
 
-def plot_friend_size_vs_violation(friend_sizes: list[int], violations: dict[str, float], shots: int):
+INEQUALITY_STYLES = {
+    "lf": ("o", "LF"),
+    "I3322": ("s", "I3322"),
+    "brukner": ("^", "Brukner"),
+    "semi_brukner": ("*", "Semi-brukner"),
+    "bell_non_lf": ("H", "Bell non-LF"),
+}
+
+
+def plot_inequalities(xs: list[float], violations: list[dict[str, float]], intervals: list[dict] | None = None):
+    """Plot every inequality against `xs`.
+
+    `intervals` holds one `bootstrap_inequalities` result per point, whose confidence
+    intervals are drawn as error bars.
+    """
+    import matplotlib.pyplot as plt
+
     keys_values = {}
     for d in violations:
         for key, value in d.items():
             keys_values.setdefault(key, []).append(value)
 
-    plt.plot(friend_sizes, keys_values["lf"], marker="o", label="LF")
-    plt.plot(friend_sizes, keys_values["I3322"], marker="s", label="I3322")
-    plt.plot(friend_sizes, keys_values["brukner"], marker="^", label="Brukner")
-    plt.plot(friend_sizes, keys_values["semi_brukner"], marker="*", label="Semi-brukner")
-    plt.plot(friend_sizes, keys_values["bell_non_lf"], marker="H", label="Bell non-LF")
+    for key, (marker, label) in INEQUALITY_STYLES.items():
+        values = keys_values[key]
+        if intervals is None:
+            plt.plot(xs, values, marker=marker, label=label)
+        else:
+            yerr = [
+                [value - interval[key]["low"] for value, interval in zip(values, intervals)],
+                [interval[key]["high"] - value for value, interval in zip(values, intervals)],
+            ]
+            plt.errorbar(xs, values, yerr=yerr, marker=marker, label=label, capsize=3)
 
     plt.axhline(y=0.0, color="r", linestyle="--", label="Violation threshold")
 
+
+def plot_friend_size_vs_violation(
+    friend_sizes: list[int],
+    violations: dict[str, float],
+    shots: int,
+    intervals: list[dict] | None = None,
+):
+    import matplotlib.pyplot as plt
+
+    plot_inequalities(friend_sizes, violations, intervals)
+
     plt.xlabel("Friend size (qubits)")
     plt.ylabel("LHS inequality value")
     plt.title(f"Friend size vs. inequality value (IBM (Fake) Kolkata) w/{shots} shots")
@@ -27,24 +59,16 @@ def plot_noise_levels_vs_violation(
     noise_levels: list[float],
     violations: dict[str, float],
     shots: int,
-    friend_size: int
+    friend_size: int,
+    intervals: list[dict] | None = None,
 ):
-    keys_values = {}
-    for d in violations:
-        for key, value in d.items():
-            keys_values.setdefault(key, []).append(value)
-
-    plt.plot(noise_levels, keys_values["lf"], marker="o", label="LF")
-    plt.plot(noise_levels, keys_values["I3322"], marker="s", label="I3322")
-    plt.plot(noise_levels, keys_values["brukner"], marker="^", label="Brukner")
-    plt.plot(noise_levels, keys_values["semi_brukner"], marker="*", label="Semi-brukner")
-    plt.plot(noise_levels, keys_values["bell_non_lf"], marker="H", label="Bell non-LF")
+    import matplotlib.pyplot as plt
 
-    plt.axhline(y=0.0, color="r", linestyle="--", label="Violation threshold")
+    plot_inequalities(noise_levels, violations, intervals)
 
     plt.xlabel("Depolarizing noise level")
     plt.ylabel("LHS inequality value")
     plt.title(f"Noise level vs. inequality value (shots={shots} / friend_size={friend_size})")
     plt.xticks(noise_levels)
     plt.legend()
-    plt.show()
\ No newline at end of file
+    plt.show()
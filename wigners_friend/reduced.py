@@ -0,0 +1,111 @@
+"""Reduced-model simulator for EWFS circuits with arbitrarily large friend registers.
+
+The friend registers are CNOT copies of the observers' Z values, so instead of simulating
+them qubit by qubit the simulator tracks the two-qubit core (Alice and Bob) and treats each
+friend register as classical copies that pick up independent per-qubit noise:
+
+* A depolarizing error of strength p on a friend qubit (I with probability 1 - 3p/4, X, Y
+  and Z with p/4 each) flips its copy with probability p/2 and its phase with probability
+  p/2.
+* PEEK reads out one copy, so bit flips on that copy and readout errors flip the observer's
+  recorded outcome.
+* REVERSE uncomputes the copies. Bit flips on the friend qubits drop out, but every phase
+  flip ends up as a Z on the observer, which dephases it by a factor (1 - p)^friend_size.
+* Readout errors flip every measured bit, including the observers' own.
+
+The cost is independent of the friend sizes, so thousands of friend qubits are no problem.
+"""
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
+from wigners_friend.config import PEEK, SETTINGS
+from wigners_friend.exact import final_state
+from wigners_friend.observer import Observer
+from wigners_friend.setting import Setting
+
+
+@dataclass(frozen=True)
+class FriendNoise:
+    """Per-qubit noise on the friend registers and on every measured bit."""
+    depolarizing: float = 0.0
+    readout: float = 0.0
+
+
+def _flip(probability: float, other: float) -> float:
+    """Probability that exactly one of two independent flips happens."""
+    return probability * (1 - other) + other * (1 - probability)
+
+
+def _bit_flip_matrix(probability: float) -> np.ndarray:
+    return np.array([[1 - probability, probability], [probability, 1 - probability]])
+
+
+def reduced_probabilities(
+    alice_setting: Setting,
+    bob_setting: Setting,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    noise: FriendNoise | None = None,
+) -> np.ndarray:
+    """Outcome probabilities of one setting pair, ordered "00", "01", "10", "11"."""
+    noise = noise if noise is not None else FriendNoise()
+
+    # Probability that the observer's phase is flipped by its friend's register.
+    alice_phase_flip = (1 - (1 - noise.depolarizing) ** charlie_size) / 2 if alice_setting is not PEEK else 0.0
+    bob_phase_flip = (1 - (1 - noise.depolarizing) ** debbie_size) / 2 if bob_setting is not PEEK else 0.0
+
+    probabilities = np.zeros((2, 2))
+    for alice_flip, bob_flip in itertools.product([False, True], repeat=2):
+        weight = (alice_phase_flip if alice_flip else 1 - alice_phase_flip) * (
+            bob_phase_flip if bob_flip else 1 - bob_phase_flip
+        )
+        if weight == 0:
+            continue
+        state = final_state(alice_setting, bob_setting, angles, beta, alice_flip, bob_flip)
+        probabilities += weight * np.abs(state) ** 2
+
+    # Probability that each observer's recorded bit is flipped.
+    copy_flip = noise.depolarizing / 2
+    alice_bit_flip = _flip(copy_flip, noise.readout) if alice_setting is PEEK else noise.readout
+    bob_bit_flip = _flip(copy_flip, noise.readout) if bob_setting is PEEK else noise.readout
+    probabilities = _bit_flip_matrix(alice_bit_flip) @ probabilities @ _bit_flip_matrix(bob_bit_flip).T
+    return probabilities.reshape(4)
+
+
+def generate_reduced_experiments(
+    noise_model: FriendNoise | None,
+    shots: int | None,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    seed: int | None = None,
+) -> dict[tuple[Observer, Observer], dict[str, float]]:
+    """Probabilities for all combinations of experimental settings from the reduced model.
+
+    Takes the arguments of `generate_all_experiments` except for the backend. With `shots`,
+    the probabilities are estimated from multinomial samples, otherwise they are exact.
+    """
+    if charlie_size < 1 or debbie_size < 1:
+        raise ValueError("Friend sizes must be at least one qubit.")
+    rng = np.random.default_rng(seed)
+
+    results = {}
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        probabilities = reduced_probabilities(
+            alice_setting, bob_setting, angles, beta, charlie_size, debbie_size, noise_model
+        )
+        if shots is None:
+            results[(alice_setting, bob_setting)] = {
+                f"{outcome:02b}": float(probability) for outcome, probability in enumerate(probabilities)
+            }
+        else:
+            counts = rng.multinomial(shots, probabilities)
+            results[(alice_setting, bob_setting)] = {
+                f"{outcome:02b}": count / shots for outcome, count in enumerate(counts) if count
+            }
+    return results
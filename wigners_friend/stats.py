@@ -1,12 +1,181 @@
+import numpy as np
+
 from wigners_friend.config import (
     ALICE, BOB,
     PEEK, REVERSE_1, REVERSE_2,
     SETTINGS,
 )
+from wigners_friend.counts import ExperimentCounts
 from wigners_friend.setting import Setting
 from wigners_friend.observer import Observer
 
 
+# Outcomes of Alice and Bob, indexed by `2 * alice_bit + bob_bit`.
+OUTCOMES = ["00", "01", "10", "11"]
+
+# Names of the inequalities returned by `compute_inequalities`, in the order of the last axis
+# of `compute_inequality_tensor`.
+INEQUALITIES = ["lf", "I3322", "brukner", "semi_brukner", "bell_non_lf"]
+
+# Signs of the outcome probabilities in <A>, <B> and <AB>.
+ALICE_SIGNS = np.array([1, 1, -1, -1])
+BOB_SIGNS = np.array([1, -1, 1, -1])
+PRODUCT_SIGNS = ALICE_SIGNS * BOB_SIGNS
+
+# Each inequality as coefficients of <A_i>, <B_j> and <A_i B_j> (indexed by setting) plus a
+# constant term, where [1] is arXiv:1907.05607.
+INEQUALITY_TERMS = {
+    # Eq. (13) from [1].
+    "lf": (
+        {PEEK: -1, REVERSE_1: -1},
+        {PEEK: -1, REVERSE_1: -1},
+        {
+            (PEEK, PEEK): -1, (PEEK, REVERSE_1): -2, (REVERSE_1, PEEK): -2,
+            (REVERSE_1, REVERSE_1): 2, (REVERSE_1, REVERSE_2): -1, (REVERSE_2, REVERSE_1): -1,
+            (REVERSE_2, REVERSE_2): -1,
+        },
+        -6,
+    ),
+    # Eq. (15) from [1].
+    "I3322": (
+        {PEEK: -1, REVERSE_1: 1},
+        {PEEK: 1, REVERSE_1: -1},
+        {
+            (PEEK, PEEK): 1, (PEEK, REVERSE_1): -1, (PEEK, REVERSE_2): -1,
+            (REVERSE_1, PEEK): -1, (REVERSE_1, REVERSE_1): 1, (REVERSE_1, REVERSE_2): -1,
+            (REVERSE_2, PEEK): -1, (REVERSE_2, REVERSE_1): -1,
+        },
+        -4,
+    ),
+    # Eq. (17) from [1].
+    "brukner": (
+        {},
+        {},
+        {(PEEK, PEEK): 1, (PEEK, REVERSE_2): -1, (REVERSE_1, PEEK): -1, (REVERSE_1, REVERSE_2): -1},
+        -2,
+    ),
+    # Eq. (18) from [1].
+    "semi_brukner": (
+        {},
+        {},
+        {
+            (PEEK, REVERSE_1): -1, (PEEK, REVERSE_2): 1, (REVERSE_2, REVERSE_1): -1,
+            (REVERSE_2, REVERSE_2): -1,
+        },
+        -2,
+    ),
+    # Eq. (22) from [1].
+    "bell_non_lf": (
+        {},
+        {},
+        {
+            (REVERSE_1, REVERSE_1): 1, (REVERSE_1, REVERSE_2): -1, (REVERSE_2, REVERSE_1): -1,
+            (REVERSE_2, REVERSE_2): -1,
+        },
+        -2,
+    ),
+}
+
+
+def inequality_coefficients() -> tuple[np.ndarray, np.ndarray]:
+    """Coefficient matrix (settings * settings * 4, inequalities) and offsets (inequalities,).
+
+    Single expectation values are averaged over the other observer's settings, as in
+    `single_expect`.
+    """
+    size = len(SETTINGS)
+    matrix = np.zeros((size, size, len(OUTCOMES), len(INEQUALITIES)))
+    offsets = np.zeros(len(INEQUALITIES))
+    for k, name in enumerate(INEQUALITIES):
+        alice_terms, bob_terms, product_terms, constant = INEQUALITY_TERMS[name]
+        for setting, coefficient in alice_terms.items():
+            matrix[SETTINGS.index(setting), :, :, k] += coefficient * ALICE_SIGNS / size
+        for setting, coefficient in bob_terms.items():
+            matrix[:, SETTINGS.index(setting), :, k] += coefficient * BOB_SIGNS / size
+        for (alice_setting, bob_setting), coefficient in product_terms.items():
+            matrix[SETTINGS.index(alice_setting), SETTINGS.index(bob_setting), :, k] += (
+                coefficient * PRODUCT_SIGNS
+            )
+        offsets[k] = constant
+    return matrix.reshape(-1, len(INEQUALITIES)), offsets
+
+
+INEQUALITY_MATRIX, INEQUALITY_OFFSETS = inequality_coefficients()
+
+
+def results_to_tensor(results: dict | ExperimentCounts) -> np.ndarray:
+    """Convert a results dict or `ExperimentCounts` to a (settings, settings, 4) probability tensor."""
+    if isinstance(results, ExperimentCounts):
+        return results.normalize()
+    tensor = np.zeros((len(SETTINGS), len(SETTINGS), len(OUTCOMES)))
+    for (alice_setting, bob_setting), probs in results.items():
+        i, j = SETTINGS.index(alice_setting), SETTINGS.index(bob_setting)
+        for outcome, key in enumerate(OUTCOMES):
+            tensor[i, j, outcome] = probs.get(key, 0)
+    return tensor
+
+
+def tensor_to_results(tensor: np.ndarray) -> dict:
+    """Convert a (settings, settings, 4) probability tensor to a results dict."""
+    return {
+        (alice_setting, bob_setting): {
+            key: float(tensor[i, j, outcome]) for outcome, key in enumerate(OUTCOMES)
+        }
+        for i, alice_setting in enumerate(SETTINGS)
+        for j, bob_setting in enumerate(SETTINGS)
+    }
+
+
+def compute_inequality_tensor(probabilities: np.ndarray) -> np.ndarray:
+    """Evaluate all inequalities on a (..., settings, settings, 4) probability tensor.
+
+    Any leading batch axes are kept, and the last axis follows the order of `INEQUALITIES`.
+    """
+    probabilities = np.asarray(probabilities)
+    flat = probabilities.reshape(probabilities.shape[:-3] + (-1,))
+    return flat @ INEQUALITY_MATRIX + INEQUALITY_OFFSETS
+
+
+def bootstrap_inequalities(
+    counts: np.ndarray,
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> dict[str, dict[str, np.ndarray]]:
+    """Bootstrap confidence intervals and p-values of all inequalities.
+
+    `counts` has shape (..., settings, settings, 4). Every setting pair is resampled from a
+    multinomial with its own shots and observed frequencies, for all replicates at once.
+    `p_value` is one-sided, for the null hypothesis that the inequality is not violated
+    (value <= 0): the replicates are shifted to be centred on 0, the boundary of the null, and
+    the p-value is the (add-one smoothed) fraction of them at or above the estimate.
+    `fraction_nonpositive` is the fraction of the unshifted replicates with a value <= 0.
+    Leading batch axes of `counts` carry over to the returned arrays.
+    """
+    counts = np.asarray(counts)
+    shots = counts.sum(axis=-1)
+    probabilities = counts / shots[..., None]
+
+    rng = np.random.default_rng(seed)
+    replicates = rng.multinomial(shots, probabilities, size=(resamples,) + shots.shape)
+    values = compute_inequality_tensor(replicates / shots[..., None])
+
+    estimate = compute_inequality_tensor(probabilities)
+    low, high = np.quantile(values, [(1 - confidence) / 2, (1 + confidence) / 2], axis=0)
+    p_value = (np.sum(values - estimate >= estimate, axis=0) + 1) / (resamples + 1)
+    fraction_nonpositive = (np.sum(values <= 0, axis=0) + 1) / (resamples + 1)
+    return {
+        name: {
+            "value": estimate[..., k],
+            "low": low[..., k],
+            "high": high[..., k],
+            "p_value": p_value[..., k],
+            "fraction_nonpositive": fraction_nonpositive[..., k],
+        }
+        for k, name in enumerate(INEQUALITIES)
+    }
+
+
 def single_expect(observer: Observer, setting: Setting, results: dict) -> dict[str, float]:
     """Compute single expectation values for either Alice or Bob."""
     if observer is ALICE:
@@ -49,57 +218,39 @@ def double_expect(settings: list[Setting], results: dict) -> float:
     )    
 
 
-def compute_inequalities(results: dict, verbose: bool = False) -> dict[str, float]:
-    A1 = single_expect(ALICE, PEEK, results)
-    B1 = single_expect(BOB, PEEK, results)
-
-    A2 = single_expect(ALICE, REVERSE_1, results)
-    B2 = single_expect(BOB, REVERSE_1, results)
+def compute_inequalities(results: dict | ExperimentCounts, verbose: bool = False) -> dict[str, float]:
+    """Evaluate the LF, I3322, Brukner, semi-Brukner and Bell non-LF inequalities.
 
-    A3 = single_expect(ALICE, REVERSE_2, results)
-    B3 = single_expect(BOB, REVERSE_2, results)
+    With `verbose`, the values are printed. Given counts, an inequality is reported as violated
+    when the lower end of its 95% bootstrap interval is above zero. Probabilities alone carry
+    no shot noise, so for them the verdict is the sign of the estimate.
+    """
+    values = compute_inequality_tensor(results_to_tensor(results))
+    lf, I3322, brukner, semi_brukner, bell_non_lf = (float(value) for value in values)
 
-    A1B1 = double_expect((PEEK, PEEK), results)
-    A1B2 = double_expect((PEEK, REVERSE_1), results)
-    A1B3 = double_expect((PEEK, REVERSE_2), results)
-
-    A2B1 = double_expect((REVERSE_1, PEEK), results)
-    A2B2 = double_expect((REVERSE_1, REVERSE_1), results)
-    A2B3 = double_expect((REVERSE_1, REVERSE_2), results)
-
-    A3B1 = double_expect((REVERSE_2, PEEK), results)
-    A3B2 = double_expect((REVERSE_2, REVERSE_1), results)
-    A3B3 = double_expect((REVERSE_2, REVERSE_2), results)
-    
-    # Local-friendliness inequalities:
-    # Eq. (13) from [1].
-    lf = -A1 - A2 - B1 - B2 - A1B1 - 2*A1B2 - 2*A2B1 + 2*A2B2 - A2B3 - A3B2 - A3B3 - 6
-    # Eq. (15) from [1].
-    I3322 = -A1 + A2 + B1 - B2 + A1B1 - A1B2 - A1B3 - A2B1 + A2B2 - A2B3 - A3B1 - A3B2 - 4 
-
-    # Brukner inequalities:
-    # Eq. (17) from [1].
-    brukner = A1B1 - A1B3 - A2B1 - A2B3 - 2
-    # Eq. (18) from [1].
-    semi_brukner = -A1B2 + A1B3 - A3B2 - A3B3 - 2
-
-    # Bell non-LF 
-    # Eq. (22) from [1].
-    bell_non_lf = A2B2 - A2B3 - A3B2 - A3B3 - 2
-    
     if verbose:
+        intervals = None
+        if isinstance(results, ExperimentCounts):
+            intervals = bootstrap_inequalities(results.counts, seed=0)
         print("******Inequalities******")
-        print(f"{semi_brukner=} -- is violated: {semi_brukner > 0}")
-        print(f"{brukner=} -- is violated: {brukner > 0}")
-        print(f"{lf=} -- is violated: {lf > 0}")
-        print(f"{I3322=} -- is_violated: {I3322 > 0}")
-        print(f"{bell_non_lf=} -- is_violated: {bell_non_lf > 0}")
+        for name, value in [
+            ("semi_brukner", semi_brukner),
+            ("brukner", brukner),
+            ("lf", lf),
+            ("I3322", I3322),
+            ("bell_non_lf", bell_non_lf),
+        ]:
+            if intervals is None:
+                print(f"{name}={value} -- is violated: {value > 0}")
+            else:
+                low, high = float(intervals[name]["low"]), float(intervals[name]["high"])
+                print(f"{name}={value} -- 95% interval [{low:.4f}, {high:.4f}], is violated: {low > 0}")
         print("**************************")
-        
+
     return {
         "lf": lf,
         "I3322": I3322,
         "brukner": brukner,
         "semi_brukner": semi_brukner,
         "bell_non_lf": bell_non_lf,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,204 @@
+"""Content-addressed on-disk store of experiment counts.
+
+Each entry is keyed by a hash of everything that determines the distribution of the counts:
+the circuit structure, angles, beta, friend sizes, fan-out, backend name, noise model, seed
+and how the circuits are compiled and submitted. The counts are kept as a (settings,
+settings, 4) int64 array in a `.npy` file, which is memory mapped when read, next to a
+`.json` file describing the entry. Qiskit is only imported
+to describe or run experiments, so reading stored counts stays cheap.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from wigners_friend.config import SETTINGS
+from wigners_friend.fan_out import FanOut
+from wigners_friend.observer import Observer
+from wigners_friend.stats import results_to_tensor, tensor_to_results
+
+if TYPE_CHECKING:
+    from qiskit.providers import Backend
+    from qiskit_aer.noise import NoiseModel
+
+    from wigners_friend.instrumentation import RunMetadata
+
+
+@functools.lru_cache(maxsize=None)
+def circuit_fingerprint(charlie_size: int, debbie_size: int, fan_out: FanOut = FanOut.LADDER) -> str:
+    """Hash of the EWFS circuits of every setting pair and PEEK offset, for the given sizes.
+
+    The circuits are the parameterized templates, so the hash leaves out the angles and beta,
+    and it only changes when the gates of a circuit do, not with edits to the source.
+    """
+    from wigners_friend.ensemble import peek_variants
+    from wigners_friend.templates import ewfs_template
+
+    instructions = []
+    for alice_setting, bob_setting in itertools.product(SETTINGS, repeat=2):
+        for offsets in peek_variants(alice_setting, bob_setting, charlie_size, debbie_size):
+            circuit = ewfs_template(alice_setting, bob_setting, charlie_size, debbie_size, fan_out, *offsets)
+            instructions.append([
+                [
+                    instruction.operation.name,
+                    [circuit.find_bit(qubit).index for qubit in instruction.qubits],
+                    [circuit.find_bit(clbit).index for clbit in instruction.clbits],
+                    [str(param) for param in instruction.operation.params],
+                ]
+                for instruction in circuit.data
+            ])
+    return hashlib.sha256(json.dumps(instructions).encode()).hexdigest()
+
+
+def noise_fingerprint(noise_model: NoiseModel | None) -> str | None:
+    """Hash of a noise model's serialized form."""
+    if noise_model is None:
+        return None
+    serialized = json.dumps(noise_model.to_dict(serializable=True), sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class ResultsStore:
+    """Counts of experiments stored on disk under `root`."""
+
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def describe(
+        backend: Backend,
+        noise_model: NoiseModel | None,
+        angles: list[float],
+        beta: float,
+        charlie_size: int,
+        debbie_size: int,
+        seed: int | None = None,
+        fan_out: FanOut = FanOut.LADDER,
+        batch: bool = False,
+        use_templates: bool = False,
+        layout: str | None = None,
+    ) -> dict:
+        """Everything that determines the distribution of an experiment's counts.
+
+        `batch`, `use_templates` and `layout` are the options of `generate_all_counts` that
+        change how the circuits are compiled and seeded, so counts run with them are kept apart.
+        """
+        from wigners_friend.backends import backend_name
+
+        return {
+            "circuit": circuit_fingerprint(charlie_size, debbie_size, fan_out),
+            "angles": {str(setting): float(angles[setting]) for setting in SETTINGS},
+            "beta": float(beta),
+            "charlie_size": charlie_size,
+            "debbie_size": debbie_size,
+            "backend": backend_name(backend),
+            "noise_model": noise_fingerprint(noise_model),
+            "seed": seed,
+            "fan_out": fan_out.value,
+            "batch": batch,
+            "use_templates": use_templates,
+            "layout": layout,
+        }
+
+    @staticmethod
+    def key(description: dict) -> str:
+        """Content address of a description."""
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.root / f"{key}.npy", self.root / f"{key}.json"
+
+    def __contains__(self, key: str) -> bool:
+        return self._paths(key)[0].exists()
+
+    def load(self, key: str) -> np.ndarray | None:
+        """Memory-mapped counts of an entry, or None if there is no such entry."""
+        counts_path, _ = self._paths(key)
+        if not counts_path.exists():
+            return None
+        return np.load(counts_path, mmap_mode="r")
+
+    def stored_shots(self, key: str) -> int:
+        """Fewest shots of any setting pair in an entry, or 0 if there is no such entry."""
+        stored = self.load(key)
+        return int(stored.sum(axis=-1).min()) if stored is not None else 0
+
+    def save(self, key: str, counts: np.ndarray, description: dict):
+        """Write the counts of an entry, replacing any previous counts atomically."""
+        counts_path, description_path = self._paths(key)
+        tmp_path = counts_path.with_suffix(".tmp.npy")
+        np.save(tmp_path, np.asarray(counts, dtype=np.int64))
+        os.replace(tmp_path, counts_path)
+        description = {**description, "shots": int(counts.sum(axis=-1).min())}
+        description_path.write_text(json.dumps(description, indent=2, sort_keys=True))
+
+    def add(self, key: str, counts: np.ndarray, description: dict):
+        """Merge counts into an entry, adding them to any counts it already holds."""
+        stored = self.load(key)
+        self.save(key, counts if stored is None else np.asarray(stored) + counts, description)
+
+    def run(
+        self,
+        backend: Backend,
+        noise_model: NoiseModel | None,
+        shots: int,
+        angles: list[float],
+        beta: float,
+        charlie_size: int,
+        debbie_size: int,
+        seed: int | None = None,
+        fan_out: FanOut = FanOut.LADDER,
+        batch: bool = False,
+        use_templates: bool = False,
+        metadata: RunMetadata | None = None,
+        layout: str | None = None,
+    ) -> tuple[dict[tuple[Observer, Observer], dict[str, float]], int]:
+        """Probabilities for all settings and the shots per setting they were estimated from.
+
+        Only the shots missing from the store are run. An entry that already holds at least
+        `shots` shots per setting is served from disk, including any extra shots it holds, so
+        the returned shot count can exceed `shots`. Otherwise only the missing shots are run and
+        merged into the entry. `batch`, `use_templates`, `layout` and `metadata` are passed to
+        `generate_all_counts`; all but `metadata` are part of the key.
+        """
+        from wigners_friend.utils import generate_all_counts
+
+        description = self.describe(
+            backend, noise_model, angles, beta, charlie_size, debbie_size, seed, fan_out,
+            batch, use_templates, layout,
+        )
+        key = self.key(description)
+
+        stored_shots = self.stored_shots(key)
+        if stored_shots < shots:
+            # Offset the seed so the extra shots are not a replay of the stored ones.
+            extra_seed = seed + stored_shots if seed is not None else None
+            extra = results_to_tensor(
+                generate_all_counts(
+                    backend=backend,
+                    noise_model=noise_model,
+                    shots=shots - stored_shots,
+                    angles=angles,
+                    beta=beta,
+                    charlie_size=charlie_size,
+                    debbie_size=debbie_size,
+                    seed=extra_seed,
+                    fan_out=fan_out,
+                    batch=batch,
+                    use_templates=use_templates,
+                    metadata=metadata,
+                    layout=layout,
+                )
+            ).astype(np.int64)
+            self.add(key, extra, description)
+
+        stored = self.load(key)
+        return tensor_to_results(stored / stored.sum(axis=-1, keepdims=True)), self.stored_shots(key)
@@ -0,0 +1,107 @@
+"""Streaming execution in fixed-size shot chunks with running inequality estimates.
+
+The nine setting circuits are transpiled once and then run again and again with at most
+`chunk_shots` shots each. Every chunk is folded into a (settings, settings, 4) histogram of
+counts and then dropped, so memory stays bounded however many shots are requested, also with
+per-shot memory enabled. After every chunk the running estimates are yielded, so a long run can
+be monitored and stopped early by breaking out of the loop.
+"""
+import itertools
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.adaptive import estimate, inequality_weights
+from wigners_friend.config import SETTINGS
+from wigners_friend.fan_out import FanOut
+from wigners_friend.stats import INEQUALITIES, compute_inequality_tensor
+from wigners_friend.templates import bind_template, transpiled_template
+from wigners_friend.utils import bitstrings_to_integers, run_options
+
+
+@dataclass
+class StreamUpdate:
+    """Running estimates after a chunk."""
+    chunk: int
+    counts: np.ndarray
+    violations: dict[str, float]
+    std_errors: dict[str, float]
+
+    @property
+    def shots(self) -> int:
+        """Shots run so far for each setting pair."""
+        return int(self.counts.sum(axis=-1).min())
+
+
+def fold_counts(histogram: np.ndarray, counts: dict[str, int]):
+    """Add Qiskit counts of one setting pair to its histogram of outcomes `2 * alice_bit + bob_bit`."""
+    for key, value in counts.items():
+        # Qiskit keys are big-endian, so the integer value has Alice's bit in the lowest place.
+        bits = int(key.replace(" ", ""), 2)
+        histogram[2 * (bits & 1) + (bits >> 1 & 1)] += value
+
+
+def fold_memory(histogram: np.ndarray, memory: list[str]):
+    """Add per-shot bit-strings of one setting pair to its histogram."""
+    # Reading a big-endian two-bit key with character `i` as bit `i` gives the outcome index.
+    histogram += np.bincount(bitstrings_to_integers(memory).astype(np.int64), minlength=len(histogram))
+
+
+def stream_experiments(
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    chunk_shots: int = 10_000,
+    memory: bool = False,
+    seed: int | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+) -> Iterator[StreamUpdate]:
+    """Run every setting pair for `shots` shots in chunks and yield the estimates after each.
+
+    Each chunk is a single job of the nine circuits. With `memory=True`, the chunk's per-shot
+    bit-strings are requested and folded instead of its counts. Chunk `k` is seeded with
+    `seed + k`, so the chunks are independent but the stream is reproducible.
+    """
+    settings = list(itertools.product(SETTINGS, repeat=2))
+    circuits = [
+        bind_template(
+            transpiled_template(
+                alice_setting, bob_setting, charlie_size, debbie_size, backend, noise_model, fan_out
+            ),
+            angles,
+            beta,
+        )
+        for alice_setting, bob_setting in settings
+    ]
+    weights = {name: inequality_weights(name) for name in INEQUALITIES}
+
+    histogram = np.zeros((len(SETTINGS), len(SETTINGS), 4), dtype=np.int64)
+    flat_histogram = histogram.reshape(len(settings), 4)
+    done = 0
+    for chunk in itertools.count():
+        if done >= shots:
+            return
+        chunk_size = min(chunk_shots, shots - done)
+        options = run_options(backend, noise_model, chunk_size, seed + chunk if seed is not None else None)
+        result = backend.run(circuits, memory=memory, **options).result()
+        for i in range(len(settings)):
+            if memory:
+                fold_memory(flat_histogram[i], result.get_memory(i))
+            else:
+                fold_counts(flat_histogram[i], result.get_counts(i))
+        done += chunk_size
+
+        values = compute_inequality_tensor(histogram / done)
+        yield StreamUpdate(
+            chunk=chunk,
+            counts=histogram.copy(),
+            violations={name: float(values[k]) for k, name in enumerate(INEQUALITIES)},
+            std_errors={name: estimate(histogram, *weights[name])[1] for name in INEQUALITIES},
+        )
@@ -0,0 +1,184 @@
+"""Parallel sweeps over noise levels, friend sizes, shots and seeds."""
+import itertools
+import multiprocessing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.backends import get_backend
+from wigners_friend.config import ANGLES, BETA
+from wigners_friend.counts import ExperimentCounts
+from wigners_friend.density import noisy_probability_tensor, sample_counts
+from wigners_friend.noise import backend_noise_model, depolarizing_noise_model
+from wigners_friend.stats import compute_inequalities
+from wigners_friend.utils import generate_all_counts
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    """One independent point of a sweep grid.
+
+    A `noise_level` of None means no depolarizing noise on top of the backend noise.
+    """
+    noise_level: float | None
+    charlie_size: int
+    debbie_size: int
+    shots: int
+    seed: int | None = None
+
+
+@dataclass
+class SweepResult:
+    """Counts and inequality values of one sweep point.
+
+    The counts are array-backed, which keeps them cheap to send back from worker processes.
+    """
+    point: SweepPoint
+    counts: ExperimentCounts
+    violations: dict[str, float]
+
+
+def sweep_grid(
+    noise_levels: Iterable[float | None] = (None,),
+    friend_sizes: Iterable[int | tuple[int, int]] = (1,),
+    shots: Iterable[int] = (1000,),
+    seeds: Iterable[int | None] = (None,),
+) -> list[SweepPoint]:
+    """All combinations of the grid values.
+
+    A friend size is either an int used for both Charlie and Debbie or a (charlie_size,
+    debbie_size) tuple.
+    """
+    friend_size_pairs = [size if isinstance(size, tuple) else (size, size) for size in friend_sizes]
+    return [
+        SweepPoint(noise_level, charlie_size, debbie_size, point_shots, seed)
+        for noise_level, (charlie_size, debbie_size), point_shots, seed in itertools.product(
+            noise_levels, friend_size_pairs, shots, seeds
+        )
+    ]
+
+
+def point_noise_model(point: SweepPoint, backend: Backend, backend_noise: bool) -> NoiseModel | None:
+    """Noise model of a sweep point.
+
+    This is the backend's device noise if `backend_noise` is set, and otherwise depolarizing
+    noise of the point's noise level (if any).
+    """
+    if backend_noise and point.noise_level is not None:
+        raise ValueError("Depolarizing noise levels cannot be combined with backend noise.")
+    if backend_noise:
+        return backend_noise_model(backend)
+    if point.noise_level is not None:
+        return depolarizing_noise_model(point.noise_level)
+    return None
+
+
+def run_point(
+    point: SweepPoint,
+    backend_name: str = "aer_simulator",
+    backend_noise: bool = False,
+    angles: list[float] = ANGLES,
+    beta: float = BETA,
+) -> SweepResult:
+    """Run all settings of a single sweep point with the noise of `point_noise_model`."""
+    backend = get_backend(backend_name)
+    noise_model = point_noise_model(point, backend, backend_noise)
+
+    all_counts = generate_all_counts(
+        backend=backend,
+        noise_model=noise_model,
+        shots=point.shots,
+        angles=angles,
+        beta=beta,
+        charlie_size=point.charlie_size,
+        debbie_size=point.debbie_size,
+        batch=True,
+        seed=point.seed,
+    )
+    counts = ExperimentCounts.from_dict(all_counts)
+    return SweepResult(point, counts, compute_inequalities(counts))
+
+
+def iter_sweep(
+    points: list[SweepPoint],
+    backend_name: str = "aer_simulator",
+    backend_noise: bool = False,
+    angles: list[float] = ANGLES,
+    beta: float = BETA,
+    max_workers: int | None = None,
+) -> Iterator[SweepResult]:
+    """Run the points over a process pool and yield each result as soon as it finishes.
+
+    `max_workers=1` runs the points one after the other in the current process. Workers are
+    spawned rather than forked, since forking a process that has already run Aer's threaded
+    simulator can deadlock. Spawned workers re-import the calling script's main module, so a
+    script must call this under `if __name__ == "__main__":`.
+    """
+    if max_workers == 1:
+        for point in points:
+            yield run_point(point, backend_name, backend_noise, angles, beta)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(run_point, point, backend_name, backend_noise, angles, beta)
+            for point in points
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_sweep(
+    points: list[SweepPoint],
+    backend_name: str = "aer_simulator",
+    backend_noise: bool = False,
+    angles: list[float] = ANGLES,
+    beta: float = BETA,
+    max_workers: int | None = None,
+) -> list[SweepResult]:
+    """Run the points over a process pool and return the results in the order of `points`.
+
+    As with `iter_sweep`, a script must call this under `if __name__ == "__main__":`.
+    """
+    finished = {
+        result.point: result
+        for result in iter_sweep(points, backend_name, backend_noise, angles, beta, max_workers)
+    }
+    return [finished[point] for point in points]
+
+
+def run_density_sweep(
+    points: list[SweepPoint],
+    backend_name: str = "aer_simulator",
+    backend_noise: bool = False,
+    angles: list[float] = ANGLES,
+    beta: float = BETA,
+) -> list[SweepResult]:
+    """Sweep from exact noisy distributions instead of simulated shots.
+
+    The distribution of every distinct (noise level, friend sizes) is computed once with a
+    density-matrix simulation, and each point's shots are drawn from it with its seed. The
+    circuits are compiled onto the backend's device layout (see `compile_circuit`), so that
+    with `backend_noise` each qubit gets the noise of the device qubit it is mapped to.
+    """
+    backend = get_backend(backend_name)
+    tensors = {}
+    sweep = []
+    for point in points:
+        key = (point.noise_level, point.charlie_size, point.debbie_size)
+        if key not in tensors:
+            tensors[key] = noisy_probability_tensor(
+                point_noise_model(point, backend, backend_noise),
+                angles,
+                beta,
+                point.charlie_size,
+                point.debbie_size,
+                backend,
+            )
+        counts = sample_counts(tensors[key], point.shots, point.seed)
+        sweep.append(SweepResult(point, counts, compute_inequalities(counts)))
+    return sweep
@@ -0,0 +1,111 @@
+"""Parameterized EWFS circuit templates with a transpilation cache."""
+import functools
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.providers import Backend
+from qiskit_aer.noise import NoiseModel
+
+from wigners_friend.compilation import compile_circuit
+from wigners_friend.ewfs_circuit import ewfs
+from wigners_friend.fan_out import FanOut
+from wigners_friend.setting import Setting
+from wigners_friend.config import SETTINGS
+
+
+# Maximum number of transpiled templates kept in memory.
+TRANSPILE_CACHE_SIZE = 256
+
+# Free parameters standing in for `ANGLES` and `BETA` in the templates.
+ANGLE_PARAMETERS = {setting: Parameter(f"angle_{setting}") for setting in SETTINGS}
+BETA_PARAMETER = Parameter("beta")
+
+
+@functools.lru_cache(maxsize=None)
+def ewfs_template(
+    alice_setting: Setting,
+    bob_setting: Setting,
+    charlie_size: int,
+    debbie_size: int,
+    fan_out: FanOut = FanOut.LADDER,
+    charlie_offset: int | None = None,
+    debbie_offset: int | None = None,
+) -> QuantumCircuit:
+    """EWFS circuit with the angles and beta left as free parameters.
+
+    The template is built once per (setting pair, charlie_size, debbie_size, fan_out, offsets),
+    so a friend qubit picked at random for a PEEK setting is fixed for the lifetime of the
+    template.
+    """
+    return ewfs(
+        alice_setting=alice_setting,
+        bob_setting=bob_setting,
+        angles=ANGLE_PARAMETERS,
+        beta=BETA_PARAMETER,
+        charlie_size=charlie_size,
+        debbie_size=debbie_size,
+        fan_out=fan_out,
+        charlie_offset=charlie_offset,
+        debbie_offset=debbie_offset,
+    )
+
+
+@functools.lru_cache(maxsize=TRANSPILE_CACHE_SIZE)
+def _transpile_template(
+    alice_setting: Setting,
+    bob_setting: Setting,
+    charlie_size: int,
+    debbie_size: int,
+    backend: Backend,
+    basis_gates: tuple[str, ...] | None,
+    fan_out: FanOut,
+    charlie_offset: int | None,
+    debbie_offset: int | None,
+) -> QuantumCircuit:
+    return compile_circuit(
+        ewfs_template(
+            alice_setting, bob_setting, charlie_size, debbie_size, fan_out, charlie_offset, debbie_offset
+        ),
+        backend,
+        charlie_size,
+        debbie_size,
+        fan_out,
+        basis_gates=list(basis_gates) if basis_gates is not None else None,
+    )
+
+
+def transpiled_template(
+    alice_setting: Setting,
+    bob_setting: Setting,
+    charlie_size: int,
+    debbie_size: int,
+    backend: Backend,
+    noise_model: NoiseModel,
+    fan_out: FanOut = FanOut.LADDER,
+    charlie_offset: int | None = None,
+    debbie_offset: int | None = None,
+) -> QuantumCircuit:
+    """Transpiled EWFS template, cached by circuit structure, backend and basis gates.
+
+    Templates are compiled by `compile_circuit`, with the device layout of the friend registers.
+    """
+    basis_gates = tuple(noise_model.basis_gates) if noise_model is not None else None
+    return _transpile_template(
+        alice_setting, bob_setting, charlie_size, debbie_size, backend, basis_gates, fan_out,
+        charlie_offset, debbie_offset,
+    )
+
+
+def bind_template(circuit: QuantumCircuit, angles: list[float], beta: float) -> QuantumCircuit:
+    """Bind the angles and beta to a (transpiled) template."""
+    values = {ANGLE_PARAMETERS[setting]: angles[setting] for setting in SETTINGS}
+    values[BETA_PARAMETER] = beta
+    return circuit.assign_parameters(
+        {parameter: value for parameter, value in values.items() if parameter in circuit.parameters}
+    )
+
+
+def clear_template_cache():
+    """Drop all cached templates and transpiled templates."""
+    ewfs_template.cache_clear()
+    _transpile_template.cache_clear()
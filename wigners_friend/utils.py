@@ -1,68 +1,214 @@
+"""Circuit execution and decoding of the measurement results.
+
+Qiskit and Aer are imported by the functions that build or run circuits, so decoding results
+does not pay for loading them.
+"""
+from __future__ import annotations
+
 import itertools
-import qiskit
-from qiskit.providers import Backend
-from qiskit_aer.noise import NoiseModel
+import time
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
 
 from wigners_friend.observer import Observer
-from wigners_friend.ewfs_circuit import ewfs
-from wigners_friend.config import SETTINGS
+from wigners_friend.setting import Setting
+from wigners_friend.fan_out import FanOut
 from wigners_friend.config import (
-    PEEK, REVERSE_1, REVERSE_2,
+    MEAS_SIZE,
+    PEEK,
     SETTINGS,
 )
 
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
+    from qiskit.providers import Backend
+    from qiskit_aer.noise import NoiseModel
+
+    from wigners_friend.instrumentation import RunMetadata, Sink
+
+
+def bitstrings_to_integers(bitstrings: list[str]) -> np.ndarray:
+    """Convert equal-length bit-strings to integers where character `i` is bit `i`."""
+    width = len(bitstrings[0])
+    if width > 64:
+        raise ValueError(f"Bit-strings of width {width} do not fit into 64-bit integers.")
+    bits = np.frombuffer("".join(bitstrings).encode(), dtype=np.uint8).reshape(-1, width) - ord("0")
+    return bits.astype(np.uint64) @ (np.uint64(1) << np.arange(width, dtype=np.uint64))
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Number of set bits of each 64-bit integer."""
+    values = values.astype(np.uint64)
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (
+        (values & np.uint64(0x3333333333333333))
+        + ((values >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    )
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((values * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
 
-def decode_results(results: dict[str, float], charlie_size: int, debbie_size: int) -> dict[str, float]:
-    """Take majority vote of measurement bit-strings."""
+def majority_vote(values: np.ndarray, offset: int, width: int) -> np.ndarray:
+    """Majority vote over `width` bits starting at bit `offset`, zero winning only a strict majority."""
+    mask = np.uint64(((1 << width) - 1) << offset)
+    zero_count = width - popcount(values & mask)
+    return (zero_count < width // 2 + 1).astype(np.int64)
+
+
+def decode_results(
+    results: dict[tuple[Setting, Setting], dict[str, float] | list[str]],
+    charlie_size: int,
+    debbie_size: int,
+) -> dict[tuple[Setting, Setting], dict[str, float]]:
+    """Take majority vote of measurement bit-strings.
+
+    The keys hold Alice's bits followed by Bob's bits, in the same order as the keys of
+    `generate_all_experiments`. An observer whose friend is peeked at contributes the whole
+    friend register (`charlie_size` or `debbie_size` bits), otherwise a single bit. Keys of
+    `MEAS_SIZE` bits carry a single bit per observer. Each setting maps to either a dict of
+    counts/probabilities or a list of per-shot bit-strings (memory), in which case the decoded
+    values are shot counts.
+    """
     decoded_results = {}
     # For each setting, there is a dictionary of measurement results.
-    for setting in results:
-        if setting == (PEEK, PEEK) or setting == (PEEK, REVERSE_1) or setting == (PEEK, REVERSE_2):
-            setting_results = {}
-            # Decode the keys for each measurement result of the setting.
-            for k, v in results[setting].items():
-                alice_friend, bob_friend = k[:charlie_size], k[debbie_size:]
-
-                alice_zero_count, bob_zero_count = alice_friend.count("0"), bob_friend.count("0")
-                if setting[1] == PEEK:
-                    alice_decoding = "0" if alice_zero_count >= charlie_size // 2 + 1 else "1"
-                    bob_decoding = "0" if bob_zero_count >= debbie_size // 2 + 1 else "1"
-                else:
-                    alice_decoding = "0" if alice_zero_count >= charlie_size // 2 + 1 else "1"
-                    bob_decoding = "0" if bob_zero_count >= 1 else "1"
-
-                if alice_decoding + bob_decoding in setting_results.keys():
-                    setting_results[alice_decoding + bob_decoding] += v
-                else:
-                    setting_results[alice_decoding + bob_decoding] = v
-            decoded_results[setting] = setting_results
-
-
-        elif setting == (REVERSE_1, PEEK) or setting == (REVERSE_2, PEEK):
-            setting_results = {}
-            # Decode the keys for each measurement result of the setting.
-            for k, v in results[setting].items():
-                alice_friend, bob_friend = k[:1], k[1:]
-
-                alice_zero_count, bob_zero_count = alice_friend.count("0"), bob_friend.count("0")
-
-                alice_decoding = "0" if alice_zero_count >= 1 else "1"
-                bob_decoding = "0" if bob_zero_count >= debbie_size // 2 + 1 else "1"
-
- 
-                if alice_decoding + bob_decoding in setting_results.keys():
-                    setting_results[alice_decoding + bob_decoding] += v
-                else:
-                    setting_results[alice_decoding + bob_decoding] = v
-            decoded_results[setting] = setting_results
-
+    for setting, setting_results in results.items():
+        if isinstance(setting_results, dict):
+            keys = list(setting_results)
+            weights = np.fromiter(setting_results.values(), dtype=float, count=len(keys))
+            is_integral = all(isinstance(value, (int, np.integer)) for value in setting_results.values())
         else:
-            decoded_results[setting] = results[setting]
-            
+            keys = list(setting_results)
+            weights = None
+            is_integral = True
+
+        if not keys:
+            decoded_results[setting] = {}
+            continue
+
+        width = len(keys[0])
+        alice_width = charlie_size if setting[0] == PEEK else 1
+        bob_width = debbie_size if setting[1] == PEEK else 1
+        if width == MEAS_SIZE:
+            alice_width, bob_width = 1, 1
+        elif width != alice_width + bob_width:
+            raise ValueError(
+                f"Bit-strings of width {width} do not match setting {setting} with "
+                f"{charlie_size=} and {debbie_size=}."
+            )
+
+        values = bitstrings_to_integers(keys)
+        alice_decoding = majority_vote(values, 0, alice_width)
+        bob_decoding = majority_vote(values, alice_width, bob_width)
+        outcomes = 2 * alice_decoding + bob_decoding
+
+        seen = np.bincount(outcomes, minlength=4) > 0
+        totals = np.bincount(outcomes, weights=weights, minlength=4)
+        decoded_results[setting] = {
+            f"{outcome:02b}": int(totals[outcome]) if is_integral else float(totals[outcome])
+            for outcome in np.flatnonzero(seen)
+        }
+
     return decoded_results
 
 
-def generate_all_experiments(
+def reverse_keys(counts: dict[str, int]) -> dict[str, int]:
+    """Key Qiskit counts in classical bit order."""
+    # Qiskit keys are big-endian, so reverse them to put Alice's bit first.
+    return {key[::-1]: value for key, value in counts.items()}
+
+
+def run_options(backend: Backend, noise_model: NoiseModel, shots: int, seed: int | None = None) -> dict:
+    """Options for `backend.run` on circuits that are already transpiled."""
+    options = {"shots": shots}
+    if noise_model is not None:
+        options["noise_model"] = noise_model
+    if seed is not None and hasattr(backend.options, "seed_simulator"):
+        options["seed_simulator"] = seed
+    return options
+
+
+def execute_circuits(
+    circuits: list[QuantumCircuit],
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    transpiled: bool = False,
+    seed: int | None = None,
+    initial_layout: list[int] | None = None,
+) -> list[dict[str, int]]:
+    """Transpile and run a list of circuits as a single job and return the counts of each.
+
+    Circuits that are already `transpiled` for the backend are submitted as they are. The
+    `seed` is passed to simulators as `seed_simulator` and ignored by other backends.
+    """
+    import qiskit
+
+    if transpiled:
+        job = backend.run(circuits, **run_options(backend, noise_model, shots, seed))
+    else:
+        job = qiskit.execute(
+            experiments=circuits,
+            backend=backend,
+            noise_model=noise_model,
+            basis_gates=noise_model.basis_gates if noise_model is not None else None,
+            shots=shots,
+            seed_simulator=seed,
+            initial_layout=initial_layout,
+        )
+    result = job.result()
+    return [result.get_counts(i) for i in range(len(circuits))]
+
+
+def _instrumented_counts(
+    circuits: list[QuantumCircuit],
+    settings: list[tuple[Setting, Setting]],
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: int,
+    batch: bool,
+    transpiled: bool,
+    seed: int | None,
+    initial_layout: list[int] | None,
+    metadata: RunMetadata,
+) -> list[dict[str, int]]:
+    """Like `execute_circuits`, recording the transpile, submit and execution times of each setting."""
+    import qiskit
+
+    if not transpiled:
+        # Transpile here rather than in `qiskit.execute` to time it per setting.
+        transpiled_circuits = []
+        for setting, circuit in zip(settings, circuits):
+            start = time.perf_counter()
+            transpiled_circuits.append(
+                qiskit.transpile(
+                    circuit,
+                    backend=backend,
+                    basis_gates=noise_model.basis_gates if noise_model is not None else None,
+                    initial_layout=initial_layout,
+                )
+            )
+            metadata.settings[setting].transpile_seconds += time.perf_counter() - start
+        circuits = transpiled_circuits
+    for setting, circuit in zip(settings, circuits):
+        metadata.settings[setting].record_circuit(circuit)
+
+    jobs = [list(range(len(circuits)))] if batch else [[i] for i in range(len(circuits))]
+    all_counts = []
+    for job_indices in jobs:
+        start = time.perf_counter()
+        job = backend.run([circuits[i] for i in job_indices], **run_options(backend, noise_model, shots, seed))
+        submitted = time.perf_counter()
+        result = job.result()
+        metadata.record_job(
+            [settings[i] for i in job_indices], result, submitted - start, time.perf_counter() - submitted
+        )
+        all_counts.extend(result.get_counts(i) for i in range(len(job_indices)))
+    return all_counts
+
+
+def generate_all_counts(
     backend: Backend,
     noise_model: NoiseModel,
     shots: float,
@@ -70,32 +216,138 @@ def generate_all_experiments(
     beta: float,
     charlie_size: int,
     debbie_size: int,
-) -> dict[tuple[Observer, Observer], list[float]]:
-    """Generate probabilities for all combinations of experimental settings."""
+    batch: bool = False,
+    use_templates: bool = False,
+    seed: int | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+    metadata: RunMetadata | None = None,
+    layout: str | None = None,
+) -> dict[tuple[Observer, Observer], dict[str, int]]:
+    """Generate counts for all combinations of experimental settings, keyed in classical bit order.
+
+    With `batch=True`, the nine setting circuits are transpiled together and submitted as
+    a single job instead of one job per setting. With `use_templates=True`, the circuits are
+    taken from the cached transpiled templates and only the angles and beta are bound. The
+    `seed` makes simulator runs reproducible. `fan_out` selects how the friend registers copy
+    the observers; CHAIN circuits are laid out along a path of the device's coupling map.
+    `layout="device"` lays out every fan-out with the cached device layout instead, see
+    `fan_out_layout`. Per-setting timings and circuit metrics are added to `metadata`, if given.
+    """
+    from wigners_friend.ewfs_circuit import ewfs
+    from wigners_friend.instrumentation import SettingMetrics
+    from wigners_friend.layout import fan_out_layout
+    from wigners_friend.templates import bind_template, transpiled_template
+
     all_experiment_combos = list(itertools.product(SETTINGS, repeat=2))
-    
-    results = {}
+
+    circuits = []
     for alice_setting, bob_setting in all_experiment_combos:
-        ewfs_circuit = ewfs(
-            alice_setting=alice_setting,
-            bob_setting=bob_setting, 
-            angles=angles,
-            beta=beta,
-            charlie_size=charlie_size,
-            debbie_size=debbie_size
-        )
+        start = time.perf_counter()
+        if use_templates:
+            template = transpiled_template(
+                alice_setting, bob_setting, charlie_size, debbie_size, backend, noise_model, fan_out
+            )
+            transpiled = time.perf_counter()
+            circuit = bind_template(template, angles, beta)
+        else:
+            circuit = ewfs(
+                alice_setting=alice_setting,
+                bob_setting=bob_setting,
+                angles=angles,
+                beta=beta,
+                charlie_size=charlie_size,
+                debbie_size=debbie_size,
+                fan_out=fan_out,
+            )
+            transpiled = start
+        circuits.append(circuit)
+        if metadata is not None:
+            metadata.settings[(alice_setting, bob_setting)] = SettingMetrics(
+                shots=shots,
+                build_seconds=time.perf_counter() - transpiled,
+                transpile_seconds=transpiled - start,
+            )
+    initial_layout = None
+    if not use_templates:
+        initial_layout = fan_out_layout(backend, charlie_size, debbie_size, fan_out, layout)
 
-        job = qiskit.execute(
-            experiments=ewfs_circuit,
-            backend=backend,
-            noise_model=noise_model,
-            basis_gates=noise_model.basis_gates if noise_model is not None else None,
-            shots=shots,
+    if metadata is not None:
+        all_counts = _instrumented_counts(
+            circuits, all_experiment_combos, backend, noise_model, shots, batch, use_templates, seed,
+            initial_layout, metadata,
+        )
+    elif batch:
+        all_counts = execute_circuits(
+            circuits, backend, noise_model, shots, transpiled=use_templates, seed=seed,
+            initial_layout=initial_layout,
         )
-        counts = job.result().get_counts()
-        
-        # Convert counts to probabilities.
-        probabilities = {key[::-1]: value / shots for key, value in counts.items()}
+    else:
+        all_counts = [
+            execute_circuits(
+                [circuit], backend, noise_model, shots, transpiled=use_templates, seed=seed,
+                initial_layout=initial_layout,
+            )[0]
+            for circuit in circuits
+        ]
+
+    return {settings: reverse_keys(counts) for settings, counts in zip(all_experiment_combos, all_counts)}
+
+
+def generate_all_experiments(
+    backend: Backend,
+    noise_model: NoiseModel,
+    shots: float,
+    angles: list[float],
+    beta: float,
+    charlie_size: int,
+    debbie_size: int,
+    batch: bool = False,
+    use_templates: bool = False,
+    seed: int | None = None,
+    fan_out: FanOut = FanOut.LADDER,
+    return_metadata: bool = False,
+    sinks: Sequence[Sink] = (),
+    layout: str | None = None,
+) -> dict[tuple[Observer, Observer], list[float]] | tuple[dict, RunMetadata]:
+    """Generate probabilities for all combinations of experimental settings.
+
+    Takes the same options as `generate_all_counts`. With `return_metadata=True` or any
+    `sinks`, the run is instrumented: the time of every stage and the transpiled circuit
+    metrics are collected per setting pair into a `RunMetadata`, which is passed to each sink
+    and, with `return_metadata=True`, returned next to the probabilities.
+    """
+    from wigners_friend.backends import backend_name
+    from wigners_friend.instrumentation import RunMetadata
+
+    start = time.perf_counter()
+    metadata = RunMetadata(backend_name(backend)) if return_metadata or sinks else None
+    all_counts = generate_all_counts(
+        backend=backend,
+        noise_model=noise_model,
+        shots=shots,
+        angles=angles,
+        beta=beta,
+        charlie_size=charlie_size,
+        debbie_size=debbie_size,
+        batch=batch,
+        use_templates=use_templates,
+        seed=seed,
+        fan_out=fan_out,
+        metadata=metadata,
+        layout=layout,
+    )
+
+    # Convert counts to probabilities.
+    results = {}
+    for settings, counts in all_counts.items():
+        postprocess_start = time.perf_counter()
+        results[settings] = {key: value / shots for key, value in counts.items()}
+        if metadata is not None:
+            metadata.settings[settings].postprocess_seconds += time.perf_counter() - postprocess_start
 
-        results[(alice_setting, bob_setting)] = probabilities
-    return results
+    if metadata is None:
+        return results
+    metadata.wall_seconds = time.perf_counter() - start
+    for sink in sinks:
+        sink(metadata)
+    return (results, metadata) if return_metadata else results